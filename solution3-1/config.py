@@ -18,9 +18,15 @@ PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# 静态资源目录（前端脚本等，通过 gr.set_static_paths 提供给浏览器缓存）
+STATIC_DIR = PROJECT_ROOT / "static"
+
 # 数据文件路径
 DATA_FILE = DATA_DIR / "voice_entries.json"
-STRUCTURED_DATA_FILE = DATA_DIR / "structured_medicines.json"
+STRUCTURED_DATA_FILE = DATA_DIR / "structured_medicines.jsonl"
+LEGACY_STRUCTURED_DATA_FILE = DATA_DIR / "structured_medicines.json"  # 旧版格式，首次启动时自动迁移
+PARSER_CACHE_FILE = DATA_DIR / "parser_cache.json"
+SAVE_DEBOUNCE_SECONDS = 0.5  # 结构化数据延迟保存间隔，期间的多次修改合并为一次写盘
 
 # 服务器配置
 SERVER_NAME = "0.0.0.0"
@@ -47,6 +53,14 @@ CLAUDE_MODEL = "claude-3-opus-20240229"  # Claude 3 Opus
 CLAUDE_MAX_TOKENS = 1024
 CLAUDE_TEMPERATURE = 0.3  # 较低的温度以获得更稳定的结果
 
+# LLM批处理配置
+LLM_BATCH_SIZE = 10  # 每次请求合并解析的条目数量，可根据需要调整
+LLM_CONCURRENCY = 5  # 批量解析时同时进行的LLM请求上限，避免触发API限流
+
+# LLM解析缓存配置
+PARSER_CACHE_SIMILARITY = 0.95  # 语义匹配的余弦相似度阈值，过低可能把不同药品误判为同一条
+PARSER_CACHE_EMBEDDING_MODEL = os.getenv("PARSER_CACHE_EMBEDDING_MODEL", "")  # 为空时只做精确匹配，如 paraphrase-multilingual-MiniLM-L12-v2
+
 # OpenAI配置（备用）
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")  # 请设置环境变量或直接填入
 OPENAI_MODEL = "gpt-4"
@@ -54,3 +68,6 @@ OPENAI_MODEL = "gpt-4"
 # Ollama配置（备用）
 OLLAMA_BASE_URL = "http://localhost:11434"
 OLLAMA_MODEL = "llama2"
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "2"))  # 与Ollama服务端的并行度保持一致
+OLLAMA_NUM_PREDICT = 512  # 单次生成的最大token数
+OLLAMA_KEEP_ALIVE = "10m"  # 模型在两次请求之间保持加载的时间
@@ -3,13 +3,37 @@ LLM客户端封装模块
 支持多种LLM提供商（Claude、OpenAI、Ollama）
 """
 
+import asyncio
+import importlib.util
 import logging
 import json
+import re
 from typing import Dict, Any, Optional
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
+
+# httpx随anthropic SDK一同安装；缺失时使用SDK默认的HTTP客户端
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 logger = logging.getLogger(__name__)
 
+# LLM偶尔会用```json代码块包裹结果或附带说明文字，预编译以便每次解析直接复用
+_CODE_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+_JSON_BODY_RE = re.compile(r'[\[{].*[\]}]', re.DOTALL)
+
+
+def _loads_llm_json(response_text: str) -> Any:
+    """解析LLM返回的JSON，纯JSON直接解析，否则提取代码块或最外层的JSON片段"""
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError:
+        match = _CODE_FENCE_RE.search(response_text) or _JSON_BODY_RE.search(response_text)
+        if match is None:
+            raise
+        return json.loads(match.group(1) if match.re is _CODE_FENCE_RE else match.group(0))
+
 
 class LLMClient:
     """LLM客户端基类"""
@@ -18,18 +42,104 @@ class LLMClient:
         """解析药品文本为结构化数据"""
         raise NotImplementedError
 
+    async def aparse_medicine_text(self, text: str) -> Dict[str, Any]:
+        """异步解析药品文本（默认在线程中执行同步实现）"""
+        return await asyncio.to_thread(self.parse_medicine_text, text)
+
+    async def aclose(self) -> None:
+        """释放客户端持有的连接（默认无操作）"""
+
+    def _parse_response(self, response_text: str) -> Dict[str, Any]:
+        """解析LLM返回的JSON文本"""
+        logger.info(f"LLM响应: {response_text[:100]}...")
+        result = _loads_llm_json(response_text)
+        logger.info(f"解析成功: {result.get('drug_name', 'N/A')}")
+        return result
+
+    def _build_prompt(self, text: str) -> str:
+        """构建提示词"""
+        return f"""请从以下药品信息文本中提取结构化数据。
+
+文本："{text}"
+
+请提取以下信息并以JSON格式返回：
+1. drug_name（药名/通用名）- 必填
+2. brand_name（商品名）- 如果文本中有提及
+3. generic_name（学术名/化学名）- 根据药名推断，如阿莫西林→Amoxicillin
+4. quantity（数量）- 提取数字，如"一盒"→1，"30片"→30
+5. unit（单位）- 如"盒"、"片"、"袋"
+6. specification（规格）- 如"0.5g"、"500mg"
+7. package_count（包装数量）- 如"1盒"、"2板"
+8. expiry_date（有效期）- 格式化为YYYY-MM或YYYY-MM-DD，如"2027年6月"→"2027-06"
+
+注意事项：
+- 如果某个字段在文本中没有提及，请设为空字符串""
+- generic_name可以根据drug_name推断（如果你知道的话）
+- 数量和日期尽量标准化
+- 只返回JSON，不要其他说明文字
+
+返回格式示例：
+{{
+    "drug_name": "阿莫西林",
+    "brand_name": "",
+    "generic_name": "Amoxicillin",
+    "quantity": 1.0,
+    "unit": "盒",
+    "specification": "",
+    "package_count": "1盒",
+    "expiry_date": "2027-06"
+}}"""
+
+    def _fallback_parse(self, text: str) -> Dict[str, Any]:
+        """后备解析方法（LLM失败时）"""
+        logger.warning(f"使用后备解析: {text}")
+        return {
+            "drug_name": text.split('，')[0] if '，' in text else text.split(',')[0],
+            "brand_name": "",
+            "generic_name": "",
+            "quantity": 0.0,
+            "unit": "",
+            "specification": "",
+            "package_count": "",
+            "expiry_date": "",
+            "confidence": 0.0
+        }
+
 
 class ClaudeClient(LLMClient):
     """Claude API客户端"""
 
     def __init__(self, api_key: str, model: str = "claude-3-5-sonnet-20241022",
-                 max_tokens: int = 1024, temperature: float = 0.3):
-        self.client = Anthropic(api_key=api_key)
+                 max_tokens: int = 1024, temperature: float = 0.3, max_connections: int = 5):
+        # 同步/异步各共用一个长连接池，避免每次请求重新进行TCP/TLS握手
+        http_client, async_http_client = self._create_http_clients(max_connections)
+        self.client = Anthropic(api_key=api_key, http_client=http_client)
+        self.async_client = AsyncAnthropic(api_key=api_key, http_client=async_http_client)
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
         logger.info(f"ClaudeClient 初始化: model={model}")
 
+    @staticmethod
+    def _create_http_clients(max_connections: int):
+        """创建带连接池上限的HTTP客户端（安装了h2时启用HTTP/2）"""
+        if httpx is None:
+            return None, None
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+        http2 = importlib.util.find_spec('h2') is not None
+        return (
+            httpx.Client(limits=limits, http2=http2),
+            httpx.AsyncClient(limits=limits, http2=http2)
+        )
+
+    async def aclose(self) -> None:
+        """关闭连接池"""
+        self.client.close()
+        await self.async_client.close()
+
     def parse_medicine_text(self, text: str) -> Dict[str, Any]:
         """
         使用Claude解析药品文本
@@ -41,6 +151,7 @@ class ClaudeClient(LLMClient):
             结构化数据字典
         """
         prompt = self._build_prompt(text)
+        response_text = ""
 
         try:
             logger.info(f"调用Claude API解析文本: {text[:50]}...")
@@ -55,13 +166,42 @@ class ClaudeClient(LLMClient):
             )
 
             response_text = message.content[0].text
-            logger.info(f"Claude响应: {response_text[:100]}...")
+            return self._parse_response(response_text)
+
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON解析失败: {e}, 响应: {response_text[:200]}")
+            return self._fallback_parse(text)
+        except Exception as e:
+            logger.error(f"Claude API调用失败: {e}", exc_info=True)
+            return self._fallback_parse(text)
 
-            # 解析JSON响应
-            result = json.loads(response_text)
-            logger.info(f"解析成功: {result.get('drug_name', 'N/A')}")
+    async def aparse_medicine_text(self, text: str) -> Dict[str, Any]:
+        """
+        使用Claude异步解析药品文本（用于并发批量解析）
 
-            return result
+        Args:
+            text: 原始药品信息文本
+
+        Returns:
+            结构化数据字典
+        """
+        prompt = self._build_prompt(text)
+        response_text = ""
+
+        try:
+            logger.info(f"异步调用Claude API解析文本: {text[:50]}...")
+
+            message = await self.async_client.messages.create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+
+            response_text = message.content[0].text
+            return self._parse_response(response_text)
 
         except json.JSONDecodeError as e:
             logger.error(f"JSON解析失败: {e}, 响应: {response_text[:200]}")
@@ -70,30 +210,74 @@ class ClaudeClient(LLMClient):
             logger.error(f"Claude API调用失败: {e}", exc_info=True)
             return self._fallback_parse(text)
 
-    def _build_prompt(self, text: str) -> str:
-        """构建提示词"""
-        return f"""请从以下药品信息文本中提取结构化数据。
+    async def aparse_medicine_batch(self, texts: list[str]) -> list[Dict[str, Any]]:
+        """
+        使用一次Claude请求异步解析多条药品文本
 
-文本："{text}"
+        Args:
+            texts: 药品文本列表
 
-请提取以下信息并以JSON格式返回：
+        Returns:
+            结构化数据字典列表（与输入顺序一致）
+
+        Raises:
+            ValueError: 响应不是JSON数组或数量与输入不一致，由调用方决定降级策略
+        """
+        if not texts:
+            return []
+
+        prompt = self._build_batch_prompt(texts)
+        logger.info(f"异步调用Claude API批量解析: {len(texts)} 条")
+
+        message = await self.async_client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens * 2,  # 批量处理需要更多tokens
+            temperature=self.temperature,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+
+        response_text = message.content[0].text
+        logger.info(f"Claude批量响应: {response_text[:200]}...")
+
+        results = _loads_llm_json(response_text)
+        if not isinstance(results, list):
+            raise ValueError(f"批量解析返回格式错误，期望数组，实际: {type(results)}")
+        if len(results) != len(texts):
+            raise ValueError(f"批量解析结果数量不匹配: 期望{len(texts)}, 实际{len(results)}")
+
+        logger.info(f"批量解析成功: {len(results)} 条")
+        return results
+
+    def _build_batch_prompt(self, texts: list[str]) -> str:
+        """构建批量处理提示词"""
+        texts_list = "\n".join([f"{i+1}. \"{text}\"" for i, text in enumerate(texts)])
+        
+        return f"""请从以下多条药品信息文本中提取结构化数据，返回JSON数组。
+
+文本列表：
+{texts_list}
+
+请为每条文本提取以下信息：
 1. drug_name（药名/通用名）- 必填
 2. brand_name（商品名）- 如果文本中有提及
-3. generic_name（学术名/化学名）- 根据药名推断，如阿莫西林→Amoxicillin
-4. quantity（数量）- 提取数字，如"一盒"→1，"30片"→30
+3. generic_name（学术名/化学名）- 根据药名推断
+4. quantity（数量）- 提取数字
 5. unit（单位）- 如"盒"、"片"、"袋"
 6. specification（规格）- 如"0.5g"、"500mg"
 7. package_count（包装数量）- 如"1盒"、"2板"
-8. expiry_date（有效期）- 格式化为YYYY-MM或YYYY-MM-DD，如"2027年6月"→"2027-06"
+8. expiry_date（有效期）- 格式化为YYYY-MM或YYYY-MM-DD
 
 注意事项：
+- 返回JSON数组，数组长度必须等于文本数量（{len(texts)}条）
+- 数组顺序必须与输入文本顺序一致
 - 如果某个字段在文本中没有提及，请设为空字符串""
-- generic_name可以根据drug_name推断（如果你知道的话）
-- 数量和日期尽量标准化
-- 只返回JSON，不要其他说明文字
+- 只返回JSON数组，不要其他说明文字
 
 返回格式示例：
-{{
+[
+  {{
     "drug_name": "阿莫西林",
     "brand_name": "",
     "generic_name": "Amoxicillin",
@@ -102,21 +286,10 @@ class ClaudeClient(LLMClient):
     "specification": "",
     "package_count": "1盒",
     "expiry_date": "2027-06"
-}}"""
+  }},
+  ...
+]"""
 
-    def _fallback_parse(self, text: str) -> Dict[str, Any]:
-        """后备解析方法（LLM失败时）"""
-        logger.warning(f"使用后备解析: {text}")
-        return {
-            "drug_name": text.split('，')[0] if '，' in text else text.split(',')[0],
-            "brand_name": "",
-            "generic_name": "",
-            "quantity": 0.0,
-            "unit": "",
-            "specification": "",
-            "package_count": "",
-            "expiry_date": ""
-        }
 
 
 class OpenAIClient(LLMClient):
@@ -132,15 +305,66 @@ class OpenAIClient(LLMClient):
 
 
 class OllamaClient(LLMClient):
-    """Ollama本地LLM客户端（待实现）"""
-
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama2"):
-        self.base_url = base_url
+    """Ollama本地LLM客户端"""
+
+    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama2",
+                 temperature: float = 0.3, num_predict: int = 512, keep_alive: str = "10m",
+                 timeout: float = 120.0):
+        if httpx is None:
+            raise ImportError("OllamaClient 需要安装 httpx")
+        self.base_url = base_url.rstrip('/')
         self.model = model
-        logger.info("OllamaClient 初始化（未实现）")
+        self.temperature = temperature
+        self.num_predict = num_predict
+        # keep_alive让模型在两次请求之间保持加载，避免重复加载模型
+        self.keep_alive = keep_alive
+        self.client = httpx.Client(timeout=timeout)
+        logger.info(f"OllamaClient 初始化: model={model}, base_url={base_url}")
+
+    async def aclose(self) -> None:
+        """关闭连接池"""
+        self.client.close()
 
     def parse_medicine_text(self, text: str) -> Dict[str, Any]:
-        raise NotImplementedError("Ollama客户端尚未实现")
+        """
+        使用Ollama解析药品文本
+
+        Args:
+            text: 原始药品信息文本
+
+        Returns:
+            结构化数据字典
+        """
+        response_text = ""
+
+        try:
+            logger.info(f"调用Ollama API解析文本: {text[:50]}...")
+
+            response = self.client.post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": self._build_prompt(text),
+                    "stream": False,
+                    "format": "json",
+                    "keep_alive": self.keep_alive,
+                    "options": {
+                        "temperature": self.temperature,
+                        "num_predict": self.num_predict
+                    }
+                }
+            )
+            response.raise_for_status()
+
+            response_text = response.json()["response"]
+            return self._parse_response(response_text)
+
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON解析失败: {e}, 响应: {response_text[:200]}")
+            return self._fallback_parse(text)
+        except Exception as e:
+            logger.error(f"Ollama API调用失败: {e}", exc_info=True)
+            return self._fallback_parse(text)
 
 
 def create_llm_client(provider: str, **kwargs) -> LLMClient:
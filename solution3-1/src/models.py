@@ -3,9 +3,24 @@
 定义Entry和EntryList数据结构
 """
 
+import threading
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import List, Dict, Any
+from operator import attrgetter
+from typing import List, Dict, Any, Optional
+
+
+# 本进程上一次分配的结构化药品ID：ID是毫秒时间戳，同一毫秒内创建多条时依次加1，保证不重复
+_last_id = 0
+_id_lock = threading.Lock()
+
+
+def next_id() -> int:
+    """根据当前时间分配新的结构化药品ID（单调递增，进程内不重复）"""
+    global _last_id
+    with _id_lock:
+        _last_id = max(int(datetime.now().timestamp() * 1000), _last_id + 1)
+        return _last_id
 
 
 @dataclass
@@ -159,7 +174,7 @@ class EntryList:
 # 结构化数据模型
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class StructuredMedicine:
     """结构化药品信息数据模型"""
 
@@ -178,9 +193,9 @@ class StructuredMedicine:
 
     @classmethod
     def create(cls, original_text: str, **kwargs) -> "StructuredMedicine":
-        """创建新的StructuredMedicine实例"""
+        """创建新的StructuredMedicine实例（同一批次内创建的ID也不会重复）"""
         return cls(
-            id=int(datetime.now().timestamp() * 1000),
+            id=next_id(),
             original_text=original_text.strip(),
             timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             **kwargs
@@ -200,36 +215,50 @@ class StructuredMedicine:
         转换为Dataframe行格式
         [序号, 药名, 商品名, 学术名, 数量, 单位, 规格, 包装, 有效期, 原始文本, 时间]
         """
-        return [
-            number,
-            self.drug_name,
-            self.brand_name,
-            self.generic_name,
-            self.quantity,
-            self.unit,
-            self.specification,
-            self.package_count,
-            self.expiry_date,
-            self.original_text,
-            self.timestamp
-        ]
+        return [number, *STRUCTURED_ROW_GETTER(self)]
 
     def is_valid(self) -> bool:
         """检查数据是否有效（至少有药名）"""
         return bool(self.drug_name and self.drug_name.strip())
 
 
+# Dataframe行中除序号外的各列，一次取出所有属性
+STRUCTURED_ROW_GETTER = attrgetter(
+    'drug_name', 'brand_name', 'generic_name', 'quantity', 'unit',
+    'specification', 'package_count', 'expiry_date', 'original_text', 'timestamp'
+)
+
+
 class StructuredMedicineList:
     """结构化药品列表管理类"""
 
     def __init__(self, medicines: List[StructuredMedicine] = None):
         self.medicines = medicines or []
+        # 药名倒排索引：小写药名 -> 在medicines中的下标列表，按需构建，数据变化时失效
+        self._name_index: Optional[Dict[str, List[int]]] = None
+        # 排序结果缓存：(排序字段, 是否倒序) -> 排序后的列表
+        self._sorted_cache: Dict[tuple, List[StructuredMedicine]] = {}
+
+    def _invalidate(self) -> None:
+        """数据变化后使派生的索引失效"""
+        self._name_index = None
+        self._sorted_cache.clear()
+
+    def _sorted(self, field: str, key, reverse: bool) -> List[StructuredMedicine]:
+        """返回排序结果（数据未变化时复用上次的排序）"""
+        cache_key = (field, reverse)
+        cached = self._sorted_cache.get(cache_key)
+        if cached is None:
+            cached = sorted(self.medicines, key=key, reverse=reverse)
+            self._sorted_cache[cache_key] = cached
+        return cached.copy()
 
     def add(self, medicine: StructuredMedicine) -> None:
         """添加新的结构化药品"""
         if not medicine.is_valid():
             raise ValueError("药品信息无效：缺少药名")
         self.medicines.append(medicine)
+        self._invalidate()
 
     def get_all(self) -> List[StructuredMedicine]:
         """获取所有结构化药品"""
@@ -242,6 +271,7 @@ class StructuredMedicineList:
     def clear(self) -> None:
         """清空所有数据"""
         self.medicines.clear()
+        self._invalidate()
 
     def get_by_id(self, medicine_id: int) -> StructuredMedicine:
         """根据ID获取药品信息"""
@@ -257,6 +287,7 @@ class StructuredMedicineList:
             for key, value in kwargs.items():
                 if hasattr(medicine, key):
                     setattr(medicine, key, value)
+            self._invalidate()
             return True
         return False
 
@@ -264,11 +295,28 @@ class StructuredMedicineList:
         """根据ID删除药品信息"""
         original_length = len(self.medicines)
         self.medicines = [m for m in self.medicines if m.id != medicine_id]
+        self._invalidate()
         return len(self.medicines) < original_length
 
+    def _get_name_index(self) -> Dict[str, List[int]]:
+        """获取药名倒排索引（不存在时遍历一次构建）"""
+        if self._name_index is None:
+            index: Dict[str, List[int]] = {}
+            for i, m in enumerate(self.medicines):
+                index.setdefault(m.drug_name.lower(), []).append(i)
+            self._name_index = index
+        return self._name_index
+
     def filter_by_drug_name(self, drug_name: str) -> List[StructuredMedicine]:
-        """根据药名筛选"""
-        return [m for m in self.medicines if drug_name.lower() in m.drug_name.lower()]
+        """根据药名筛选（子串匹配只需遍历不重复的药名）"""
+        query = drug_name.lower()
+        hits = []
+        for name, indices in self._get_name_index().items():
+            if query in name:
+                hits.extend(indices)
+        # 保持原列表顺序
+        hits.sort()
+        return [self.medicines[i] for i in hits]
 
     def filter_by_expiry(self, before_date: str = None, after_date: str = None) -> List[StructuredMedicine]:
         """根据有效期筛选"""
@@ -281,14 +329,14 @@ class StructuredMedicineList:
 
     def sort_by_drug_name(self, reverse: bool = False) -> List[StructuredMedicine]:
         """按药名排序"""
-        return sorted(self.medicines, key=lambda m: m.drug_name, reverse=reverse)
+        return self._sorted('drug_name', lambda m: m.drug_name, reverse)
 
     def sort_by_expiry(self, reverse: bool = False) -> List[StructuredMedicine]:
         """按有效期排序"""
-        return sorted(
-            self.medicines,
-            key=lambda m: m.expiry_date if m.expiry_date else "9999-99-99",
-            reverse=reverse
+        return self._sorted(
+            'expiry_date',
+            lambda m: m.expiry_date if m.expiry_date else "9999-99-99",
+            reverse
         )
 
     def count(self) -> int:
@@ -308,7 +356,7 @@ class StructuredMedicineList:
         total = len(self.medicines)
 
         return [
-            medicine.to_dataframe_row(total - i)
+            [total - i, *STRUCTURED_ROW_GETTER(medicine)]
             for i, medicine in enumerate(reversed_medicines)
         ]
 
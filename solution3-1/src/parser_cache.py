@@ -0,0 +1,154 @@
+"""
+LLM解析结果缓存模块
+精确匹配（文本哈希）+ 语义相似匹配（可选，需要sentence-transformers）
+"""
+
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+# 语义匹配依赖为可选项，未安装时只启用精确匹配
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+# 用于防止不同剂量/数量的文本被语义匹配误判为同一条
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+class ParserCache:
+    """LLM解析结果缓存"""
+
+    def __init__(self, file_path: Path, similarity_threshold: float = 0.95,
+                 embedding_model: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            file_path: 缓存持久化文件路径
+            similarity_threshold: 语义匹配的余弦相似度阈值
+            embedding_model: sentence-transformers模型名（为None时不启用语义匹配）
+        """
+        self.file_path = file_path
+        self.similarity_threshold = similarity_threshold
+        # key -> {"text": 原始文本, "result": 解析结果}
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+        self._encoder = None
+        self._keys: List[str] = []
+        self._embeddings = None
+        if embedding_model and SentenceTransformer is not None:
+            try:
+                self._encoder = SentenceTransformer(embedding_model)
+                logger.info(f"ParserCache 启用语义匹配: {embedding_model}")
+            except Exception as e:
+                logger.warning(f"加载语义模型失败，仅使用精确匹配: {e}")
+
+        self._load()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        """计算文本的缓存键"""
+        return hashlib.blake2b(text.strip().encode('utf-8')).hexdigest()
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            命中返回解析结果字典的副本，未命中返回None
+        """
+        item = self._items.get(self._key(text))
+        if item is not None:
+            logger.info(f"解析缓存命中（精确）: {text[:50]}")
+            return dict(item['result'])
+
+        item = self._semantic_lookup(text)
+        if item is not None:
+            logger.info(f"解析缓存命中（语义）: {text[:50]} ≈ {item['text'][:50]}")
+            return dict(item['result'])
+        return None
+
+    def put(self, text: str, result: Dict[str, Any]) -> None:
+        """写入缓存（只修改内存，调用save()持久化）"""
+        key = self._key(text)
+        if key in self._items:
+            return
+        self._items[key] = {'text': text.strip(), 'result': dict(result)}
+        self._dirty = True
+        self._add_embedding(key, text)
+
+    def save(self) -> bool:
+        """将缓存持久化到文件（无变化时跳过）"""
+        if not self._dirty:
+            return True
+        try:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.file_path, 'w', encoding='utf-8') as f:
+                json.dump(self._items, f, ensure_ascii=False)
+            self._dirty = False
+            logger.info(f"保存解析缓存: {self.file_path}, {len(self._items)} 条")
+            return True
+        except IOError as e:
+            logger.error(f"保存解析缓存失败: {self.file_path}, 错误: {e}")
+            return False
+
+    def _load(self) -> None:
+        """从文件加载缓存"""
+        if not self.file_path.exists():
+            return
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._items = data
+            logger.info(f"加载解析缓存: {self.file_path}, {len(self._items)} 条")
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"加载解析缓存失败: {self.file_path}, 错误: {e}")
+            return
+
+        for key, item in self._items.items():
+            self._add_embedding(key, item['text'])
+
+    def _add_embedding(self, key: str, text: str) -> None:
+        """将文本向量加入语义索引"""
+        if self._encoder is None:
+            return
+        vector = self._encoder.encode([text.strip()], normalize_embeddings=True)
+        if self._embeddings is None:
+            self._embeddings = vector
+        else:
+            self._embeddings = np.vstack([self._embeddings, vector])
+        self._keys.append(key)
+
+    def _semantic_lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """语义相似查找（向量已归一化，点积即余弦相似度）"""
+        if self._encoder is None or self._embeddings is None:
+            return None
+
+        vector = self._encoder.encode([text.strip()], normalize_embeddings=True)[0]
+        scores = self._embeddings @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        item = self._items[self._keys[best]]
+        # 数字（剂量、数量、日期）必须完全一致，避免"500mg"命中"250mg"
+        if _NUMBER_RE.findall(text) != _NUMBER_RE.findall(item['text']):
+            return None
+        return item
+
+    def __len__(self) -> int:
+        return len(self._items)
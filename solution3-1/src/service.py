@@ -6,7 +6,7 @@
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Tuple, List, Any
+from typing import Tuple, List, Any, Optional
 
 from .models import EntryList
 from .storage import JSONStorage
@@ -62,6 +62,30 @@ class EntryService:
             logger.error(f"添加条目失败: {e}", exc_info=True)
             return f"❌ 添加失败: {e}", self.get_dataframe(), self.get_count(), text
 
+    def add_entry_row(self, text: str) -> Tuple[str, Optional[List[Any]], str, str]:
+        """
+        添加新条目，只返回新增的一行（供界面增量更新表格，避免每次下发整张表）
+
+        Args:
+            text: 条目文本
+
+        Returns:
+            (状态消息, 新增的dataframe行（失败时为None）, 统计信息, 清空的文本框)
+        """
+        if not text or not text.strip():
+            logger.warning("添加失败: 空内容")
+            return "❌ 请输入内容", None, self.get_count(), ""
+
+        try:
+            entry = self.entry_list.add(text)
+            self.save()
+            logger.info(f"添加条目: {text[:50]}..." if len(text) > 50 else f"添加条目: {text}")
+            # 表格倒序显示，新条目的序号即当前总数
+            return "✅ 已添加", entry.to_dataframe_row(self.entry_list.count()), self.get_count(), ""
+        except Exception as e:
+            logger.error(f"添加条目失败: {e}", exc_info=True)
+            return f"❌ 添加失败: {e}", None, self.get_count(), text
+
     def clear_all(self) -> Tuple[str, List[List[Any]], str]:
         """
         清空所有条目
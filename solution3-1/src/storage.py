@@ -1,13 +1,20 @@
 """
 数据存储模块
-负责JSON文件的读写操作
+负责JSON / JSON Lines文件的读写操作
 """
 
 import json
 import logging
+import os
 from pathlib import Path
 from typing import List, Dict, Any
 
+# orjson为可选依赖，编码/解码比标准库json快数倍；未安装时回退到json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,11 +37,15 @@ class JSONStorage:
             return []
 
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                result = data if isinstance(data, list) else []
-                logger.info(f"加载文件成功: {self.file_path}, {len(result)} 条")
-                return result
+            if orjson is not None:
+                with open(self.file_path, 'rb') as f:
+                    data = orjson.loads(f.read())
+            else:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            result = data if isinstance(data, list) else []
+            logger.info(f"加载文件成功: {self.file_path}, {len(result)} 条")
+            return result
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"加载文件失败: {self.file_path}, 错误: {e}")
             return []
@@ -53,8 +64,153 @@ class JSONStorage:
             # 确保父目录存在
             self.file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                with open(self.file_path, 'wb') as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(self.file_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+            logger.info(f"保存文件成功: {self.file_path}, {len(data)} 条")
+            return True
+        except IOError as e:
+            logger.error(f"保存文件失败: {self.file_path}, 错误: {e}")
+            return False
+
+    def clear(self) -> bool:
+        """清空数据文件"""
+        logger.warning(f"清空文件: {self.file_path}")
+        return self.save([])
+
+    def exists(self) -> bool:
+        """检查文件是否存在"""
+        return self.file_path.exists()
+
+
+def _dumps_line(record: Dict[str, Any]) -> bytes:
+    """将一条记录编码为JSON Lines中的一行"""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS) + b'\n'
+    return json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def _loads_line(line: bytes) -> Any:
+    """解码JSON Lines中的一行"""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+class JSONLStorage:
+    """
+    JSON Lines文件存储类（追加写）
+
+    新增记录只追加到文件末尾，无需重写整个文件；
+    修改/删除通过save()整体重写（原子替换），加载时发现损坏行会压缩重写
+    """
+
+    def __init__(self, file_path: Path, legacy_file: Path = None):
+        """
+        Args:
+            file_path: JSONL文件路径
+            legacy_file: 旧版JSON文件路径，JSONL文件不存在时从中迁移数据
+        """
+        self.file_path = file_path
+        logger.info(f"JSONLStorage 初始化: {file_path}")
+
+        if legacy_file is not None and not file_path.exists() and legacy_file.exists():
+            data = JSONStorage(legacy_file).load()
+            if self.save(data):
+                logger.info(f"已从旧版文件迁移: {legacy_file} -> {file_path}, {len(data)} 条")
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        从JSONL文件加载数据
+
+        Returns:
+            数据字典列表，如果文件不存在则返回空列表；无法解析的行会被跳过
+        """
+        if not self.file_path.exists():
+            logger.info(f"数据文件不存在: {self.file_path}")
+            return []
+
+        result = []
+        bad_lines = 0
+        try:
+            with open(self.file_path, 'rb') as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = _loads_line(line)
+                    except ValueError:
+                        # 通常是写入中断留下的半行
+                        logger.warning(f"跳过无法解析的行: {self.file_path}, 第 {line_no} 行")
+                        bad_lines += 1
+                        continue
+                    if isinstance(record, dict):
+                        result.append(record)
+                    else:
+                        bad_lines += 1
+        except IOError as e:
+            logger.error(f"加载文件失败: {self.file_path}, 错误: {e}")
+            return []
+
+        logger.info(f"加载文件成功: {self.file_path}, {len(result)} 条")
+
+        if bad_lines:
+            logger.info(f"压缩文件: {self.file_path}, 移除 {bad_lines} 行无效数据")
+            self.save(result)
+        return result
+
+    def append(self, records: List[Dict[str, Any]]) -> bool:
+        """
+        追加记录到文件末尾
+
+        Args:
+            records: 要追加的数据字典列表
+
+        Returns:
+            保存成功返回True，失败返回False
+        """
+        if not records:
+            return True
+        try:
+            # 先完整编码，编码出错时不会写入半行
+            payload = b''.join(_dumps_line(r) for r in records)
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.file_path, 'a+b') as f:
+                # 上次写入中断时文件末尾是没有换行的半行：先补一个换行，
+                # 否则新记录会接在半行后面，两条记录都无法解析
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        payload = b'\n' + payload
+                # 一次write写入所有行，并落盘
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            logger.info(f"追加写入成功: {self.file_path}, {len(records)} 条")
+            return True
+        except IOError as e:
+            logger.error(f"追加写入失败: {self.file_path}, 错误: {e}")
+            return False
+
+    def save(self, data: List[Dict[str, Any]]) -> bool:
+        """
+        重写整个文件（写入临时文件后原子替换）
+
+        Args:
+            data: 要保存的数据字典列表
+
+        Returns:
+            保存成功返回True，失败返回False
+        """
+        tmp_path = self.file_path.with_name(self.file_path.name + '.tmp')
+        try:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(_dumps_line(r) for r in data))
+            os.replace(tmp_path, self.file_path)
             logger.info(f"保存文件成功: {self.file_path}, {len(data)} 条")
             return True
         except IOError as e:
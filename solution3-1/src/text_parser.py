@@ -3,49 +3,109 @@
 将原始文本转换为结构化药品数据
 """
 
+import asyncio
+import atexit
+import dataclasses
 import logging
-from typing import List, Tuple
-from .models import Entry, EntryList, StructuredMedicine, StructuredMedicineList
-from .storage import JSONStorage
-from .llm_client import create_llm_client
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from .models import Entry, EntryList, StructuredMedicine, StructuredMedicineList, STRUCTURED_ROW_GETTER, next_id
+from .storage import JSONStorage, JSONLStorage
+from .llm_client import create_llm_client, OllamaClient
+from .parser_cache import ParserCache
 import config
 
 logger = logging.getLogger(__name__)
 
+# 进程退出时写出所有存活实例未保存的修改并关闭连接；atexit只注册一次，实例被回收后自动移出
+_live_services = weakref.WeakSet()
+
+
+@atexit.register
+def _close_live_services() -> None:
+    """进程退出时对每个MedicineParserService调用flush()和close()"""
+    for service in list(_live_services):
+        try:
+            service.flush()
+        except Exception as e:
+            logger.error(f"退出前保存失败: {e}", exc_info=True)
+        try:
+            service.close()
+        except Exception as e:
+            logger.warning(f"退出前关闭失败: {e}")
+
 
 class MedicineParserService:
     """药品文本解析服务"""
 
-    def __init__(self, llm_client=None, structured_storage: JSONStorage = None):
+    def __init__(self, llm_client=None, structured_storage: JSONLStorage = None,
+                 parser_cache: ParserCache = None):
         """
         初始化解析服务
 
         Args:
             llm_client: LLM客户端（如果为None，则自动创建）
             structured_storage: 结构化数据存储（如果为None，则自动创建）
+            parser_cache: 解析结果缓存（如果为None，则自动创建）
         """
         # 初始化LLM客户端
-        if llm_client is None:
+        if llm_client is None and config.LLM_PROVIDER == "ollama":
+            self.llm_client = create_llm_client(
+                provider="ollama",
+                base_url=config.OLLAMA_BASE_URL,
+                model=config.OLLAMA_MODEL,
+                temperature=config.CLAUDE_TEMPERATURE,
+                num_predict=config.OLLAMA_NUM_PREDICT,
+                keep_alive=config.OLLAMA_KEEP_ALIVE
+            )
+        elif llm_client is None:
             self.llm_client = create_llm_client(
                 provider=config.LLM_PROVIDER,
                 api_key=config.CLAUDE_API_KEY,
                 model=config.CLAUDE_MODEL,
                 max_tokens=config.CLAUDE_MAX_TOKENS,
-                temperature=config.CLAUDE_TEMPERATURE
+                temperature=config.CLAUDE_TEMPERATURE,
+                max_connections=config.LLM_CONCURRENCY
             )
         else:
             self.llm_client = llm_client
 
+        # 异步解析统一在一个常驻事件循环中执行，使异步HTTP连接池可跨批次复用
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
         # 初始化存储
         if structured_storage is None:
-            self.structured_storage = JSONStorage(config.STRUCTURED_DATA_FILE)
+            self.structured_storage = JSONLStorage(
+                config.STRUCTURED_DATA_FILE,
+                legacy_file=config.LEGACY_STRUCTURED_DATA_FILE
+            )
         else:
             self.structured_storage = structured_storage
 
+        # 初始化解析缓存
+        if parser_cache is None:
+            self.parser_cache = ParserCache(
+                config.PARSER_CACHE_FILE,
+                similarity_threshold=config.PARSER_CACHE_SIMILARITY,
+                embedding_model=config.PARSER_CACHE_EMBEDDING_MODEL
+            )
+        else:
+            self.parser_cache = parser_cache
+
         # 加载已有的结构化数据
         self.structured_list = StructuredMedicineList()
         self.load_structured_data()
 
+        # 后台延迟保存：短时间内的多次修改合并为一次写盘
+        self._save_lock = threading.Lock()
+        self._save_pending = threading.Event()
+        self._save_thread = None
+        _live_services.add(self)
+
         logger.info("MedicineParserService 初始化完成")
 
     def load_structured_data(self) -> None:
@@ -58,13 +118,58 @@ class MedicineParserService:
             logger.info("无已有结构化数据")
 
     def save_structured_data(self) -> bool:
-        """保存结构化数据到存储"""
-        data = self.structured_list.to_dict_list()
-        result = self.structured_storage.save(data)
+        """立即保存结构化数据到存储"""
+        with self._save_lock:
+            # 本次保存已包含所有待保存的修改
+            self._save_pending.clear()
+            data = self.structured_list.to_dict_list()
+            result = self.structured_storage.save(data)
         if result:
             logger.info(f"保存结构化数据成功: {len(data)} 条")
         return result
 
+    def _append_structured(self, medicines: List[StructuredMedicine]) -> None:
+        """将新增数据追加写入存储（存储不支持追加时退回到延迟全量保存）"""
+        append = getattr(self.structured_storage, 'append', None)
+        if append is None:
+            self.schedule_save()
+            return
+        with self._save_lock:
+            # 已有待执行的全量保存时无需追加，全量保存会包含这些数据
+            if self._save_pending.is_set():
+                return
+            if append([m.to_dict() for m in medicines]):
+                logger.info(f"追加结构化数据成功: {len(medicines)} 条")
+                return
+        # 追加失败时由后台重写整个文件
+        self.schedule_save()
+
+    def schedule_save(self) -> None:
+        """
+        标记数据待保存，由后台线程在 SAVE_DEBOUNCE_SECONDS 后统一写盘
+        不阻塞调用方；需要立即落盘时调用 flush() 或 save_structured_data()
+        """
+        self._save_pending.set()
+        if self._save_thread is None or not self._save_thread.is_alive():
+            self._save_thread = threading.Thread(
+                target=self._save_worker, name="structured-save", daemon=True
+            )
+            self._save_thread.start()
+
+    def flush(self) -> bool:
+        """如有待保存的修改，立即同步保存"""
+        if not self._save_pending.is_set():
+            return True
+        return self.save_structured_data()
+
+    def _save_worker(self) -> None:
+        """后台保存线程：等待保存请求，延迟一段时间以合并后续修改后写盘"""
+        while True:
+            self._save_pending.wait()
+            time.sleep(config.SAVE_DEBOUNCE_SECONDS)
+            # 等待期间可能已被flush()或手动保存处理
+            self.flush()
+
     def parse_single_text(self, text: str) -> StructuredMedicine:
         """
         解析单条文本
@@ -77,11 +182,52 @@ class MedicineParserService:
         """
         logger.info(f"开始解析文本: {text}")
 
-        # 调用LLM解析
-        parsed_data = self.llm_client.parse_medicine_text(text)
+        parsed_data = self.parser_cache.get(text)
+        if parsed_data is None:
+            # 调用LLM解析
+            parsed_data = self.llm_client.parse_medicine_text(text)
+            self._remember(text, parsed_data)
+            self.parser_cache.save()
+
+        medicine = self._build_medicine(text, parsed_data)
+        logger.info(f"解析完成: {medicine.drug_name}")
+        return medicine
+
+    async def parse_single_text_async(self, text: str) -> StructuredMedicine:
+        """
+        异步解析单条文本
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            StructuredMedicine对象
+        """
+        logger.info(f"开始异步解析文本: {text}")
+
+        parsed_data = self.parser_cache.get(text)
+        if parsed_data is None:
+            # 注入的客户端可能只实现了同步接口，此时放到线程中执行
+            aparse = getattr(self.llm_client, 'aparse_medicine_text', None)
+            if aparse is not None:
+                parsed_data = await aparse(text)
+            else:
+                parsed_data = await asyncio.to_thread(self.llm_client.parse_medicine_text, text)
+            # 只写内存，由调用方统一持久化
+            self._remember(text, parsed_data)
+
+        medicine = self._build_medicine(text, parsed_data)
+        logger.info(f"解析完成: {medicine.drug_name}")
+        return medicine
+
+    def _remember(self, text: str, parsed_data: dict) -> None:
+        """缓存有效的LLM解析结果（后备解析的结果置信度为0，不缓存）"""
+        if parsed_data.get('drug_name') and parsed_data.get('confidence', 1.0) > 0:
+            self.parser_cache.put(text, parsed_data)
 
-        # 创建StructuredMedicine对象
-        medicine = StructuredMedicine.create(
+    def _build_medicine(self, text: str, parsed_data: dict) -> StructuredMedicine:
+        """根据LLM解析结果创建StructuredMedicine对象"""
+        return StructuredMedicine.create(
             original_text=text,
             drug_name=parsed_data.get('drug_name', ''),
             brand_name=parsed_data.get('brand_name', ''),
@@ -90,15 +236,13 @@ class MedicineParserService:
             unit=parsed_data.get('unit', ''),
             specification=parsed_data.get('specification', ''),
             package_count=parsed_data.get('package_count', ''),
-            expiry_date=parsed_data.get('expiry_date', '')
+            expiry_date=parsed_data.get('expiry_date', ''),
+            confidence=parsed_data.get('confidence', 1.0)
         )
 
-        logger.info(f"解析完成: {medicine.drug_name}")
-        return medicine
-
     def parse_batch(self, entries: List[Entry]) -> Tuple[List[StructuredMedicine], List[str]]:
         """
-        批量解析文本
+        批量解析文本（先查缓存，未命中的分批合并请求，批次之间并发）
 
         Args:
             entries: Entry对象列表
@@ -107,25 +251,146 @@ class MedicineParserService:
             (成功解析的StructuredMedicine列表, 失败的文本列表)
         """
         logger.info(f"开始批量解析: {len(entries)} 条")
+        texts = [entry.text for entry in entries]
+        results: list = [None] * len(texts)
+
+        # 先查缓存，只把未命中的文本发给LLM
+        miss_indices = []
+        for i, text in enumerate(texts):
+            cached = self.parser_cache.get(text)
+            if cached is not None:
+                results[i] = self._build_medicine(text, cached)
+            else:
+                miss_indices.append(i)
+        logger.info(f"缓存命中 {len(texts) - len(miss_indices)} 条, 需调用LLM {len(miss_indices)} 条")
+
+        if miss_indices:
+            # 同一批次中重复的文本（如语音重复录入）只解析一次
+            groups: Dict[str, List[int]] = {}
+            for i in miss_indices:
+                groups.setdefault(texts[i].strip(), []).append(i)
+            miss_texts = [texts[indices[0]] for indices in groups.values()]
+            if len(miss_texts) < len(miss_indices):
+                logger.info(f"批次内去重: {len(miss_indices)} 条 -> {len(miss_texts)} 条")
+
+            if isinstance(self.llm_client, OllamaClient):
+                # Ollama服务端按 OLLAMA_NUM_PARALLEL 串行处理请求，asyncio并发没有收益
+                parsed = self._parse_texts_threaded(miss_texts)
+            else:
+                parsed = self._run(self._parse_texts_async(miss_texts))
+            for indices, result in zip(groups.values(), parsed):
+                results[indices[0]] = result
+                for idx in indices[1:]:
+                    # 重复文本各自是独立的条目，需要不同的ID，否则按ID删除/更新时会互相影响
+                    results[idx] = result if isinstance(result, Exception) else dataclasses.replace(result, id=next_id())
+            self.parser_cache.save()
 
         success_list = []
         failed_list = []
 
-        for entry in entries:
-            try:
-                medicine = self.parse_single_text(entry.text)
-                if medicine.is_valid():
-                    success_list.append(medicine)
-                else:
-                    logger.warning(f"解析结果无效: {entry.text}")
-                    failed_list.append(entry.text)
-            except Exception as e:
-                logger.error(f"解析失败: {entry.text}, 错误: {e}")
-                failed_list.append(entry.text)
+        for text, result in zip(texts, results):
+            if isinstance(result, Exception):
+                logger.error(f"解析失败: {text}, 错误: {result}")
+                failed_list.append(text)
+            elif result.is_valid():
+                success_list.append(result)
+            else:
+                logger.warning(f"解析结果无效: {text}")
+                failed_list.append(text)
 
         logger.info(f"批量解析完成: 成功 {len(success_list)}, 失败 {len(failed_list)}")
         return success_list, failed_list
 
+    def _run(self, coro):
+        """在常驻事件循环中执行协程并等待结果"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="llm-event-loop", daemon=True
+                ).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self) -> None:
+        """关闭LLM客户端的连接池和事件循环"""
+        if self._loop is None:
+            return
+        aclose = getattr(self.llm_client, 'aclose', None)
+        try:
+            if aclose is not None:
+                self._run(aclose())
+        except Exception as e:
+            logger.warning(f"关闭LLM客户端失败: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    async def _parse_texts_async(self, texts: List[str]) -> list:
+        """
+        分批并发解析，使用信号量限制并发请求数
+
+        Returns:
+            与texts一一对应的StructuredMedicine或异常对象列表
+        """
+        batch_size = config.LLM_BATCH_SIZE
+        logger.info(f"异步解析: {len(texts)} 条 (批次大小 {batch_size}, 并发上限 {config.LLM_CONCURRENCY})")
+
+        semaphore = asyncio.Semaphore(config.LLM_CONCURRENCY)
+        aparse_batch = getattr(self.llm_client, 'aparse_medicine_batch', None)
+
+        async def parse_one(text: str) -> StructuredMedicine:
+            async with semaphore:
+                return await self.parse_single_text_async(text)
+
+        async def parse_chunk(chunk: List[str]) -> list:
+            if aparse_batch is not None and len(chunk) > 1:
+                try:
+                    async with semaphore:
+                        parsed_results = await aparse_batch(chunk)
+                    if len(parsed_results) == len(chunk):
+                        for text, parsed in zip(chunk, parsed_results):
+                            self._remember(text, parsed)
+                        return [self._build_medicine(text, parsed) for text, parsed in zip(chunk, parsed_results)]
+                    logger.warning(f"批次结果数量不匹配: 期望{len(chunk)}, 实际{len(parsed_results)}, 降级为单条处理")
+                except Exception as e:
+                    # 仅当前批次降级为单条处理
+                    logger.warning(f"批次解析失败，降级为单条处理: {e}")
+
+            return await asyncio.gather(*[parse_one(text) for text in chunk], return_exceptions=True)
+
+        chunks = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        # gather保持输入顺序，结果与texts一一对应
+        chunk_results = await asyncio.gather(*[parse_chunk(chunk) for chunk in chunks])
+        return [result for chunk_result in chunk_results for result in chunk_result]
+
+    def _parse_texts_threaded(self, texts: List[str]) -> list:
+        """
+        使用线程池解析（用于Ollama），线程数与服务端并行度一致，
+        使客户端的响应解析与服务端正在进行的推理重叠
+
+        Returns:
+            与texts一一对应的StructuredMedicine或异常对象列表
+        """
+        logger.info(f"线程池解析: {len(texts)} 条 (线程数 {config.OLLAMA_NUM_PARALLEL})")
+
+        def parse_one(text: str):
+            try:
+                return self.llm_client.parse_medicine_text(text)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=config.OLLAMA_NUM_PARALLEL) as executor:
+            parsed_results = list(executor.map(parse_one, texts))
+
+        # 缓存写入和对象构建在调用线程中进行
+        results = []
+        for text, parsed in zip(texts, parsed_results):
+            if isinstance(parsed, Exception):
+                results.append(parsed)
+            else:
+                self._remember(text, parsed)
+                results.append(self._build_medicine(text, parsed))
+        return results
+
     def parse_and_save(self, entries: List[Entry]) -> Tuple[int, int, List[str]]:
         """
         解析并保存
@@ -139,15 +404,17 @@ class MedicineParserService:
         success_list, failed_list = self.parse_batch(entries)
 
         # 添加到列表
+        added = []
         for medicine in success_list:
             try:
                 self.structured_list.add(medicine)
+                added.append(medicine)
             except ValueError as e:
                 logger.error(f"添加失败: {e}")
                 failed_list.append(medicine.original_text)
 
-        # 保存
-        self.save_structured_data()
+        # 只追加本次新增的数据
+        self._append_structured(added)
 
         return len(success_list), len(failed_list), failed_list
 
@@ -180,11 +447,8 @@ class MedicineParserService:
         return self._medicines_to_dataframe(sorted_list)
 
     def _medicines_to_dataframe(self, medicines: List[StructuredMedicine]) -> List[List]:
-        """将药品列表转换为Dataframe格式"""
-        return [
-            medicine.to_dataframe_row(i + 1)
-            for i, medicine in enumerate(medicines)
-        ]
+        """将药品列表转换为Dataframe格式（与to_dataframe_row列顺序一致，省去每行一次的方法调用）"""
+        return [[i, *STRUCTURED_ROW_GETTER(m)] for i, m in enumerate(medicines, 1)]
 
     def get_statistics(self) -> dict:
         """获取统计信息"""
@@ -193,12 +457,24 @@ class MedicineParserService:
         # 统计各字段的填充率
         all_medicines = self.structured_list.get_all()
 
+        # 单次遍历同时累计四个字段
+        with_brand = with_generic = with_spec = with_expiry = 0
+        for m in all_medicines:
+            if m.brand_name:
+                with_brand += 1
+            if m.generic_name:
+                with_generic += 1
+            if m.specification:
+                with_spec += 1
+            if m.expiry_date:
+                with_expiry += 1
+
         stats = {
             'total': total,
-            'with_brand_name': sum(1 for m in all_medicines if m.brand_name),
-            'with_generic_name': sum(1 for m in all_medicines if m.generic_name),
-            'with_specification': sum(1 for m in all_medicines if m.specification),
-            'with_expiry_date': sum(1 for m in all_medicines if m.expiry_date),
+            'with_brand_name': with_brand,
+            'with_generic_name': with_generic,
+            'with_specification': with_spec,
+            'with_expiry_date': with_expiry,
         }
 
         return stats
@@ -206,5 +482,5 @@ class MedicineParserService:
     def clear_all(self) -> None:
         """清空所有结构化数据"""
         self.structured_list.clear()
-        self.save_structured_data()
+        self.schedule_save()
         logger.warning("已清空所有结构化数据")
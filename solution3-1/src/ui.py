@@ -7,6 +7,19 @@ import gradio as gr
 from .service import EntryService
 from .text_parser import MedicineParserService
 from .voice import VOICE_RECOGNITION_JS
+import config
+
+
+# 将新增行插入表格顶部（表格倒序显示）；保存/刷新/清空仍整表同步
+PREPEND_ROW_JS = """
+(row, table) => {
+    if (!row) {
+        return table;
+    }
+    const data = (table && table.data) || [];
+    return { ...table, data: [row, ...data] };
+}
+"""
 
 
 class GradioUI:
@@ -20,6 +33,9 @@ class GradioUI:
     def build(self) -> gr.Blocks:
         """构建Gradio界面（多Tab布局）"""
 
+        # 语音脚本作为静态文件提供，需在创建Blocks前注册
+        gr.set_static_paths(paths=[config.STATIC_DIR])
+
         with gr.Blocks(
             title="药品信息管理系统 V3.1",
             theme=gr.themes.Soft(),
@@ -84,11 +100,12 @@ class GradioUI:
         self.text_input = gr.Textbox(
             label="📝 识别结果 / 手动输入",
             placeholder="点击上方按钮进行语音输入，或在这里手动输入...",
-            lines=2
+            lines=2,
+            elem_id="voice-input"  # 供static/voice.js定位
         )
 
         with gr.Row():
-            self.add_btn = gr.Button("➕ 添加到列表", variant="primary", size="lg")
+            self.add_btn = gr.Button("➕ 添加到列表", variant="primary", size="lg", elem_id="add-btn")
 
         self.status = gr.Textbox(label="状态", interactive=False, show_label=False)
 
@@ -97,6 +114,9 @@ class GradioUI:
 
         self.count_display = gr.Markdown("📊 已收集: **加载中...** 条")
 
+        # 新增行的中转组件（不显示），用于表格增量更新
+        self.new_row = gr.JSON(value=None, visible=False)
+
         self.dataframe = gr.Dataframe(
             value=[],
             headers=["#", "药品信息", "录入时间", "ID"],
@@ -251,11 +271,16 @@ class GradioUI:
             """
         )
 
-        # 添加按钮
+        # 添加按钮：服务端只返回新增的一行，由前端插入到表格顶部
         self.add_btn.click(
-            fn=self.entry_service.add_entry,
+            fn=self.entry_service.add_entry_row,
             inputs=[self.text_input],
-            outputs=[self.status, self.dataframe, self.count_display, self.text_input]
+            outputs=[self.status, self.new_row, self.count_display, self.text_input]
+        ).then(
+            fn=None,
+            inputs=[self.new_row, self.dataframe],
+            outputs=[self.dataframe],
+            js=PREPEND_ROW_JS
         )
 
         # 保存表格
@@ -285,9 +310,14 @@ class GradioUI:
 
         # 回车提交
         self.text_input.submit(
-            fn=self.entry_service.add_entry,
+            fn=self.entry_service.add_entry_row,
             inputs=[self.text_input],
-            outputs=[self.status, self.dataframe, self.count_display, self.text_input]
+            outputs=[self.status, self.new_row, self.count_display, self.text_input]
+        ).then(
+            fn=None,
+            inputs=[self.new_row, self.dataframe],
+            outputs=[self.dataframe],
+            js=PREPEND_ROW_JS
         )
 
         # 页面加载时刷新
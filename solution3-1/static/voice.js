@@ -0,0 +1,191 @@
+// 语音识别脚本（Web Speech API）
+// 以静态文件方式加载，浏览器可缓存；内部状态封装在IIFE中，只向window暴露两个入口函数
+(function () {
+    'use strict';
+
+    const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+
+    let voiceRecognition = null;
+    let isContinuousMode = false;
+    let isListening = false;
+    let isRestarting = false;
+
+    function isSupported() {
+        if (!SpeechRecognition) {
+            alert('❌ 浏览器不支持语音识别\n请使用Chrome或Edge浏览器');
+            return false;
+        }
+        return true;
+    }
+
+    // 单次语音识别
+    window.startVoiceRecognition = function () {
+        return new Promise((resolve, reject) => {
+            if (!isSupported()) {
+                reject('not supported');
+                return;
+            }
+
+            const recognition = new SpeechRecognition();
+            recognition.continuous = false;
+            recognition.interimResults = false;
+            recognition.lang = 'zh-CN';
+
+            recognition.onresult = function (event) {
+                const transcript = event.results[0][0].transcript;
+                console.log('✅ Voice recognized:', transcript);
+                resolve(transcript);
+            };
+
+            recognition.onerror = function (event) {
+                console.error('Voice error:', event.error);
+                if (event.error === 'not-allowed') {
+                    alert('❌ 麦克风权限被拒绝\n请在浏览器设置中允许麦克风访问');
+                }
+                reject(event.error);
+            };
+
+            try {
+                recognition.start();
+                console.log('🎤 Single voice recognition started');
+            } catch (e) {
+                console.error('Failed to start:', e);
+                reject(e);
+            }
+        });
+    };
+
+    // 统一的重启函数
+    function restartRecognition() {
+        if (!isContinuousMode || !isListening) {
+            console.log('❌ Not in continuous mode, skipping restart');
+            return;
+        }
+
+        if (isRestarting) {
+            console.log('⏳ Already restarting, skipping...');
+            return;
+        }
+
+        isRestarting = true;
+        console.log('🔄 Scheduling restart...');
+
+        setTimeout(() => {
+            if (isContinuousMode && isListening) {
+                try {
+                    voiceRecognition.start();
+                    console.log('✅ Recognition restarted');
+                } catch (e) {
+                    console.error('❌ Restart failed:', e);
+                    isRestarting = false;
+                }
+            } else {
+                console.log('❌ Mode changed, not restarting');
+                isRestarting = false;
+            }
+        }, 500);
+    }
+
+    // 输入框和添加按钮通过elem_id定位，查找一次后缓存（元素被Gradio重新渲染后重新查找）
+    let textbox = null;
+    let addBtn = null;
+
+    function getTargets() {
+        if (!textbox || !textbox.isConnected) {
+            textbox = document.querySelector('#voice-input textarea');
+        }
+        if (!addBtn || !addBtn.isConnected) {
+            addBtn = document.getElementById('add-btn');
+        }
+        return textbox && addBtn;
+    }
+
+    // 连续模式下识别到文本后，填入输入框并点击添加按钮
+    function submitTranscript(transcript) {
+        setTimeout(() => {
+            if (getTargets()) {
+                textbox.value = transcript;
+                textbox.dispatchEvent(new Event('input', { bubbles: true }));
+                setTimeout(() => addBtn.click(), 100);
+            }
+        }, 100);
+    }
+
+    // 连续语音识别
+    window.startContinuousVoice = function () {
+        console.log('Starting continuous mode...');
+
+        if (!isSupported()) {
+            return 'error';
+        }
+
+        if (isListening) {
+            // 停止
+            isContinuousMode = false;
+            isListening = false;
+            if (voiceRecognition) {
+                voiceRecognition.stop();
+            }
+            console.log('🛑 Continuous mode stopped');
+            return 'stopped';
+        }
+
+        // 启动连续模式
+        isContinuousMode = true;
+        isListening = true;
+        isRestarting = false;
+
+        voiceRecognition = new SpeechRecognition();
+        voiceRecognition.continuous = false;
+        voiceRecognition.interimResults = false;
+        voiceRecognition.lang = 'zh-CN';
+
+        voiceRecognition.onstart = function () {
+            console.log('🎤 Recognition started');
+            isRestarting = false;
+        };
+
+        voiceRecognition.onresult = function (event) {
+            const transcript = event.results[0][0].transcript;
+            console.log('✅ Voice recognized:', transcript);
+            submitTranscript(transcript);
+        };
+
+        voiceRecognition.onerror = function (event) {
+            console.log('⚠️ Voice error:', event.error);
+
+            if (event.error === 'not-allowed') {
+                alert('❌ 麦克风权限被拒绝');
+                isListening = false;
+                isContinuousMode = false;
+                isRestarting = false;
+            } else if (event.error === 'aborted') {
+                console.log('⏹️ User stopped');
+                isRestarting = false;
+            }
+        };
+
+        voiceRecognition.onend = function () {
+            console.log('🏁 Recognition ended');
+
+            if (isContinuousMode && isListening) {
+                restartRecognition();
+            } else {
+                console.log('❌ Continuous mode off, not restarting');
+                isRestarting = false;
+            }
+        };
+
+        try {
+            voiceRecognition.start();
+            console.log('🎤 Continuous mode started');
+            return 'started';
+        } catch (e) {
+            console.error('Failed to start:', e);
+            isListening = false;
+            isContinuousMode = false;
+            isRestarting = false;
+            return 'error';
+        }
+    };
+})();
@@ -3,7 +3,7 @@
 """
 
 import pytest
-from src.models import Entry, EntryList
+from src.models import Entry, EntryList, StructuredMedicine, StructuredMedicineList
 
 
 class TestEntry:
@@ -230,3 +230,48 @@ class TestEntryList:
 
         found = entry_list.get_by_id(999999)
         assert found is None
+
+
+class TestStructuredMedicineList:
+    """测试StructuredMedicineList类"""
+
+    def _make_list(self, names):
+        medicines = [
+            StructuredMedicine(id=i + 1, original_text=name, drug_name=name)
+            for i, name in enumerate(names)
+        ]
+        return StructuredMedicineList(medicines)
+
+    def test_filter_by_drug_name(self):
+        """测试按药名子串筛选，结果保持原顺序"""
+        medicine_list = self._make_list(["阿莫西林", "布洛芬", "阿莫西林胶囊", "Aspirin"])
+
+        assert [m.id for m in medicine_list.filter_by_drug_name("阿莫")] == [1, 3]
+        assert [m.id for m in medicine_list.filter_by_drug_name("ASP")] == [4]
+        assert medicine_list.filter_by_drug_name("不存在") == []
+
+    def test_filter_by_drug_name_after_mutation(self):
+        """测试数据变化后筛选结果同步更新"""
+        medicine_list = self._make_list(["阿莫西林", "布洛芬"])
+        assert len(medicine_list.filter_by_drug_name("布洛芬")) == 1
+
+        medicine_list.add(StructuredMedicine(id=3, original_text="布洛芬缓释", drug_name="布洛芬缓释"))
+        assert [m.id for m in medicine_list.filter_by_drug_name("布洛芬")] == [2, 3]
+
+        medicine_list.update_by_id(2, drug_name="对乙酰氨基酚")
+        assert [m.id for m in medicine_list.filter_by_drug_name("布洛芬")] == [3]
+
+        medicine_list.delete_by_id(3)
+        assert medicine_list.filter_by_drug_name("布洛芬") == []
+
+        medicine_list.clear()
+        assert medicine_list.filter_by_drug_name("阿莫") == []
+
+    def test_sort_by_drug_name_after_add(self):
+        """测试新增数据后排序结果同步更新"""
+        medicine_list = self._make_list(["布洛芬", "阿司匹林"])
+        assert [m.drug_name for m in medicine_list.sort_by_drug_name()] == ["布洛芬", "阿司匹林"]
+
+        medicine_list.add(StructuredMedicine(id=3, original_text="Aspirin", drug_name="Aspirin"))
+        assert [m.drug_name for m in medicine_list.sort_by_drug_name()] == ["Aspirin", "布洛芬", "阿司匹林"]
+        assert [m.drug_name for m in medicine_list.sort_by_drug_name(reverse=True)] == ["阿司匹林", "布洛芬", "Aspirin"]
@@ -35,6 +35,24 @@ class TestEntryService:
         assert "❌" in status
         assert len(df_data) == 0
 
+    def test_add_entry_row(self, temp_service):
+        """测试添加条目并只返回新增行"""
+        temp_service.add_entry_row("药品1")
+        status, row, count, text = temp_service.add_entry_row("药品2")
+
+        assert "✅" in status
+        assert row[0] == 2
+        assert row[1] == "药品2"
+        assert row == temp_service.get_dataframe()[0]
+        assert text == ""
+
+    def test_add_entry_row_empty(self, temp_service):
+        """测试添加空条目时不返回新增行"""
+        status, row, count, text = temp_service.add_entry_row("  ")
+
+        assert "❌" in status
+        assert row is None
+
     def test_add_multiple_entries(self, temp_service):
         """测试添加多个条目"""
         temp_service.add_entry("药品1")
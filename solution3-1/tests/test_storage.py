@@ -5,7 +5,7 @@
 import json
 import pytest
 from pathlib import Path
-from src.storage import JSONStorage
+from src.storage import JSONStorage, JSONLStorage
 
 
 @pytest.fixture
@@ -94,3 +94,62 @@ class TestJSONStorage:
         success = storage.save([{'id': 1, 'text': "test"}])
         assert success is True
         assert nested_path.exists()
+
+
+class TestJSONLStorage:
+    """测试JSONLStorage类"""
+
+    def test_append_and_load(self, tmp_path):
+        """测试追加写入和加载"""
+        storage = JSONLStorage(tmp_path / "test.jsonl")
+        assert storage.append([{'id': 1, 'drug_name': "药品1"}]) is True
+        assert storage.append([{'id': 2, 'drug_name': "药品2"}, {'id': 2, 'drug_name': "药品3"}]) is True
+
+        loaded_data = storage.load()
+        assert [d['drug_name'] for d in loaded_data] == ["药品1", "药品2", "药品3"]
+
+    def test_save_overwrites(self, tmp_path):
+        """测试save整体重写文件"""
+        storage = JSONLStorage(tmp_path / "test.jsonl")
+        storage.append([{'id': 1}, {'id': 2}])
+        storage.save([{'id': 3}])
+
+        assert storage.load() == [{'id': 3}]
+        assert not (tmp_path / "test.jsonl.tmp").exists()
+
+    def test_load_skips_and_compacts_broken_lines(self, tmp_path):
+        """测试加载时跳过损坏的行并压缩文件"""
+        file_path = tmp_path / "test.jsonl"
+        file_path.write_text('{"id": 1}\n{"id": 2\n', encoding='utf-8')
+        storage = JSONLStorage(file_path)
+
+        assert storage.load() == [{'id': 1}]
+        # 损坏的行已从文件中移除
+        assert file_path.read_text(encoding='utf-8').count('\n') == 1
+
+    def test_append_after_partial_line(self, tmp_path):
+        """测试上次写入中断留下半行时，新追加的记录不会与半行连在一起"""
+        file_path = tmp_path / "test.jsonl"
+        file_path.write_text('{"id": 1}\n{"id": 2, "drug', encoding='utf-8')
+        storage = JSONLStorage(file_path)
+
+        assert storage.append([{'id': 3}]) is True
+        assert storage.load() == [{'id': 1}, {'id': 3}]
+        # 半行在加载时被移除
+        assert '"drug' not in file_path.read_text(encoding='utf-8')
+
+    def test_migrate_legacy_json(self, tmp_path):
+        """测试从旧版JSON文件迁移"""
+        legacy_file = tmp_path / "legacy.json"
+        JSONStorage(legacy_file).save([{'id': 1, 'drug_name': "药品1"}])
+
+        storage = JSONLStorage(tmp_path / "test.jsonl", legacy_file=legacy_file)
+        assert storage.load() == [{'id': 1, 'drug_name': "药品1"}]
+
+    def test_clear(self, tmp_path):
+        """测试清空"""
+        storage = JSONLStorage(tmp_path / "test.jsonl")
+        storage.append([{'id': 1}])
+
+        assert storage.clear() is True
+        assert storage.load() == []
@@ -0,0 +1,70 @@
+"""
+测试text_parser模块
+"""
+
+from src.models import Entry
+from src.parser_cache import ParserCache
+from src.storage import JSONLStorage
+from src.text_parser import MedicineParserService
+
+
+class FakeLLM:
+    """只实现同步接口的假LLM客户端，记录收到的文本"""
+
+    def __init__(self):
+        self.requested = []
+
+    def parse_medicine_text(self, text):
+        self.requested.append(text)
+        return {'drug_name': text.strip(), 'confidence': 0.9}
+
+
+def test_parse_batch_duplicates_get_distinct_ids(tmp_path):
+    """测试批次内重复的文本只解析一次，但每条结果有各自的ID"""
+    llm = FakeLLM()
+    service = MedicineParserService(
+        llm_client=llm,
+        structured_storage=JSONLStorage(tmp_path / "structured.jsonl"),
+        parser_cache=ParserCache(tmp_path / "cache.json")
+    )
+    entries = [Entry(id=i, text=t, timestamp="") for i, t in enumerate(["阿司匹林", " 阿司匹林 ", "布洛芬", "阿司匹林"])]
+
+    success, failed = service.parse_batch(entries)
+    service.close()
+
+    assert sorted(llm.requested) == ["布洛芬", "阿司匹林"]
+    assert [m.drug_name for m in success] == ["阿司匹林", "阿司匹林", "布洛芬", "阿司匹林"]
+    assert failed == []
+    assert len({m.id for m in success}) == len(success)
+
+
+def test_exit_hook_flushes_live_services(tmp_path, monkeypatch):
+    """测试进程退出钩子写出存活实例待保存的修改；实例被回收后不再被钩子引用"""
+    import gc
+    import config
+    from src import text_parser
+    from src.models import StructuredMedicine
+
+    monkeypatch.setattr(config, "SAVE_DEBOUNCE_SECONDS", 60)
+    storage = JSONLStorage(tmp_path / "structured.jsonl")
+    service = MedicineParserService(
+        llm_client=FakeLLM(),
+        structured_storage=storage,
+        parser_cache=ParserCache(tmp_path / "cache.json")
+    )
+    assert service in text_parser._live_services
+
+    service.structured_list.add(StructuredMedicine.create("阿司匹林", drug_name="阿司匹林"))
+    service.schedule_save()
+    text_parser._close_live_services()
+    assert [item['drug_name'] for item in storage.load()] == ["阿司匹林"]
+
+    other = MedicineParserService(
+        llm_client=FakeLLM(),
+        structured_storage=JSONLStorage(tmp_path / "other.jsonl"),
+        parser_cache=ParserCache(tmp_path / "cache.json")
+    )
+    count = len(text_parser._live_services)
+    del other
+    gc.collect()
+    assert len(text_parser._live_services) == count - 1
@@ -18,6 +18,9 @@ PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# 静态资源目录（前端JS/CSS，通过URL提供给浏览器缓存）
+STATIC_DIR = PROJECT_ROOT / "static"
+
 # 数据文件路径 (将在运行时根据用户动态生成)
 # DATA_FILE = DATA_DIR / "voice_entries.json"
 # STRUCTURED_DATA_FILE = DATA_DIR / "structured_medicines.json"
@@ -28,6 +31,17 @@ SERVER_PORT = 7860
 SHARE = False
 SHOW_ERROR = True
 
+# 界面事件队列：默认并发数、只读操作的并发数、排队上限
+UI_DEFAULT_CONCURRENCY = 8
+UI_READ_CONCURRENCY = 16
+UI_QUEUE_MAX_SIZE = 64
+# 同一用户ID在该时间（秒）内重复提交时不重新加载数据
+UI_SWITCH_DEBOUNCE_SECONDS = 5
+# "解析全部"每批解析的条数（每批完成后刷新进度和结果表）
+# 必须小于CLAUDE_BATCH_API_THRESHOLD：否则每批都走Message Batches API，
+# 界面要轮询等待批处理任务完成（最长CLAUDE_BATCH_API_TIMEOUT秒），进度无法逐批刷新
+UI_PARSE_CHUNK_SIZE = 10
+
 # 应用信息
 APP_TITLE = "药品信息管理系统 V3.1"
 APP_VERSION = "3.1.0"
@@ -46,6 +60,19 @@ CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY", "")  # 请设置环境变量或直
 CLAUDE_MODEL = "claude-3-opus-20240229"  # Claude 3 Opus
 CLAUDE_MAX_TOKENS = 1024
 CLAUDE_TEMPERATURE = 0.3  # 较低的温度以获得更稳定的结果
+CLAUDE_MAX_CONCURRENCY = 20  # 批量解析时同时进行的请求上限
+CLAUDE_RATE_LIMIT_QPM = 500  # 每分钟请求上限，按API账户等级调整
+CLAUDE_BATCH_API_THRESHOLD = 20  # 批量解析条数达到该值时使用Message Batches API（0表示不使用）
+CLAUDE_BATCH_API_TIMEOUT = 600  # 等待批处理任务完成的最长秒数，超时后取消并改为并发请求
+CLAUDE_HTTP_TIMEOUT = 60  # 单次HTTP请求超时秒数
+assert not CLAUDE_BATCH_API_THRESHOLD or UI_PARSE_CHUNK_SIZE < CLAUDE_BATCH_API_THRESHOLD, \
+    "UI_PARSE_CHUNK_SIZE必须小于CLAUDE_BATCH_API_THRESHOLD，界面的分批解析不能走Message Batches API"
+CLAUDE_WARM_UP = os.getenv("CLAUDE_WARM_UP", "true").lower() == "true"  # 启动时后台预先建立到API的连接
+
+# LLM解析缓存配置（所有用户共用，保存在数据目录下）
+PARSER_CACHE_FILENAME = "llm_cache.json"
+PARSER_CACHE_SIMILARITY = 0.95  # 语义匹配的余弦相似度阈值，过低可能把不同药品误判为同一条
+PARSER_CACHE_EMBEDDING_MODEL = os.getenv("PARSER_CACHE_EMBEDDING_MODEL", "")  # 为空时只做精确匹配，如 paraphrase-multilingual-MiniLM-L12-v2
 
 # OpenAI配置（备用）
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")  # 请设置环境变量或直接填入
@@ -3,13 +3,86 @@ LLM客户端封装模块
 支持多种LLM提供商（Claude、OpenAI、Ollama）
 """
 
+import asyncio
 import logging
-import json
-from typing import Dict, Any, Optional
-from anthropic import Anthropic
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from anthropic import Anthropic, AsyncAnthropic
+
+# httpx随anthropic SDK一同安装；缺失时使用SDK默认的HTTP客户端
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 logger = logging.getLogger(__name__)
 
+# 后备解析时取第一个逗号（中文或英文）之前的部分作为药名
+_COMMA_SPLIT_RE = re.compile(r'[，,]')
+
+# 通过强制调用该工具让Claude按JSON Schema返回结构化数据，无需再解析文本中的JSON
+MEDICINE_TOOL = {
+    "name": "emit_medicine",
+    "description": "记录从药品信息文本中提取出的结构化数据",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "drug_name": {"type": "string", "description": "药名/通用名"},
+            "brand_name": {"type": "string", "description": "商品名"},
+            "generic_name": {"type": "string", "description": "学术名/化学名，如阿莫西林→Amoxicillin"},
+            "quantity": {"type": "number", "description": "数量，如\"一盒\"→1，\"30片\"→30；文本未提及数量时省略该字段"},
+            "unit": {"type": "string", "description": "单位，如盒、片、袋"},
+            "specification": {"type": "string", "description": "规格，如0.5g、500mg"},
+            "package_count": {"type": "string", "description": "包装数量，如1盒、2板"},
+            "expiry_date": {"type": "string", "description": "有效期，格式YYYY-MM或YYYY-MM-DD"}
+        },
+        "required": ["drug_name"]
+    }
+}
+MEDICINE_TOOL_CHOICE = {"type": "tool", "name": MEDICINE_TOOL["name"]}
+
+# 进程内所有ClaudeClient共用一个同步HTTP连接池，重建客户端时不必重新握手
+_shared_http_client = None
+_shared_http_lock = threading.Lock()
+
+
+def _get_shared_http_client(timeout: float):
+    """获取（首次调用时创建）共享的同步httpx客户端，httpx不可用时返回None"""
+    global _shared_http_client
+    if httpx is None:
+        return None
+    with _shared_http_lock:
+        if _shared_http_client is None:
+            _shared_http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                timeout=timeout
+            )
+        return _shared_http_client
+
+
+class _AsyncRateLimiter:
+    """漏桶限速：time_period秒内最多发起max_rate次请求"""
+
+    def __init__(self, max_rate: int, time_period: float = 60.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._level = 0.0
+        self._last = time.monotonic()
+
+    async def acquire(self) -> None:
+        """等待直到允许发起下一次请求"""
+        while True:
+            now = time.monotonic()
+            leaked = (now - self._last) * self.max_rate / self.time_period
+            self._level = max(0.0, self._level - leaked)
+            self._last = now
+            if self._level + 1 <= self.max_rate:
+                self._level += 1
+                return
+            await asyncio.sleep((self._level + 1 - self.max_rate) * self.time_period / self.max_rate)
+
 
 class LLMClient:
     """LLM客户端基类"""
@@ -23,12 +96,81 @@ class ClaudeClient(LLMClient):
     """Claude API客户端"""
 
     def __init__(self, api_key: str, model: str = "claude-3-5-sonnet-20241022",
-                 max_tokens: int = 1024, temperature: float = 0.3):
-        self.client = Anthropic(api_key=api_key)
+                 max_tokens: int = 1024, temperature: float = 0.3,
+                 max_concurrency: int = 20, rate_limit_qpm: int = 500,
+                 batch_api_threshold: int = 20, batch_api_timeout: float = 600.0,
+                 http_timeout: float = 60.0, warm_up: bool = False):
+        self._http_client = _get_shared_http_client(http_timeout)
+        self.client = Anthropic(api_key=api_key, timeout=http_timeout, http_client=self._http_client)
+        # 异步连接池绑定在本实例的事件循环上，不能跨实例共享；大小与并发上限匹配，避免排队等待连接
+        self._async_http_client = None
+        if httpx is not None:
+            self._async_http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_concurrency * 2,
+                    max_keepalive_connections=max_concurrency
+                ),
+                timeout=http_timeout
+            )
+        self.async_client = AsyncAnthropic(
+            api_key=api_key, timeout=http_timeout, http_client=self._async_http_client
+        )
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
-        logger.info(f"ClaudeClient 初始化: model={model}")
+        self.max_concurrency = max_concurrency
+        # 并发信号量由本实例的所有批次共用（同时进行的多个批次合计不超过并发上限），
+        # 在事件循环中首次使用时创建
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._rate_limiter = _AsyncRateLimiter(rate_limit_qpm, 60.0)
+        # 条数达到阈值时改用Message Batches API（费用减半，但需要轮询等待结果）
+        self.batch_api_threshold = batch_api_threshold
+        self.batch_api_timeout = batch_api_timeout
+        # 异步请求统一在一个常驻事件循环中执行，连接池才能跨批次复用
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        logger.info(f"ClaudeClient 初始化: model={model}, 并发上限={max_concurrency}, QPM={rate_limit_qpm}")
+        if warm_up:
+            self.warm_up()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """获取（首次调用时启动）常驻事件循环"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="claude-event-loop", daemon=True
+                ).start()
+        return self._loop
+
+    def _run(self, coro):
+        """在常驻事件循环中执行协程并等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+
+    def warm_up(self) -> None:
+        """
+        后台预热连接：向API地址发一个HEAD请求，提前完成DNS解析和TLS握手，
+        首次解析不再承担建连耗时。不等待结果，失败只记录日志
+        """
+        if httpx is None:
+            return
+        url = str(self.client.base_url)
+
+        def warm_sync():
+            try:
+                self._http_client.head(url)
+            except Exception as e:
+                logger.debug(f"同步连接预热失败: {e}")
+
+        async def warm_async():
+            try:
+                await self._async_http_client.head(url)
+            except Exception as e:
+                logger.debug(f"异步连接预热失败: {e}")
+
+        threading.Thread(target=warm_sync, name="claude-warm-up", daemon=True).start()
+        asyncio.run_coroutine_threadsafe(warm_async(), self._get_loop())
 
     def parse_medicine_text(self, text: str) -> Dict[str, Any]:
         """
@@ -40,82 +182,178 @@ class ClaudeClient(LLMClient):
         Returns:
             结构化数据字典
         """
-        prompt = self._build_prompt(text)
-
         try:
             logger.info(f"调用Claude API解析文本: {text[:50]}...")
+            message = self.client.messages.create(**self._request_params(text))
+            return self._parse_response(message)
 
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+        except Exception as e:
+            logger.error(f"Claude API调用失败: {e}", exc_info=True)
+            return self._fallback_parse(text)
 
-            response_text = message.content[0].text
-            logger.info(f"Claude响应: {response_text[:100]}...")
+    async def aparse_medicine_text(self, text: str) -> Dict[str, Any]:
+        """
+        使用Claude异步解析药品文本（用于并发批量解析）
 
-            # 解析JSON响应
-            result = json.loads(response_text)
-            logger.info(f"解析成功: {result.get('drug_name', 'N/A')}")
+        Args:
+            text: 原始药品信息文本
 
-            return result
+        Returns:
+            结构化数据字典
+        """
+        try:
+            logger.info(f"异步调用Claude API解析文本: {text[:50]}...")
+            message = await self.async_client.messages.create(**self._request_params(text))
+            return self._parse_response(message)
 
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON解析失败: {e}, 响应: {response_text[:200]}")
-            return self._fallback_parse(text)
         except Exception as e:
             logger.error(f"Claude API调用失败: {e}", exc_info=True)
             return self._fallback_parse(text)
 
+    def parse_medicine_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量解析药品文本：每条文本一个请求，通过asyncio.gather并发发出；
+        条数达到batch_api_threshold时先提交Message Batches API，未成功的再并发请求
+
+        Args:
+            texts: 原始药品信息文本列表
+
+        Returns:
+            与texts一一对应的结构化数据字典列表（单条失败时为后备解析结果）
+        """
+        logger.info(f"批量解析 {len(texts)} 条文本")
+        if not self.batch_api_threshold or len(texts) < self.batch_api_threshold:
+            return self._run(self.aparse_medicine_batch(texts))
+
+        try:
+            results = self.parse_medicine_batch_api(texts)
+        except Exception as e:
+            logger.warning(f"Message Batches API调用失败，改为并发请求: {e}")
+            results = [None] * len(texts)
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            logger.info(f"{len(missing)} 条未从批处理任务获得结果，改为并发请求")
+            retried = self._run(self.aparse_medicine_batch([texts[i] for i in missing]))
+            for i, result in zip(missing, retried):
+                results[i] = result
+        return results
+
+    def parse_medicine_batch_api(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        通过Message Batches API批量解析：每条文本作为独立请求提交到同一个批处理任务
+
+        Args:
+            texts: 原始药品信息文本列表
+
+        Returns:
+            与texts一一对应的结构化数据字典列表，单条失败时为None
+
+        Raises:
+            TimeoutError: 超过batch_api_timeout仍未完成（任务会被取消）
+        """
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": str(i), "params": self._request_params(text)}
+            for i, text in enumerate(texts)
+        ])
+        logger.info(f"已提交批处理任务: {batch.id}, {len(texts)} 条")
+
+        # 指数退避轮询任务状态
+        delay = 1.0
+        deadline = time.monotonic() + self.batch_api_timeout
+        while batch.processing_status != "ended":
+            if time.monotonic() > deadline:
+                self.client.messages.batches.cancel(batch.id)
+                raise TimeoutError(f"批处理任务超时: {batch.id}")
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        for item in self.client.messages.batches.results(batch.id):
+            index = int(item.custom_id)
+            if item.result.type != "succeeded":
+                logger.warning(f"批处理请求失败: {texts[index][:50]}, 类型: {item.result.type}")
+                continue
+            try:
+                results[index] = self._parse_response(item.result.message)
+            except ValueError as e:
+                logger.error(f"批处理结果解析失败: {texts[index][:50]}, 错误: {e}")
+
+        logger.info(f"批处理任务完成: {batch.id}")
+        return results
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环上的并发信号量（首次调用或换了事件循环时创建）"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def aparse_medicine_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """并发解析多条文本（受并发上限和QPM限制），单条异常时使用后备解析"""
+        semaphore = self._get_semaphore()
+
+        async def parse_one(text: str) -> Dict[str, Any]:
+            async with semaphore:
+                await self._rate_limiter.acquire()
+                return await self.aparse_medicine_text(text)
+
+        results = await asyncio.gather(
+            *[parse_one(t) for t in texts],
+            return_exceptions=True
+        )
+        return [
+            self._fallback_parse(text) if isinstance(result, Exception) else result
+            for text, result in zip(texts, results)
+        ]
+
+    def _request_params(self, text: str) -> Dict[str, Any]:
+        """构建messages.create的请求参数（同步、异步和批处理共用）"""
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "tools": [MEDICINE_TOOL],
+            "tool_choice": MEDICINE_TOOL_CHOICE,
+            "messages": [{"role": "user", "content": self._build_prompt(text)}]
+        }
+
+    def _parse_response(self, message) -> Dict[str, Any]:
+        """从Claude响应中取出emit_medicine工具调用的参数（SDK已解析为dict）"""
+        for block in message.content:
+            if block.type == "tool_use" and block.name == MEDICINE_TOOL["name"]:
+                result = dict(block.input)
+                logger.info(f"解析成功: {result.get('drug_name', 'N/A')}")
+                return result
+        raise ValueError(f"响应中没有{MEDICINE_TOOL['name']}工具调用, stop_reason: {message.stop_reason}")
+
     def _build_prompt(self, text: str) -> str:
-        """构建提示词"""
-        return f"""请从以下药品信息文本中提取结构化数据。
+        """构建提示词（字段定义见MEDICINE_TOOL的input_schema）"""
+        return f"""请从以下药品信息文本中提取结构化数据，并调用{MEDICINE_TOOL["name"]}工具返回。
 
 文本："{text}"
 
-请提取以下信息并以JSON格式返回：
-1. drug_name（药名/通用名）- 必填
-2. brand_name（商品名）- 如果文本中有提及
-3. generic_name（学术名/化学名）- 根据药名推断，如阿莫西林→Amoxicillin
-4. quantity（数量）- 提取数字，如"一盒"→1，"30片"→30
-5. unit（单位）- 如"盒"、"片"、"袋"
-6. specification（规格）- 如"0.5g"、"500mg"
-7. package_count（包装数量）- 如"1盒"、"2板"
-8. expiry_date（有效期）- 格式化为YYYY-MM或YYYY-MM-DD，如"2027年6月"→"2027-06"
-
 注意事项：
-- 如果某个字段在文本中没有提及，请设为空字符串""
+- 如果某个文字字段在文本中没有提及，请设为空字符串""；数量(quantity)是数字，没有提及时不要填写该字段
 - generic_name可以根据drug_name推断（如果你知道的话）
-- 数量和日期尽量标准化
-- 只返回JSON，不要其他说明文字
-
-返回格式示例：
-{{
-    "drug_name": "阿莫西林",
-    "brand_name": "",
-    "generic_name": "Amoxicillin",
-    "quantity": 1.0,
-    "unit": "盒",
-    "specification": "",
-    "package_count": "1盒",
-    "expiry_date": "2027-06"
-}}"""
+- 数量和日期尽量标准化，如"2027年6月"→"2027-06"
+"""
 
     def _fallback_parse(self, text: str) -> Dict[str, Any]:
         """后备解析方法（LLM失败时）"""
         logger.warning(f"使用后备解析: {text}")
         return {
-            "drug_name": text.split('，')[0] if '，' in text else text.split(',')[0],
+            "drug_name": _COMMA_SPLIT_RE.split(text, maxsplit=1)[0].strip(),
             "brand_name": "",
             "generic_name": "",
             "quantity": 0.0,
             "unit": "",
             "specification": "",
             "package_count": "",
-            "expiry_date": ""
+            "expiry_date": "",
+            "confidence": 0.0
         }
 
 
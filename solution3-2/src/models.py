@@ -3,9 +3,19 @@
 定义Entry和EntryList数据结构
 """
 
-from dataclasses import dataclass, asdict
+import re
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Any
+from operator import attrgetter
+from typing import List, Dict, Any, Iterable, Optional
+
+# pandas/numpy为可选依赖，未安装时to_pandas不可用，to_dataframe不受影响
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
 
 
 @dataclass
@@ -19,15 +29,16 @@ class Entry:
     @classmethod
     def create(cls, text: str) -> "Entry":
         """创建新的Entry实例"""
+        now = datetime.now()
         return cls(
-            id=int(datetime.now().timestamp() * 1000),
+            id=int(now.timestamp() * 1000),
             text=text.strip(),
-            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            timestamp=now.strftime('%Y-%m-%d %H:%M:%S')
         )
 
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return asdict(self)
+        """转换为字典（字段都是标量，直接构造比asdict的递归深拷贝快）"""
+        return {'id': self.id, 'text': self.text, 'timestamp': self.timestamp}
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Entry":
@@ -46,8 +57,24 @@ class Entry:
 class EntryList:
     """条目列表管理类"""
 
-    def __init__(self, entries: List[Entry] = None):
-        self.entries = entries or []
+    def __init__(self, entries: Iterable[Entry] = None):
+        # id -> Entry（dict保持插入顺序，即录入顺序）
+        self._entries: Dict[int, Entry] = {}
+        # to_dataframe结果缓存（None表示需要重建）
+        self._rows: Optional[List[List[Any]]] = None
+        for entry in entries or []:
+            self._insert(entry)
+
+    def _insert(self, entry: Entry) -> None:
+        """插入条目；ID是毫秒时间戳，可能重复，重复时顺延到下一个空闲ID"""
+        while entry.id in self._entries:
+            entry.id += 1
+        self._entries[entry.id] = entry
+
+    @property
+    def entries(self) -> List[Entry]:
+        """按录入顺序排列的条目列表"""
+        return list(self._entries.values())
 
     def add(self, text: str) -> Entry:
         """添加新条目"""
@@ -55,20 +82,24 @@ class EntryList:
             raise ValueError("条目内容不能为空")
 
         entry = Entry.create(text)
-        self.entries.append(entry)
+        self._insert(entry)
+        # 新条目序号最大、排在最上面，已有行的序号不变，只需在表头插入一行
+        if self._rows is not None:
+            self._rows.insert(0, entry.to_dataframe_row(len(self._entries)))
         return entry
 
     def get_all(self) -> List[Entry]:
         """获取所有条目"""
-        return self.entries.copy()
+        return list(self._entries.values())
 
     def get_reversed(self) -> List[Entry]:
         """获取倒序的条目列表（最新的在前）"""
-        return list(reversed(self.entries))
+        return list(reversed(self._entries.values()))
 
     def clear(self) -> None:
         """清空所有条目"""
-        self.entries.clear()
+        self._entries.clear()
+        self._rows = []
 
     def delete_by_id(self, entry_id: int) -> bool:
         """
@@ -80,9 +111,10 @@ class EntryList:
         Returns:
             删除成功返回True，未找到返回False
         """
-        original_length = len(self.entries)
-        self.entries = [e for e in self.entries if e.id != entry_id]
-        return len(self.entries) < original_length
+        if self._entries.pop(entry_id, None) is None:
+            return False
+        self._rows = None
+        return True
 
     def update_by_id(self, entry_id: int, new_text: str) -> bool:
         """
@@ -98,11 +130,12 @@ class EntryList:
         if not new_text or not new_text.strip():
             raise ValueError("条目内容不能为空")
 
-        for entry in self.entries:
-            if entry.id == entry_id:
-                entry.text = new_text.strip()
-                return True
-        return False
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            return False
+        entry.text = new_text.strip()
+        self._rows = None
+        return True
 
     def get_by_id(self, entry_id: int) -> Entry:
         """
@@ -114,51 +147,71 @@ class EntryList:
         Returns:
             找到返回Entry对象，未找到返回None
         """
-        for entry in self.entries:
-            if entry.id == entry_id:
-                return entry
-        return None
+        return self._entries.get(entry_id)
 
     def count(self) -> int:
         """获取条目数量"""
-        return len(self.entries)
+        return len(self._entries)
 
     def to_dict_list(self) -> List[Dict[str, Any]]:
         """转换为字典列表"""
-        return [entry.to_dict() for entry in self.entries]
+        return [entry.to_dict() for entry in self._entries.values()]
 
     def to_dataframe(self) -> List[List[Any]]:
         """
         转换为Dataframe格式（倒序，最新的在上面）
-        返回: [[序号, 文本, 时间, ID], ...]
+        返回: [[序号, 文本, 时间, ID], ...]（行列表与缓存共享，调用方不应修改）
         """
-        reversed_entries = self.get_reversed()
-        total = len(self.entries)
-
-        return [
-            entry.to_dataframe_row(total - i)
-            for i, entry in enumerate(reversed_entries)
-        ]
+        if self._rows is None:
+            # 直接从末尾迭代dict，序号用倒数的range，不生成中间的倒序列表
+            self._rows = [
+                entry.to_dataframe_row(number)
+                for number, entry in zip(range(len(self._entries), 0, -1), reversed(self._entries.values()))
+            ]
+        return list(self._rows)
 
     @classmethod
-    def from_dict_list(cls, data: List[Dict[str, Any]]) -> "EntryList":
-        """从字典列表创建EntryList实例"""
-        entries = [Entry.from_dict(item) for item in data]
-        return cls(entries)
+    def from_dict_list(cls, data: Iterable[Dict[str, Any]]) -> "EntryList":
+        """从字典列表（或逐条产生字典的迭代器）创建EntryList实例"""
+        return cls(Entry.from_dict(item) for item in data)
 
     def __len__(self) -> int:
         """支持len()函数"""
-        return len(self.entries)
+        return len(self._entries)
 
     def __bool__(self) -> bool:
         """支持布尔判断"""
-        return bool(self.entries)
+        return bool(self._entries)
 
 
 # ============================================================================
 # 结构化数据模型
 # ============================================================================
 
+# 有效期排序键：YYYY-MM[-DD]（也接受/、.、年月日分隔）转为整数YYYYMMDD，缺少的月/日记为00
+_EXPIRY_RE = re.compile(r'^\s*(\d{4})(?:\s*[-/.年]\s*(\d{1,2}))?(?:\s*[-/.月]\s*(\d{1,2}))?')
+EXPIRY_KEY_NONE = 99999999  # 无有效期或无法识别时排在最后
+
+
+def expiry_sort_key(expiry_date: Any) -> int:
+    """将有效期字符串转为整数排序键，如"2027-06"→20270600（LLM或旧数据可能给出数字，如2027）"""
+    match = _EXPIRY_RE.match(str(expiry_date)) if expiry_date else None
+    if match is None:
+        return EXPIRY_KEY_NONE
+    year, month, day = match.groups()
+    return int(year) * 10000 + int(month or 0) * 100 + int(day or 0)
+
+
+# 结构化Dataframe的列名及对应字段（与to_dataframe_row的顺序一致）
+STRUCTURED_DATAFRAME_HEADERS = ["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"]
+STRUCTURED_DATAFRAME_FIELDS = (
+    'drug_name', 'brand_name', 'generic_name', 'quantity', 'unit',
+    'specification', 'package_count', 'expiry_date', 'original_text', 'timestamp'
+)
+
+# 统计信息中按"已填写"计数的字段
+STATISTICS_FIELDS = ('brand_name', 'generic_name', 'specification', 'expiry_date')
+
 @dataclass
 class StructuredMedicine:
     """结构化药品信息数据模型"""
@@ -175,20 +228,46 @@ class StructuredMedicine:
     expiry_date: str = ""     # 有效期
     timestamp: str = ""        # 录入时间
     confidence: float = 1.0    # 置信度（LLM提取的可信度）
+    # 以下字段由其他字段派生，不参与序列化和比较
+    expiry_key: int = field(default=EXPIRY_KEY_NONE, init=False, repr=False, compare=False)      # 有效期排序键
+    drug_name_folded: str = field(default="", init=False, repr=False, compare=False)             # 大小写折叠后的药名
+
+    def __post_init__(self):
+        self.update_derived()
+
+    def update_derived(self) -> None:
+        """重新计算派生字段（在直接修改drug_name/expiry_date之后调用）"""
+        self.expiry_key = expiry_sort_key(self.expiry_date)
+        # 旧数据或LLM结果中的药名可能为null
+        self.drug_name_folded = (self.drug_name or "").casefold()
 
     @classmethod
     def create(cls, original_text: str, **kwargs) -> "StructuredMedicine":
         """创建新的StructuredMedicine实例"""
+        now = datetime.now()
         return cls(
-            id=int(datetime.now().timestamp() * 1000),
+            id=int(now.timestamp() * 1000),
             original_text=original_text.strip(),
-            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            timestamp=now.strftime('%Y-%m-%d %H:%M:%S'),
             **kwargs
         )
 
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return asdict(self)
+        """转换为字典（字段都是标量，直接构造比asdict的递归深拷贝快）"""
+        return {
+            'id': self.id,
+            'original_text': self.original_text,
+            'drug_name': self.drug_name,
+            'brand_name': self.brand_name,
+            'generic_name': self.generic_name,
+            'quantity': self.quantity,
+            'unit': self.unit,
+            'specification': self.specification,
+            'package_count': self.package_count,
+            'expiry_date': self.expiry_date,
+            'timestamp': self.timestamp,
+            'confidence': self.confidence
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "StructuredMedicine":
@@ -222,57 +301,91 @@ class StructuredMedicine:
 class StructuredMedicineList:
     """结构化药品列表管理类"""
 
-    def __init__(self, medicines: List[StructuredMedicine] = None):
-        self.medicines = medicines or []
+    def __init__(self, medicines: Iterable[StructuredMedicine] = None):
+        # id -> StructuredMedicine（dict保持插入顺序，即录入顺序）
+        self._medicines: Dict[int, StructuredMedicine] = {}
+        # STATISTICS_FIELDS中各字段非空的记录数，随增删改增量维护
+        self._filled: Dict[str, int] = dict.fromkeys(STATISTICS_FIELDS, 0)
+        for medicine in medicines or []:
+            self._insert(medicine)
+
+    def _insert(self, medicine: StructuredMedicine) -> None:
+        """插入记录；ID重复时顺延到下一个空闲ID"""
+        while medicine.id in self._medicines:
+            medicine.id += 1
+        self._medicines[medicine.id] = medicine
+        self._count(medicine, 1)
+
+    def _count(self, medicine: StructuredMedicine, delta: int) -> None:
+        """按medicine已填写的字段更新计数（delta为1或-1）"""
+        for name in STATISTICS_FIELDS:
+            if getattr(medicine, name):
+                self._filled[name] += delta
+
+    @property
+    def medicines(self) -> List[StructuredMedicine]:
+        """按录入顺序排列的药品列表"""
+        return list(self._medicines.values())
 
     def add(self, medicine: StructuredMedicine) -> None:
         """添加新的结构化药品"""
         if not medicine.is_valid():
             raise ValueError("药品信息无效：缺少药名")
-        self.medicines.append(medicine)
+        self._insert(medicine)
 
     def get_all(self) -> List[StructuredMedicine]:
         """获取所有结构化药品"""
-        return self.medicines.copy()
+        return list(self._medicines.values())
 
     def get_reversed(self) -> List[StructuredMedicine]:
         """获取倒序的列表（最新的在前）"""
-        return list(reversed(self.medicines))
+        return list(reversed(self._medicines.values()))
 
     def clear(self) -> None:
         """清空所有数据"""
-        self.medicines.clear()
+        self._medicines.clear()
+        self._filled = dict.fromkeys(STATISTICS_FIELDS, 0)
 
     def get_by_id(self, medicine_id: int) -> StructuredMedicine:
         """根据ID获取药品信息"""
-        for medicine in self.medicines:
-            if medicine.id == medicine_id:
-                return medicine
-        return None
+        return self._medicines.get(medicine_id)
 
     def update_by_id(self, medicine_id: int, **kwargs) -> bool:
         """根据ID更新药品信息"""
         medicine = self.get_by_id(medicine_id)
         if medicine:
+            self._count(medicine, -1)
             for key, value in kwargs.items():
                 if hasattr(medicine, key):
                     setattr(medicine, key, value)
+            medicine.update_derived()
+            if medicine.id != medicine_id:
+                # ID被修改时按原顺序重建（计数一并重算）
+                medicines = list(self._medicines.values())
+                self.clear()
+                for m in medicines:
+                    self._insert(m)
+            else:
+                self._count(medicine, 1)
             return True
         return False
 
     def delete_by_id(self, medicine_id: int) -> bool:
         """根据ID删除药品信息"""
-        original_length = len(self.medicines)
-        self.medicines = [m for m in self.medicines if m.id != medicine_id]
-        return len(self.medicines) < original_length
+        medicine = self._medicines.pop(medicine_id, None)
+        if medicine is None:
+            return False
+        self._count(medicine, -1)
+        return True
 
     def filter_by_drug_name(self, drug_name: str) -> List[StructuredMedicine]:
         """根据药名筛选"""
-        return [m for m in self.medicines if drug_name.lower() in m.drug_name.lower()]
+        query = drug_name.casefold()
+        return [m for m in self._medicines.values() if query in m.drug_name_folded]
 
     def filter_by_expiry(self, before_date: str = None, after_date: str = None) -> List[StructuredMedicine]:
         """根据有效期筛选"""
-        result = self.medicines.copy()
+        result = list(self._medicines.values())
         if before_date:
             result = [m for m in result if m.expiry_date and m.expiry_date <= before_date]
         if after_date:
@@ -281,47 +394,72 @@ class StructuredMedicineList:
 
     def sort_by_drug_name(self, reverse: bool = False) -> List[StructuredMedicine]:
         """按药名排序"""
-        return sorted(self.medicines, key=lambda m: m.drug_name, reverse=reverse)
+        return sorted(self._medicines.values(), key=lambda m: m.drug_name, reverse=reverse)
 
     def sort_by_expiry(self, reverse: bool = False) -> List[StructuredMedicine]:
         """按有效期排序"""
-        return sorted(
-            self.medicines,
-            key=lambda m: m.expiry_date if m.expiry_date else "9999-99-99",
-            reverse=reverse
-        )
+        return sorted(self._medicines.values(), key=attrgetter('expiry_key'), reverse=reverse)
 
     def count(self) -> int:
         """获取数量"""
-        return len(self.medicines)
+        return len(self._medicines)
+
+    def filled_counts(self) -> Dict[str, int]:
+        """
+        获取STATISTICS_FIELDS中各字段非空的记录数（O(1)，不遍历列表）
+        注意：绕过update_by_id直接修改药品属性时计数不会更新
+        """
+        return dict(self._filled)
 
     def to_dict_list(self) -> List[Dict[str, Any]]:
         """转换为字典列表"""
-        return [m.to_dict() for m in self.medicines]
+        return [m.to_dict() for m in self._medicines.values()]
 
     def to_dataframe(self) -> List[List[Any]]:
         """
         转换为Dataframe格式（倒序，最新的在上面）
         返回: [[序号, 药名, 商品名, 学术名, 数量, 单位, 规格, 包装, 有效期, 原始文本, 时间], ...]
         """
-        reversed_medicines = self.get_reversed()
-        total = len(self.medicines)
-
+        # 直接从末尾迭代dict，序号用倒数的range，不生成中间的倒序列表
         return [
-            medicine.to_dataframe_row(total - i)
-            for i, medicine in enumerate(reversed_medicines)
+            medicine.to_dataframe_row(number)
+            for number, medicine in zip(range(len(self._medicines), 0, -1), reversed(self._medicines.values()))
         ]
 
+    def to_pandas(self, medicines: Optional[List[StructuredMedicine]] = None) -> "pd.DataFrame":
+        """
+        按列构建pandas DataFrame，列名见STRUCTURED_DATAFRAME_HEADERS
+        每列用attrgetter一次取出，避免逐行构建列表后再由pandas按行转换
+
+        Args:
+            medicines: 要转换的药品（筛选/排序结果），按给定顺序从1编号；
+                       为None时转换全部数据（倒序，最新的在上面）
+
+        Raises:
+            ImportError: 未安装pandas
+        """
+        if pd is None:
+            raise ImportError("to_pandas需要安装pandas")
+
+        if medicines is None:
+            medicines = list(reversed(self._medicines.values()))
+            numbers = np.arange(len(medicines), 0, -1)
+        else:
+            numbers = np.arange(1, len(medicines) + 1)
+        columns = {STRUCTURED_DATAFRAME_HEADERS[0]: numbers}
+        for header, field in zip(STRUCTURED_DATAFRAME_HEADERS[1:], STRUCTURED_DATAFRAME_FIELDS):
+            columns[header] = list(map(attrgetter(field), medicines))
+        return pd.DataFrame(columns)
+
     @classmethod
-    def from_dict_list(cls, data: List[Dict[str, Any]]) -> "StructuredMedicineList":
-        """从字典列表创建StructuredMedicineList实例"""
-        medicines = [StructuredMedicine.from_dict(item) for item in data]
-        return cls(medicines)
+    def from_dict_list(cls, data: Iterable[Dict[str, Any]]) -> "StructuredMedicineList":
+        """从字典列表（或逐条产生字典的迭代器）创建StructuredMedicineList实例"""
+        return cls(StructuredMedicine.from_dict(item) for item in data)
 
     def __len__(self) -> int:
         """支持len()函数"""
-        return len(self.medicines)
+        return len(self._medicines)
 
     def __bool__(self) -> bool:
         """支持布尔判断"""
-        return bool(self.medicines)
+        return bool(self._medicines)
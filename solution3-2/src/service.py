@@ -4,11 +4,12 @@
 """
 
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Tuple, List, Any
 
-from .models import EntryList
+from .models import Entry, EntryList
 from .storage import JSONStorage
 
 logger = logging.getLogger(__name__)
@@ -22,6 +23,9 @@ class EntryService:
         self.current_user = "default"
         self.storage = None
         self.entry_list = None
+        # 有未保存的修改；bulk()期间暂停写文件，退出时统一保存一次
+        self._dirty = False
+        self._suspend_save = 0
         logger.info(f"EntryService 初始化, 数据目录: {data_dir}")
         self.switch_user(self.current_user)
 
@@ -47,20 +51,45 @@ class EntryService:
 
     def load(self) -> None:
         """从存储加载数据"""
-        data = self.storage.load()
-        self.entry_list = EntryList.from_dict_list(data)
-        logger.info(f"加载数据: {len(data)} 条")
+        self.entry_list = EntryList.from_dict_list(self.storage.iter_load())
+        logger.info(f"加载数据: {len(self.entry_list)} 条")
 
     def save(self) -> bool:
         """保存数据到存储"""
         data = self.entry_list.to_dict_list()
         result = self.storage.save(data)
         if result:
+            self._dirty = False
             logger.info(f"保存数据成功: {len(data)} 条")
         else:
             logger.error("保存数据失败")
         return result
 
+    def _commit(self) -> bool:
+        """标记有修改并保存；在bulk()中时推迟到退出时保存"""
+        self._dirty = True
+        if self._suspend_save:
+            return True
+        return self.save()
+
+    @contextmanager
+    def bulk(self):
+        """
+        批量修改：期间的修改只在内存中进行，退出时只写一次文件
+
+        用法:
+            with service.bulk():
+                service.add_entry(...)
+                service.delete_entry(...)
+        """
+        self._suspend_save += 1
+        try:
+            yield
+        finally:
+            self._suspend_save -= 1
+            if self._suspend_save == 0 and self._dirty:
+                self.save()
+
     def add_entry(self, text: str) -> Tuple[str, List[List[Any]], str, str]:
         """
         添加新条目
@@ -77,7 +106,7 @@ class EntryService:
 
         try:
             entry = self.entry_list.add(text)
-            self.save()
+            self._commit()
             logger.info(f"添加条目: {text[:50]}..." if len(text) > 50 else f"添加条目: {text}")
             return "✅ 已添加", self.get_dataframe(), self.get_count(), ""
         except Exception as e:
@@ -93,7 +122,7 @@ class EntryService:
         """
         count = self.entry_list.count()
         self.entry_list.clear()
-        self.save()
+        self._commit()
         logger.warning(f"清空所有数据: {count} 条")
         return "✅ 已清空所有条目", [], self.get_count()
 
@@ -113,7 +142,7 @@ class EntryService:
         try:
             entry_id = int(entry_id)
             if self.entry_list.delete_by_id(entry_id):
-                self.save()
+                self._commit()
                 return "✅ 已删除", self.get_dataframe(), self.get_count()
             else:
                 return "❌ 未找到该条目", self.get_dataframe(), self.get_count()
@@ -140,7 +169,7 @@ class EntryService:
         try:
             entry_id = int(entry_id)
             if self.entry_list.update_by_id(entry_id, new_text):
-                self.save()
+                self._commit()
                 return "✅ 已更新", self.get_dataframe(), self.get_count(), None
             else:
                 return "❌ 未找到该条目", self.get_dataframe(), self.get_count(), None
@@ -157,15 +186,13 @@ class EntryService:
         if not self.entry_list:
             return []
 
-        choices = []
-        for i, entry in enumerate(self.entry_list.get_reversed()):
-            num = len(self.entry_list) - i
-            # 截断长文本
-            text = entry.text[:40] + ('...' if len(entry.text) > 40 else '')
-            display = f"#{num} - {text}"
-            choices.append((display, str(entry.id)))
-
-        return choices
+        entries = self.entry_list.get_reversed()
+        total = len(entries)
+        # 截断长文本
+        return [
+            (f"#{total - i} - {entry.text[:40]}{'...' if len(entry.text) > 40 else ''}", str(entry.id))
+            for i, entry in enumerate(entries)
+        ]
 
     def get_entry_text(self, entry_id: int) -> str:
         """
@@ -209,24 +236,25 @@ class EntryService:
         # 检查是否为空
         if df_data is None or (isinstance(df_data, list) and len(df_data) == 0):
             self.entry_list.clear()
-            self.save()
+            self._commit()
             return "✅ 已清空", [], self.get_count()
 
         try:
             # 将Dataframe数据转换回Entry对象
+            # 缺少ID/时间的行共用同一个当前时间：ID在此基础上递增，避免同一毫秒内重复
+            now = datetime.now()
+            next_id = int(now.timestamp() * 1000)
+            now_str = now.strftime('%Y-%m-%d %H:%M:%S')
             new_entries = []
             for row in df_data:
                 # 检查行是否有效
                 if not row or not isinstance(row, (list, tuple)) or len(row) < 4:
                     continue
 
-                # row[0] = 序号 (忽略，重新计算)
-                # row[1] = 文本
-                # row[2] = 时间戳
-                # row[3] = ID
+                # [序号 (忽略，重新计算), 文本, 时间戳, ID]
+                _, text, timestamp, entry_id = row[:4]
 
                 # 处理文本 - 跳过None、空字符串、"None"字符串
-                text = row[1]
                 if text is None or text == '' or str(text).strip() == '' or str(text).strip().lower() == 'none':
                     continue  # 跳过空行
 
@@ -234,33 +262,30 @@ class EntryService:
 
                 # 处理ID - 确保是有效整数
                 try:
-                    entry_id = row[3]
                     if entry_id is None or str(entry_id).strip() == '' or str(entry_id).strip().lower() == 'none':
-                        entry_id = int(datetime.now().timestamp() * 1000)
+                        entry_id = None
                     else:
                         entry_id = int(float(entry_id))  # 先转float再转int，处理字符串数字
                 except (ValueError, TypeError):
-                    entry_id = int(datetime.now().timestamp() * 1000)
+                    entry_id = None
+                if entry_id is None:
+                    entry_id = next_id
+                    next_id += 1
 
                 # 处理时间戳
-                timestamp = row[2]
                 if timestamp is None or str(timestamp).strip() == '' or str(timestamp).strip().lower() == 'none':
-                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    timestamp = now_str
                 else:
                     timestamp = str(timestamp).strip()
 
-                new_entries.append({
-                    'id': entry_id,
-                    'text': text,
-                    'timestamp': timestamp
-                })
+                new_entries.append(Entry(id=entry_id, text=text, timestamp=timestamp))
 
             # 反序回来（Dataframe是倒序显示的）
             new_entries.reverse()
 
-            # 替换整个列表并保存
-            self.entry_list = EntryList.from_dict_list(new_entries)
-            save_result = self.save()
+            # 替换整个列表并保存；在外层bulk()中时由外层退出时统一保存，这里视为成功
+            self.entry_list = EntryList(new_entries)
+            save_result = self._commit()
 
             if save_result:
                 timestamp = datetime.now().strftime('%H:%M:%S')
@@ -309,9 +334,9 @@ class EntryService:
         filepath = Path(filename)
 
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                for i, entry in enumerate(self.entry_list.get_all(), 1):
-                    f.write(f"{i}. {entry.text}\n")
+            # 一次拼接、编码后整体写入
+            content = "".join(f"{i}. {entry.text}\n" for i, entry in enumerate(self.entry_list.get_all(), 1))
+            filepath.write_bytes(content.encode('utf-8'))
             logger.info(f"导出成功: {filepath}, {self.entry_list.count()} 条")
             return str(filepath)
         except IOError as e:
@@ -6,7 +6,19 @@
 import json
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+
+# orjson为可选依赖，编码/解码比标准库json快数倍；未安装时回退到json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson为可选依赖，用于逐条流式读取大文件；未安装时iter_load退化为整体加载
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +42,44 @@ class JSONStorage:
             return []
 
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                result = data if isinstance(data, list) else []
-                logger.info(f"加载文件成功: {self.file_path}, {len(result)} 条")
-                return result
+            if orjson is not None:
+                with open(self.file_path, 'rb') as f:
+                    data = orjson.loads(f.read())
+            else:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            result = data if isinstance(data, list) else []
+            logger.info(f"加载文件成功: {self.file_path}, {len(result)} 条")
+            return result
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"加载文件失败: {self.file_path}, 错误: {e}")
             return []
 
+    def iter_load(self) -> Iterator[Dict[str, Any]]:
+        """
+        逐条读取JSON数组中的数据（安装了ijson时不在内存中构建整个列表）
+
+        Yields:
+            数据字典；文件不存在时不产生任何数据，解析出错时在出错位置停止
+        """
+        if ijson is None:
+            yield from self.load()
+            return
+
+        if not self.file_path.exists():
+            logger.info(f"数据文件不存在: {self.file_path}")
+            return
+
+        count = 0
+        try:
+            with open(self.file_path, 'rb') as f:
+                for item in ijson.items(f, 'item', use_float=True):
+                    count += 1
+                    yield item
+            logger.info(f"流式加载文件成功: {self.file_path}, {count} 条")
+        except (ijson.JSONError, IOError) as e:
+            logger.error(f"流式加载文件失败: {self.file_path}, 已读取 {count} 条, 错误: {e}")
+
     def save(self, data: List[Dict[str, Any]]) -> bool:
         """
         保存数据到JSON文件
@@ -53,8 +94,12 @@ class JSONStorage:
             # 确保父目录存在
             self.file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                with open(self.file_path, 'wb') as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(self.file_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
             logger.info(f"保存文件成功: {self.file_path}, {len(data)} 条")
             return True
         except IOError as e:
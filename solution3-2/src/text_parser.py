@@ -5,25 +5,32 @@
 
 import logging
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from .models import Entry, EntryList, StructuredMedicine, StructuredMedicineList
 from .storage import JSONStorage
 from .llm_client import create_llm_client
+from .parser_cache import ParserCache
 import config
 
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
 logger = logging.getLogger(__name__)
 
 
 class MedicineParserService:
     """药品文本解析服务"""
 
-    def __init__(self, data_dir: Path, llm_client=None):
+    def __init__(self, data_dir: Path, llm_client=None, parser_cache: ParserCache = None):
         """
         初始化解析服务
 
         Args:
             data_dir: 数据目录
             llm_client: LLM客户端（如果为None，则自动创建）
+            parser_cache: 解析结果缓存（如果为None，则在数据目录下自动创建，所有用户共用）
         """
         self.data_dir = data_dir
         self.current_user = "default"
@@ -35,11 +42,27 @@ class MedicineParserService:
                 api_key=config.CLAUDE_API_KEY,
                 model=config.CLAUDE_MODEL,
                 max_tokens=config.CLAUDE_MAX_TOKENS,
-                temperature=config.CLAUDE_TEMPERATURE
+                temperature=config.CLAUDE_TEMPERATURE,
+                max_concurrency=config.CLAUDE_MAX_CONCURRENCY,
+                rate_limit_qpm=config.CLAUDE_RATE_LIMIT_QPM,
+                batch_api_threshold=config.CLAUDE_BATCH_API_THRESHOLD,
+                batch_api_timeout=config.CLAUDE_BATCH_API_TIMEOUT,
+                http_timeout=config.CLAUDE_HTTP_TIMEOUT,
+                warm_up=config.CLAUDE_WARM_UP
             )
         else:
             self.llm_client = llm_client
 
+        # 初始化解析缓存
+        if parser_cache is None:
+            self.parser_cache = ParserCache(
+                data_dir / config.PARSER_CACHE_FILENAME,
+                similarity_threshold=config.PARSER_CACHE_SIMILARITY,
+                embedding_model=config.PARSER_CACHE_EMBEDDING_MODEL
+            )
+        else:
+            self.parser_cache = parser_cache
+
         # 初始化存储
         self.switch_user(self.current_user)
 
@@ -63,10 +86,9 @@ class MedicineParserService:
 
     def load_structured_data(self) -> None:
         """从存储加载结构化数据"""
-        data = self.structured_storage.load()
-        if data:
-            self.structured_list = StructuredMedicineList.from_dict_list(data)
-            logger.info(f"加载结构化数据: {len(data)} 条")
+        self.structured_list = StructuredMedicineList.from_dict_list(self.structured_storage.iter_load())
+        if self.structured_list:
+            logger.info(f"加载结构化数据: {len(self.structured_list)} 条")
         else:
             logger.info("无已有结构化数据")
 
@@ -90,25 +112,37 @@ class MedicineParserService:
         """
         logger.info(f"开始解析文本: {text}")
 
-        # 调用LLM解析
-        parsed_data = self.llm_client.parse_medicine_text(text)
+        parsed_data = self.parser_cache.get(text)
+        if parsed_data is None:
+            # 调用LLM解析
+            parsed_data = self.llm_client.parse_medicine_text(text)
+            self._remember(text, parsed_data)
+            self.parser_cache.save()
+
+        medicine = self._build_medicine(text, parsed_data)
+        logger.info(f"解析完成: {medicine.drug_name}")
+        return medicine
+
+    def _remember(self, text: str, parsed_data: dict) -> None:
+        """缓存有效的LLM解析结果（后备解析的结果置信度为0，不缓存）"""
+        if parsed_data.get('drug_name') and parsed_data.get('confidence', 1.0) > 0:
+            self.parser_cache.put(text, parsed_data)
 
-        # 创建StructuredMedicine对象
-        medicine = StructuredMedicine.create(
+    def _build_medicine(self, text: str, parsed_data: dict) -> StructuredMedicine:
+        """根据LLM解析结果创建StructuredMedicine对象"""
+        return StructuredMedicine.create(
             original_text=text,
-            drug_name=parsed_data.get('drug_name', ''),
+            drug_name=parsed_data.get('drug_name') or '',  # 模型可能返回null
             brand_name=parsed_data.get('brand_name', ''),
             generic_name=parsed_data.get('generic_name', ''),
             quantity=parsed_data.get('quantity', 0.0),
             unit=parsed_data.get('unit', ''),
             specification=parsed_data.get('specification', ''),
             package_count=parsed_data.get('package_count', ''),
-            expiry_date=parsed_data.get('expiry_date', '')
+            expiry_date=parsed_data.get('expiry_date', ''),
+            confidence=parsed_data.get('confidence', 1.0)
         )
 
-        logger.info(f"解析完成: {medicine.drug_name}")
-        return medicine
-
     def parse_batch(self, entries: List[Entry]) -> Tuple[List[StructuredMedicine], List[str]]:
         """
         批量解析文本
@@ -121,20 +155,48 @@ class MedicineParserService:
         """
         logger.info(f"开始批量解析: {len(entries)} 条")
 
-        success_list = []
-        failed_list = []
-
-        for entry in entries:
+        texts = [entry.text for entry in entries]
+        # 按输入位置写回结果，输出顺序与输入一致；None表示解析失败
+        medicines: List[Optional[StructuredMedicine]] = [None] * len(texts)
+
+        # 先查缓存，只把未命中的文本发给LLM
+        miss_indices = []
+        for i, text in enumerate(texts):
+            cached = self.parser_cache.get(text)
+            if cached is not None:
+                medicines[i] = self._build_medicine(text, cached)
+            else:
+                miss_indices.append(i)
+        logger.info(f"缓存命中 {len(texts) - len(miss_indices)} 条, 需调用LLM {len(miss_indices)} 条")
+
+        # 客户端支持批量接口时并发请求；注入的客户端可能只实现了单条接口
+        parse_batch = getattr(self.llm_client, 'parse_medicine_batch', None)
+        if parse_batch is not None and miss_indices:
+            miss_texts = [texts[i] for i in miss_indices]
             try:
-                medicine = self.parse_single_text(entry.text)
-                if medicine.is_valid():
-                    success_list.append(medicine)
-                else:
-                    logger.warning(f"解析结果无效: {entry.text}")
-                    failed_list.append(entry.text)
+                for i, parsed in zip(miss_indices, parse_batch(miss_texts)):
+                    self._remember(texts[i], parsed)
+                    medicines[i] = self._build_medicine(texts[i], parsed)
             except Exception as e:
-                logger.error(f"解析失败: {entry.text}, 错误: {e}")
-                failed_list.append(entry.text)
+                logger.error(f"批量解析失败: {e}")
+        else:
+            for i in miss_indices:
+                try:
+                    medicines[i] = self.parse_single_text(texts[i])
+                except Exception as e:
+                    logger.error(f"解析失败: {texts[i]}, 错误: {e}")
+        self.parser_cache.save()
+
+        success_list = []
+        failed_list = []
+        for text, medicine in zip(texts, medicines):
+            if medicine is None:
+                failed_list.append(text)
+            elif medicine.is_valid():
+                success_list.append(medicine)
+            else:
+                logger.warning(f"解析结果无效: {medicine.original_text}")
+                failed_list.append(medicine.original_text)
 
         logger.info(f"批量解析完成: 成功 {len(success_list)}, 失败 {len(failed_list)}")
         return success_list, failed_list
@@ -143,6 +205,23 @@ class MedicineParserService:
         """
         解析并保存
 
+        Args:
+            entries: Entry对象列表
+
+        Returns:
+            (成功数量, 失败数量, 失败文本列表)
+        """
+        result = self.parse_and_add(entries)
+
+        # 保存
+        self.save_structured_data()
+
+        return result
+
+    def parse_and_add(self, entries: List[Entry]) -> Tuple[int, int, List[str]]:
+        """
+        解析并加入当前列表（不保存；分批解析时全部完成后再调用save_structured_data）
+
         Args:
             entries: Entry对象列表
 
@@ -159,63 +238,58 @@ class MedicineParserService:
                 logger.error(f"添加失败: {e}")
                 failed_list.append(medicine.original_text)
 
-        # 保存
-        self.save_structured_data()
-
         return len(success_list), len(failed_list), failed_list
 
     def get_all_structured(self) -> List[StructuredMedicine]:
         """获取所有结构化数据"""
         return self.structured_list.get_all()
 
-    def get_structured_dataframe(self) -> List[List]:
-        """获取结构化数据的Dataframe格式"""
+    def get_structured_dataframe(self):
+        """获取结构化数据的Dataframe格式（安装了pandas时按列直接构建DataFrame）"""
+        if pd is not None:
+            return self.structured_list.to_pandas()
         return self.structured_list.to_dataframe()
 
-    def filter_by_drug_name(self, drug_name: str) -> List[List]:
+    def filter_by_drug_name(self, drug_name: str):
         """按药名筛选并返回Dataframe格式"""
         filtered = self.structured_list.filter_by_drug_name(drug_name)
         return self._medicines_to_dataframe(filtered)
 
-    def filter_by_expiry(self, before_date: str = None, after_date: str = None) -> List[List]:
+    def filter_by_expiry(self, before_date: str = None, after_date: str = None):
         """按有效期筛选并返回Dataframe格式"""
         filtered = self.structured_list.filter_by_expiry(before_date, after_date)
         return self._medicines_to_dataframe(filtered)
 
-    def sort_by_drug_name(self, reverse: bool = False) -> List[List]:
+    def sort_by_drug_name(self, reverse: bool = False):
         """按药名排序并返回Dataframe格式"""
         sorted_list = self.structured_list.sort_by_drug_name(reverse)
         return self._medicines_to_dataframe(sorted_list)
 
-    def sort_by_expiry(self, reverse: bool = False) -> List[List]:
+    def sort_by_expiry(self, reverse: bool = False):
         """按有效期排序并返回Dataframe格式"""
         sorted_list = self.structured_list.sort_by_expiry(reverse)
         return self._medicines_to_dataframe(sorted_list)
 
-    def _medicines_to_dataframe(self, medicines: List[StructuredMedicine]) -> List[List]:
-        """将药品列表转换为Dataframe格式"""
+    def _medicines_to_dataframe(self, medicines: List[StructuredMedicine]):
+        """将药品列表转换为Dataframe格式（与get_structured_dataframe相同，安装了pandas时按列构建DataFrame）"""
+        if pd is not None:
+            return self.structured_list.to_pandas(medicines)
         return [
             medicine.to_dataframe_row(i + 1)
             for i, medicine in enumerate(medicines)
         ]
 
     def get_statistics(self) -> dict:
-        """获取统计信息"""
-        total = self.structured_list.count()
-
-        # 统计各字段的填充率
-        all_medicines = self.structured_list.get_all()
-
-        stats = {
-            'total': total,
-            'with_brand_name': sum(1 for m in all_medicines if m.brand_name),
-            'with_generic_name': sum(1 for m in all_medicines if m.generic_name),
-            'with_specification': sum(1 for m in all_medicines if m.specification),
-            'with_expiry_date': sum(1 for m in all_medicines if m.expiry_date),
+        """获取统计信息（各字段的填充数由structured_list增量维护）"""
+        filled = self.structured_list.filled_counts()
+        return {
+            'total': self.structured_list.count(),
+            'with_brand_name': filled['brand_name'],
+            'with_generic_name': filled['generic_name'],
+            'with_specification': filled['specification'],
+            'with_expiry_date': filled['expiry_date'],
         }
 
-        return stats
-
     def clear_all(self) -> None:
         """清空所有结构化数据"""
         self.structured_list.clear()
@@ -3,28 +3,138 @@ Gradio UI组件模块 - 多Tab版本
 包含：语音收集、智能结构化、数据分析三个Tab
 """
 
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import gradio as gr
+import pandas as pd
 from .service import EntryService
 from .text_parser import MedicineParserService
-from .voice import VOICE_RECOGNITION_JS
+from .models import STRUCTURED_DATAFRAME_HEADERS
+from .voice import VOICE_HEAD_HTML
+import config
+
+# 表格分页：只把当前页发送给浏览器，配合max_height让前端虚拟滚动
+PAGE_SIZE_CHOICES = [50, 100, 500]
+DEFAULT_PAGE_SIZE = 100
+DATAFRAME_MAX_HEIGHT = 500
+
+# Tab2结果表和Tab3数据表的列设置（列名与models.STRUCTURED_DATAFRAME_HEADERS一致）
+# 有效期按字符串显示：date类型列会让前端渲染极慢，排序在服务端sort_by_expiry中完成
+STRUCTURED_DATATYPES = ["number", "str", "str", "str", "number", "str", "str", "str", "str", "str", "str"]
+STRUCTURED_COLUMN_WIDTHS = ["5%", "10%", "8%", "10%", "5%", "5%", "8%", "8%", "10%", "20%", "11%"]
+
+# 事件并发设置：只读操作可并行；修改数据的操作共用一个并发组，依次执行，避免同时写文件。
+# LLM解析也在写入组中：解析过程中修改并保存当前用户的结构化数据，
+# 与切换用户/保存/清空同时执行会把结果写进另一个用户的文件
+_READ_EVENT = {'concurrency_limit': config.UI_READ_CONCURRENCY}
+_WRITE_EVENT = {'concurrency_limit': 1, 'concurrency_id': 'write'}
+
+# 处理函数的执行方式：
+# - 内存中的计算和单条修改（筛选、排序、翻页、表格增删改、保存）用普通函数，由Gradio放到工作线程执行
+# - 加载整个数据文件（切换用户、刷新、加载原始数据）用async函数 + asyncio.to_thread，可以并发等待
+# - LLM解析一批要等待几十秒，放到单独的线程池，不占用asyncio默认线程池中读写文件的线程
+_LLM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=_WRITE_EVENT['concurrency_limit'], thread_name_prefix="mt-llm"
+)
+
+
+def _page_slice(rows, page, page_size):
+    """截取第page页（从1开始）的数据，兼容列表和pandas DataFrame"""
+    page_size = int(page_size or DEFAULT_PAGE_SIZE)
+    start = (max(1, int(page or 1)) - 1) * page_size
+    if hasattr(rows, 'iloc'):
+        return rows.iloc[start:start + page_size]
+    return rows[start:start + page_size]
 
 
 class GradioUI:
     """Gradio用户界面类（多Tab版本）"""
 
+    # 统计信息Markdown模板，字段与get_statistics()的键一致
+    _STATS_TEMPLATE = (
+        "### 📊 统计信息\n\n"
+        "- **总计**: {total} 条\n"
+        "- **有商品名**: {with_brand_name} 条\n"
+        "- **有学术名**: {with_generic_name} 条\n"
+        "- **有规格**: {with_specification} 条\n"
+        "- **有效期**: {with_expiry_date} 条\n"
+    )
+
     def __init__(self, entry_service: EntryService, parser_service: MedicineParserService = None):
         self.entry_service = entry_service
-        self.parser_service = parser_service or MedicineParserService()
+        # 未注入时在第一次使用时才创建（会加载数据文件和LLM客户端）
+        self._parser_service = parser_service
         self.app = None
+        # 结构化数据视图缓存：(用户, 版本, 视图类型, 参数...) -> dataframe，数据变化时递增版本并清空
+        self._df_cache = {}
+        self._df_version = 0
+        # 解析在_LLM_EXECUTOR线程中完成后会使缓存失效，同时Gradio工作线程在读取/淘汰缓存
+        self._df_cache_lock = threading.Lock()
+        # 最近一次切换用户：(user_id, time.monotonic())，用于忽略短时间内的重复提交
+        self._last_switch = None
+
+    @property
+    def parser_service(self) -> MedicineParserService:
+        """结构化解析服务（未注入时使用默认数据目录延迟创建）"""
+        if self._parser_service is None:
+            self._parser_service = MedicineParserService(config.DATA_DIR)
+        return self._parser_service
+
+    def _invalidate_df_cache(self) -> None:
+        """结构化数据变化（切换用户、解析、保存、重新加载）后使视图缓存失效"""
+        with self._df_cache_lock:
+            self._df_version += 1
+            self._df_cache.clear()
+
+    def _cached_view(self, compute, *args):
+        """
+        按当前用户和数据版本缓存结构化数据视图
+
+        Args:
+            compute: 计算视图的函数（parser_service的方法）
+            *args: 传给compute的参数，与函数名一起作为缓存键
+        """
+        with self._df_cache_lock:
+            version = self._df_version
+            key = (self.parser_service.current_user, version, compute.__name__, *args)
+            cached = self._df_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # 在锁外计算，不阻塞其他线程读取缓存
+        result = compute(*args)
+        with self._df_cache_lock:
+            # 计算期间数据已变化时不写入（缓存已清空，旧版本的键不会再被读取）
+            if version == self._df_version:
+                # 筛选关键词不固定，限制缓存条数，淘汰最早写入的
+                if len(self._df_cache) >= 32:
+                    self._df_cache.pop(next(iter(self._df_cache)))
+                self._df_cache[key] = result
+        return result
+
+    @classmethod
+    def _format_stats(cls, stats: dict) -> str:
+        """将get_statistics()的结果格式化为Markdown"""
+        return cls._STATS_TEMPLATE.format_map(stats)
+
+    def _cached_df(self):
+        """获取（缓存的）完整结构化数据dataframe"""
+        return self._cached_view(self.parser_service.get_structured_dataframe)
 
     def build(self) -> gr.Blocks:
         """构建Gradio界面（多Tab布局）"""
 
+        # 允许通过/gradio_api/file=访问静态资源目录（需在创建Blocks之前设置）
+        gr.set_static_paths(paths=[config.STATIC_DIR])
+
         with gr.Blocks(
             title="药品信息管理系统 V3.1",
             theme=gr.themes.Soft(),
-            head=VOICE_RECOGNITION_JS,
-            css=self._get_custom_css()
+            head=VOICE_HEAD_HTML
         ) as app:
 
             # 全局标题
@@ -39,7 +149,8 @@ class GradioUI:
                         label="用户ID (输入后回车切换)",
                         value="default",
                         placeholder="输入用户名...",
-                        scale=1
+                        scale=1,
+                        elem_id="mt_user_input"
                     )
                     self.user_status = gr.Markdown("✅ 当前用户: default")
 
@@ -48,17 +159,20 @@ class GradioUI:
             # 创建三个Tab
             with gr.Tabs():
                 # ========== Tab 1: 语音收集 ==========
-                with gr.Tab("📝 语音收集"):
+                with gr.Tab("📝 语音收集") as self.tab1:
                     self._build_tab1_voice_collection()
 
                 # ========== Tab 2: 智能结构化 ==========
-                with gr.Tab("🧠 智能结构化"):
+                with gr.Tab("🧠 智能结构化") as self.tab2:
                     self._build_tab2_structuring()
 
                 # ========== Tab 3: 数据分析 ==========
-                with gr.Tab("📊 数据分析"):
+                with gr.Tab("📊 数据分析") as self.tab3:
                     self._build_tab3_analysis()
 
+            # 当前显示的Tab（1-3），切换用户时只向可见的Tab3发送数据
+            self.active_tab = gr.State(1)
+
             self.app = app
 
             # 绑定所有事件（必须在app赋值后）
@@ -66,6 +180,7 @@ class GradioUI:
             self._bind_tab1_events()
             self._bind_tab2_events()
             self._bind_tab3_events()
+            self._bind_load_events()
 
             return app
 
@@ -98,11 +213,12 @@ class GradioUI:
         self.text_input = gr.Textbox(
             label="📝 识别结果 / 手动输入",
             placeholder="点击上方按钮进行语音输入，或在这里手动输入...",
-            lines=2
+            lines=2,
+            elem_id="mt_text_input"
         )
 
         with gr.Row():
-            self.add_btn = gr.Button("➕ 添加到列表", variant="primary", size="lg")
+            self.add_btn = gr.Button("➕ 添加到列表", variant="primary", size="lg", elem_id="mt_add_btn")
 
         self.status = gr.Textbox(label="状态", interactive=False, show_label=False)
 
@@ -111,6 +227,7 @@ class GradioUI:
 
         self.count_display = gr.Markdown("📊 已收集: **加载中...** 条")
 
+        # 编辑只在前端进行，不绑定change事件；点"保存表格修改"时一次性提交（批量编辑、一次提交）
         self.dataframe = gr.Dataframe(
             value=[],
             headers=["#", "药品信息", "录入时间", "ID"],
@@ -119,7 +236,9 @@ class GradioUI:
             row_count=(0, "dynamic"),
             interactive=True,
             wrap=True,
-            column_widths=["8%", "52%", "25%", "15%"]
+            max_height=DATAFRAME_MAX_HEIGHT,
+            column_widths=["8%", "52%", "25%", "15%"],
+            elem_id="mt_entries_grid"
         )
 
         self.table_status = gr.Textbox(label="操作状态", interactive=False, show_label=False)
@@ -146,8 +265,14 @@ class GradioUI:
                     headers=["#", "药品信息", "录入时间"],
                     label="待处理的原始文本",
                     interactive=False,
-                    wrap=True
+                    wrap=True,
+                    max_height=DATAFRAME_MAX_HEIGHT
                 )
+                with gr.Row():
+                    self.tab2_page = gr.Number(label="页码", value=1, precision=0, minimum=1)
+                    self.tab2_page_size = gr.Dropdown(
+                        choices=PAGE_SIZE_CHOICES, value=DEFAULT_PAGE_SIZE, label="每页条数"
+                    )
 
             with gr.Column(scale=1):
                 gr.Markdown("### ⚙️ 操作")
@@ -163,13 +288,17 @@ class GradioUI:
         gr.Markdown("---")
         gr.Markdown("### 📋 结构化结果")
 
+        # 与Tab1相同：不绑定change事件，避免每次编辑单元格都把整张表回传到服务器
         self.tab2_result_df = gr.Dataframe(
             value=[],
-            headers=["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"],
+            headers=STRUCTURED_DATAFRAME_HEADERS,
+            datatype=STRUCTURED_DATATYPES,
             label="AI解析结果（可编辑）",
             interactive=True,
             wrap=True,
-            column_widths=["5%", "10%", "8%", "10%", "5%", "5%", "8%", "8%", "10%", "20%", "11%"]
+            max_height=DATAFRAME_MAX_HEIGHT,
+            column_widths=STRUCTURED_COLUMN_WIDTHS,
+            elem_id="mt_structured_grid"
         )
 
         with gr.Row():
@@ -216,13 +345,25 @@ class GradioUI:
         # 数据展示
         self.tab3_data_df = gr.Dataframe(
             value=[],
-            headers=["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"],
+            headers=STRUCTURED_DATAFRAME_HEADERS,
+            datatype=STRUCTURED_DATATYPES,
             label="结构化数据",
             interactive=False,
             wrap=True,
-            column_widths=["5%", "10%", "8%", "10%", "5%", "5%", "8%", "8%", "10%", "20%", "11%"]
+            max_height=DATAFRAME_MAX_HEIGHT,
+            column_widths=STRUCTURED_COLUMN_WIDTHS
         )
 
+        with gr.Row():
+            self.tab3_page = gr.Number(label="页码", value=1, precision=0, minimum=1)
+            self.tab3_page_size = gr.Dropdown(
+                choices=PAGE_SIZE_CHOICES, value=DEFAULT_PAGE_SIZE, label="每页条数"
+            )
+        # 当前视图：("full",) / ("filter", 关键词) / ("sort", 排序依据, 是否降序)，翻页时按它重新取数据
+        self.tab3_view = gr.State(("full",))
+        # 表格和统计当前显示内容的标识（见_tab3_token），内容未变时切换回Tab3不再重新发送
+        self.tab3_shown = gr.State(None)
+
         with gr.Row():
             self.tab3_refresh_btn = gr.Button("🔄 刷新数据", variant="primary", size="lg")
             self.tab3_export_btn = gr.Button("📥 导出当前视图", variant="secondary")
@@ -230,51 +371,65 @@ class GradioUI:
     def _bind_user_events(self):
         """绑定用户切换事件"""
         
-        def switch_user(user_id):
-            """切换用户并刷新所有数据"""
-            # 切换EntryService用户
-            msg1 = self.entry_service.switch_user(user_id)
-            # 切换ParserService用户
+        def switch_tab1(user_id):
+            """切换EntryService用户并返回Tab1数据（switch_user已重新加载，无需再refresh）"""
+            self.entry_service.switch_user(user_id)
+            return self.entry_service.get_dataframe(), self.entry_service.get_count()
+
+        def switch_structured(user_id, with_stats):
+            """切换ParserService用户并返回结构化数据和统计（with_stats为False时不计算统计）"""
             self.parser_service.switch_user(user_id)
-            
-            # 刷新Tab1数据
-            df1, count1 = self.entry_service.refresh()
-            
-            # 刷新Tab2数据 (清空显示)
-            df2_source = []
-            df2_result = self.parser_service.get_structured_dataframe()
-            
-            # 刷新Tab3数据
-            self.parser_service.load_structured_data()
-            df3 = self.parser_service.get_structured_dataframe()
-            stats = self.parser_service.get_statistics()
-            stats_text = f"""### 📊 统计信息
-
-- **总计**: {stats['total']} 条
-- **有商品名**: {stats['with_brand_name']} 条
-- **有学术名**: {stats['with_generic_name']} 条
-- **有规格**: {stats['with_specification']} 条
-- **有效期**: {stats['with_expiry_date']} 条
-"""
-            
+            self._invalidate_df_cache()
+            df = self._cached_df()
+            stats_text = self._format_stats(self.parser_service.get_statistics()) if with_stats else None
+            return df, stats_text
+
+        async def switch_user(user_id, page_size, active_tab):
+            """切换用户并刷新所有数据（两个服务互不依赖，在线程中并发加载）"""
+            # 同一用户在防抖时间内重复提交（连按回车、重连后重复触发）时不再重新加载
+            now = time.monotonic()
+            last = self._last_switch
+            if last and last[0] == user_id and now - last[1] < config.UI_SWITCH_DEBOUNCE_SECONDS:
+                return tuple(gr.skip() for _ in switch_outputs)
+            self._last_switch = (user_id, now)
+
+            tab3_visible = active_tab == 3
+            (df1, count1), (df, stats_text) = await asyncio.gather(
+                asyncio.to_thread(switch_tab1, user_id),
+                asyncio.to_thread(switch_structured, user_id, tab3_visible)
+            )
+
+            # Tab2的原始数据清空显示，结构化结果用同一份数据；
+            # Tab3不可见时不发送（选中Tab3时会重新加载），可见时回到第一页
+            if tab3_visible:
+                tab3_updates = (_page_slice(df, 1, page_size), stats_text, 1, ("full",))
+            else:
+                tab3_updates = (gr.skip(), gr.skip(), gr.skip(), gr.skip())
             return (
                 f"✅ 当前用户: {user_id}", 
                 df1, count1, 
-                df2_source, "就绪", df2_result,
-                df3, stats_text
+                [], "就绪", df,
+                *tab3_updates
             )
 
+        switch_outputs = [
+            self.user_status,
+            self.dataframe, self.count_display,
+            self.tab2_source_df, self.tab2_status, self.tab2_result_df,
+            self.tab3_data_df, self.tab3_stats, self.tab3_page, self.tab3_view
+        ]
+
         self.user_input.submit(
             fn=switch_user,
-            inputs=[self.user_input],
-            outputs=[
-                self.user_status,
-                self.dataframe, self.count_display,
-                self.tab2_source_df, self.tab2_status, self.tab2_result_df,
-                self.tab3_data_df, self.tab3_stats
-            ]
+            inputs=[self.user_input, self.tab3_page_size, self.active_tab],
+            outputs=switch_outputs,
+            **_WRITE_EVENT
         )
 
+        # 记录当前显示的Tab
+        for index, tab in enumerate((self.tab1, self.tab2, self.tab3), 1):
+            tab.select(fn=functools.partial(int, index), outputs=[self.active_tab], queue=False)
+
     def _bind_tab1_events(self):
         """绑定Tab1事件"""
 
@@ -317,77 +472,131 @@ class GradioUI:
         self.add_btn.click(
             fn=self.entry_service.add_entry,
             inputs=[self.text_input],
-            outputs=[self.status, self.dataframe, self.count_display, self.text_input]
+            outputs=[self.status, self.dataframe, self.count_display, self.text_input],
+            **_WRITE_EVENT
         )
 
         # 保存表格
         self.save_table_btn.click(
             fn=self.entry_service.save_dataframe,
             inputs=[self.dataframe],
-            outputs=[self.table_status, self.dataframe, self.count_display]
+            outputs=[self.table_status, self.dataframe, self.count_display],
+            **_WRITE_EVENT
         )
 
         # 刷新
         self.refresh_btn.click(
             fn=self.entry_service.refresh,
-            outputs=[self.dataframe, self.count_display]
+            outputs=[self.dataframe, self.count_display],
+            **_READ_EVENT
         )
 
         # 导出
         self.export_btn.click(
             fn=self.entry_service.export_to_text,
-            outputs=[self.file_output]
+            outputs=[self.file_output],
+            **_READ_EVENT
         )
 
         # 清空
         self.clear_btn.click(
             fn=self.entry_service.clear_all,
-            outputs=[self.table_status, self.dataframe, self.count_display]
+            outputs=[self.table_status, self.dataframe, self.count_display],
+            **_WRITE_EVENT
         )
 
         # 回车提交
         self.text_input.submit(
             fn=self.entry_service.add_entry,
             inputs=[self.text_input],
-            outputs=[self.status, self.dataframe, self.count_display, self.text_input]
+            outputs=[self.status, self.dataframe, self.count_display, self.text_input],
+            **_WRITE_EVENT
         )
 
-        # 页面加载时刷新
+    def _bind_load_events(self):
+        """
+        绑定页面加载事件（整个界面只注册这一个load，避免打开页面时多次往返）
+        Tab2、Tab3的数据在切换到对应Tab时才加载
+        """
+
+        async def initial_load():
+            """页面打开时重新读取Tab1的数据文件（放到线程中执行）"""
+            return await asyncio.to_thread(self.entry_service.refresh)
+
         self.app.load(
-            fn=self.entry_service.refresh,
-            outputs=[self.dataframe, self.count_display]
+            fn=initial_load,
+            outputs=[self.dataframe, self.count_display],
+            **_READ_EVENT
         )
 
     def _bind_tab2_events(self):
         """绑定Tab2事件"""
 
-        def load_raw_data():
-            """加载原始数据"""
-            entries = self.entry_service.entry_list.get_all()
-            if not entries:
-                return [], "⚠️ 没有原始数据"
+        async def load_raw_data(page, page_size):
+            """加载原始数据（只返回当前页）"""
+            return await asyncio.to_thread(_load_raw_data, page, page_size)
 
-            # 转换为简化的dataframe格式
-            df_data = [[i+1, e.text, e.timestamp] for i, e in enumerate(entries)]
-            return df_data, f"✅ 已加载 {len(entries)} 条原始数据"
-
-        def parse_all():
-            """解析所有原始数据"""
+        async def parse_all(progress=gr.Progress()):
+            """
+            分批解析所有原始数据，每批完成后推送进度和当前结果
+            （LLM请求耗时，放到_LLM_EXECUTOR中执行，不阻塞事件循环）
+            """
             entries = self.entry_service.entry_list.get_all()
             if not entries:
-                return [], "⚠️ 没有数据需要解析", self.parser_service.get_structured_dataframe()
+                yield [], "⚠️ 没有数据需要解析", self._cached_df()
+                return
+
+            loop = asyncio.get_running_loop()
+            total = len(entries)
+            chunk_size = config.UI_PARSE_CHUNK_SIZE
+            success = 0
+            failed_texts = []
+            for start in range(0, total, chunk_size):
+                progress((start, total), desc="解析中", unit="条")
+                chunk_success, _, chunk_failed, df = await loop.run_in_executor(
+                    _LLM_EXECUTOR, _parse_chunk, entries[start:start + chunk_size]
+                )
+                success += chunk_success
+                failed_texts.extend(chunk_failed)
+                done = min(start + chunk_size, total)
+                if done < total:
+                    yield [], f"⏳ 解析中 {done}/{total}（成功 {success} 条）", df
 
-            success, failed, failed_texts = self.parser_service.parse_and_save(entries)
+            # 全部解析完成后只保存一次
+            await asyncio.to_thread(self.parser_service.save_structured_data)
 
-            status_msg = f"✅ 解析完成！\n成功: {success} 条\n失败: {failed} 条"
+            status_msg = f"✅ 解析完成！\n成功: {success} 条\n失败: {len(failed_texts)} 条"
             if failed_texts:
                 status_msg += f"\n\n失败的文本:\n" + "\n".join(f"- {t}" for t in failed_texts[:5])
 
-            return [], status_msg, self.parser_service.get_structured_dataframe()
+            yield [], status_msg, df
+
+        def _load_raw_data(page, page_size):
+            entries = self.entry_service.entry_list.entries
+            if not entries:
+                return [], "⚠️ 没有原始数据"
+
+            # 按列构建当前页的DataFrame，序号按全部数据编号
+            page_size = int(page_size or DEFAULT_PAGE_SIZE)
+            start = (max(1, int(page or 1)) - 1) * page_size
+            page_entries = entries[start:start + page_size]
+            df = pd.DataFrame({
+                "#": range(start + 1, start + len(page_entries) + 1),
+                "药品信息": [e.text for e in page_entries],
+                "录入时间": [e.timestamp for e in page_entries],
+            })
+            return df, f"✅ 已加载 {len(entries)} 条原始数据（第 {start + 1}-{start + len(page_entries)} 条）"
+
+        def _parse_chunk(chunk):
+            """解析一批条目并返回 (成功数, 失败数, 失败文本, 最新的结构化数据)"""
+            success, failed, failed_texts = self.parser_service.parse_and_add(chunk)
+            self._invalidate_df_cache()
+            return success, failed, failed_texts, self._cached_df()
 
         def save_structured():
             """保存结构化数据"""
             if self.parser_service.save_structured_data():
+                self._invalidate_df_cache()
                 count = self.parser_service.structured_list.count()
                 return f"✅ 已保存 {count} 条结构化数据"
             else:
@@ -396,108 +605,151 @@ class GradioUI:
         # 绑定事件
         self.tab2_load_btn.click(
             fn=load_raw_data,
-            outputs=[self.tab2_source_df, self.tab2_status]
+            inputs=[self.tab2_page, self.tab2_page_size],
+            outputs=[self.tab2_source_df, self.tab2_status],
+            **_READ_EVENT
         )
 
+        # 翻页/修改每页条数时重新加载当前页（input只响应用户操作）
+        for control in (self.tab2_page, self.tab2_page_size):
+            control.input(
+                fn=load_raw_data,
+                inputs=[self.tab2_page, self.tab2_page_size],
+                outputs=[self.tab2_source_df, self.tab2_status],
+                **_READ_EVENT
+            )
+
         self.tab2_parse_btn.click(
             fn=parse_all,
-            outputs=[self.tab2_source_df, self.tab2_status, self.tab2_result_df]
+            outputs=[self.tab2_source_df, self.tab2_status, self.tab2_result_df],
+            **_WRITE_EVENT
         )
 
         self.tab2_save_btn.click(
             fn=save_structured,
-            outputs=[self.tab2_result_status]
+            outputs=[self.tab2_result_status],
+            **_WRITE_EVENT
         )
 
     def _bind_tab3_events(self):
         """绑定Tab3事件"""
 
-        def refresh_data():
-            """刷新数据和统计"""
+        def view_rows(view):
+            """按视图描述取（缓存的）完整数据"""
+            if view[0] == "filter":
+                return self._cached_view(self.parser_service.filter_by_drug_name, view[1])
+            if view[0] == "sort":
+                sort_by, reverse = view[1], view[2]
+                if sort_by == "药名":
+                    return self._cached_view(self.parser_service.sort_by_drug_name, reverse)
+                if sort_by == "有效期":
+                    return self._cached_view(self.parser_service.sort_by_expiry, reverse)
+            return self._cached_df()
+
+        def show_view(view, page_size):
+            """切换视图并回到第一页：(当前页数据, 页码, 视图)"""
+            return _page_slice(view_rows(view), 1, page_size), 1, view
+
+        async def refresh_data(page_size):
+            """刷新数据和统计（读文件放到线程中执行）"""
+            return await asyncio.to_thread(_refresh_data, page_size)
+
+        def _refresh_data(page_size):
             self.parser_service.load_structured_data()
-            df = self.parser_service.get_structured_dataframe()
-            stats = self.parser_service.get_statistics()
+            self._invalidate_df_cache()
+            stats_text = self._format_stats(self.parser_service.get_statistics())
+            df, page, view = show_view(("full",), page_size)
+            return df, stats_text, page, view, _tab3_token(view, page, page_size)
 
-            stats_text = f"""### 📊 统计信息
+        def _tab3_token(view, page, page_size):
+            """Tab3显示内容只取决于用户、数据版本、视图和分页"""
+            return (self.parser_service.current_user, self._df_version, view, page, page_size)
 
-- **总计**: {stats['total']} 条
-- **有商品名**: {stats['with_brand_name']} 条
-- **有学术名**: {stats['with_generic_name']} 条
-- **有规格**: {stats['with_specification']} 条
-- **有效期**: {stats['with_expiry_date']} 条
-"""
-            return df, stats_text
+        def select_tab3(view, page, page_size, shown):
+            """
+            切换到Tab3：按当前视图和页码显示内存中的数据（读文件只在点"刷新数据"时进行）
+            与上次显示的内容相同时跳过，不重复发送表格和统计
+            """
+            token = _tab3_token(view, page, page_size)
+            if token == shown:
+                return gr.skip(), gr.skip(), shown
+            stats_text = self._format_stats(self.parser_service.get_statistics())
+            return _page_slice(view_rows(view), page, page_size), stats_text, token
 
-        def filter_data(drug_name):
+        def filter_data(drug_name, page_size):
             """筛选数据"""
             if not drug_name or not drug_name.strip():
-                return self.parser_service.get_structured_dataframe()
-            return self.parser_service.filter_by_drug_name(drug_name.strip())
+                return show_view(("full",), page_size)
+            return show_view(("filter", drug_name.strip()), page_size)
+
+        def reset_view(page_size):
+            """重置为完整数据（取缓存的完整dataframe，不重新构建）"""
+            return show_view(("full",), page_size)
 
-        def sort_data(sort_by, sort_order):
+        def sort_data(sort_by, sort_order, page_size):
             """排序数据"""
             reverse = (sort_order == "降序")
+            return show_view(("sort", sort_by, reverse), page_size)
 
-            if sort_by == "药名":
-                return self.parser_service.sort_by_drug_name(reverse=reverse)
-            elif sort_by == "有效期":
-                return self.parser_service.sort_by_expiry(reverse=reverse)
-            else:
-                return self.parser_service.get_structured_dataframe()
+        def change_page(view, page, page_size):
+            """翻页：在当前视图中取指定页"""
+            return _page_slice(view_rows(view), page, page_size)
+
+        view_outputs = [self.tab3_data_df, self.tab3_page, self.tab3_view]
 
         # 绑定事件
         self.tab3_refresh_btn.click(
             fn=refresh_data,
-            outputs=[self.tab3_data_df, self.tab3_stats]
+            inputs=[self.tab3_page_size],
+            outputs=[self.tab3_data_df, self.tab3_stats, self.tab3_page, self.tab3_view, self.tab3_shown],
+            **_READ_EVENT
         )
 
         self.tab3_filter_btn.click(
             fn=filter_data,
-            inputs=[self.tab3_drug_filter],
-            outputs=[self.tab3_data_df]
+            inputs=[self.tab3_drug_filter, self.tab3_page_size],
+            outputs=view_outputs,
+            **_READ_EVENT
         )
 
         self.tab3_reset_btn.click(
-            fn=lambda: self.parser_service.get_structured_dataframe(),
-            outputs=[self.tab3_data_df]
+            fn=reset_view,
+            inputs=[self.tab3_page_size],
+            outputs=view_outputs,
+            **_READ_EVENT
         )
 
         self.tab3_sort_btn.click(
             fn=sort_data,
-            inputs=[self.tab3_sort_by, self.tab3_sort_order],
-            outputs=[self.tab3_data_df]
+            inputs=[self.tab3_sort_by, self.tab3_sort_order, self.tab3_page_size],
+            outputs=view_outputs,
+            **_READ_EVENT
         )
 
-        # 页面加载时刷新Tab3
-        self.app.load(
-            fn=refresh_data,
-            outputs=[self.tab3_data_df, self.tab3_stats]
-        )
+        # 翻页/修改每页条数（input只响应用户操作，不会被上面回写页码触发）
+        for control in (self.tab3_page, self.tab3_page_size):
+            control.input(
+                fn=change_page,
+                inputs=[self.tab3_view, self.tab3_page, self.tab3_page_size],
+                outputs=[self.tab3_data_df],
+                **_READ_EVENT
+            )
 
-    def _get_custom_css(self) -> str:
-        """获取自定义CSS样式"""
-        return """
-        .voice-btn {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-            color: white !important;
-            border: none !important;
-            font-size: 18px !important;
-            padding: 20px !important;
-            font-weight: bold !important;
-        }
-        .continuous-btn {
-            background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%) !important;
-            color: white !important;
-            border: none !important;
-            font-size: 18px !important;
-            padding: 20px !important;
-            font-weight: bold !important;
-        }
-        """
+        # 切换到Tab3时才加载，页面打开时只刷新Tab1
+        self.tab3.select(
+            fn=select_tab3,
+            inputs=[self.tab3_view, self.tab3_page, self.tab3_page_size, self.tab3_shown],
+            outputs=[self.tab3_data_df, self.tab3_stats, self.tab3_shown],
+            **_READ_EVENT
+        )
 
     def launch(self, **kwargs):
         """启动应用"""
         if self.app is None:
             self.build()
 
+        self.app.queue(
+            default_concurrency_limit=config.UI_DEFAULT_CONCURRENCY,
+            max_size=config.UI_QUEUE_MAX_SIZE
+        )
         return self.app.launch(**kwargs)
@@ -59,11 +59,12 @@ class GradioUI:
             text_input = gr.Textbox(
                 label="📝 识别结果 / 手动输入",
                 placeholder="点击上方按钮进行语音输入，或在这里手动输入...",
-                lines=2
+                lines=2,
+                elem_id="mt_text_input"
             )
 
             with gr.Row():
-                add_btn = gr.Button("➕ 添加到列表", variant="primary", size="lg")
+                add_btn = gr.Button("➕ 添加到列表", variant="primary", size="lg", elem_id="mt_add_btn")
 
             status = gr.Textbox(label="状态", interactive=False, show_label=False)
 
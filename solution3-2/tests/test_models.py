@@ -3,7 +3,9 @@
 """
 
 import pytest
-from src.models import Entry, EntryList
+from src.models import (
+    Entry, EntryList, StructuredMedicine, StructuredMedicineList, STRUCTURED_DATAFRAME_HEADERS
+)
 
 
 class TestEntry:
@@ -230,3 +232,149 @@ class TestEntryList:
 
         found = entry_list.get_by_id(999999)
         assert found is None
+
+    def test_id_index_follows_mutations(self):
+        """测试ID索引在添加、删除、清空后保持一致"""
+        entry1 = Entry(id=3001, text="药品1", timestamp="2025-01-01 10:00:00")
+        entry2 = Entry(id=3002, text="药品2", timestamp="2025-01-01 11:00:00")
+        entry_list = EntryList([entry1, entry2])
+
+        assert entry_list.delete_by_id(3001) is True
+        assert entry_list.get_by_id(3001) is None
+        assert entry_list.delete_by_id(3001) is False
+
+        added = entry_list.add("药品3")
+        assert entry_list.get_by_id(added.id) is added
+
+        entry_list.clear()
+        assert entry_list.get_by_id(3002) is None
+        assert entry_list.get_by_id(added.id) is None
+
+    def test_duplicate_ids_are_kept(self):
+        """测试ID重复的条目不会丢失，顺延为下一个空闲ID"""
+        entry_list = EntryList.from_dict_list([
+            {'id': 4001, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"},
+            {'id': 4001, 'text': "药品2", 'timestamp': "2025-01-01 10:00:00"},
+        ])
+
+        assert len(entry_list) == 2
+        assert entry_list.get_by_id(4001).text == "药品1"
+        assert entry_list.get_by_id(4002).text == "药品2"
+        assert entry_list.delete_by_id(4001) is True
+        assert [e.text for e in entry_list.entries] == ["药品2"]
+
+    def test_to_dataframe_after_mutations(self):
+        """测试增删改之后to_dataframe与重新构建的结果一致"""
+        entry_list = EntryList([
+            Entry(id=5001, text="药品1", timestamp="2025-01-01 10:00:00"),
+            Entry(id=5002, text="药品2", timestamp="2025-01-01 11:00:00"),
+        ])
+        entry_list.to_dataframe()
+
+        added = entry_list.add("药品3")
+        assert entry_list.to_dataframe()[0] == [3, "药品3", added.timestamp, added.id]
+
+        entry_list.update_by_id(5002, "药品2改")
+        entry_list.delete_by_id(5001)
+        expected = EntryList(entry_list.get_all()).to_dataframe()
+        assert entry_list.to_dataframe() == expected
+        assert [row[0] for row in expected] == [2, 1]
+
+        entry_list.clear()
+        assert entry_list.to_dataframe() == []
+
+
+class TestStructuredMedicine:
+    """测试StructuredMedicine类"""
+
+    def test_to_dict_round_trip(self):
+        """测试to_dict包含所有字段，可以无损还原"""
+        medicine = StructuredMedicine.create(
+            "阿莫西林一盒", drug_name="阿莫西林", quantity=1.0, unit="盒", confidence=0.9
+        )
+
+        data = medicine.to_dict()
+        assert data['drug_name'] == "阿莫西林"
+        assert data['confidence'] == 0.9
+        assert StructuredMedicine.from_dict(data) == medicine
+
+    def test_to_pandas_matches_to_dataframe(self):
+        """测试按列构建的DataFrame与to_dataframe内容一致"""
+        pytest.importorskip("pandas")
+        medicines = StructuredMedicineList([
+            StructuredMedicine(id=6001, original_text="阿莫西林一盒", drug_name="阿莫西林", quantity=1.0),
+            StructuredMedicine(id=6002, original_text="布洛芬两盒", drug_name="布洛芬", quantity=2.0),
+        ])
+
+        df = medicines.to_pandas()
+        assert list(df.columns) == STRUCTURED_DATAFRAME_HEADERS
+        assert df.astype(object).values.tolist() == medicines.to_dataframe()
+
+        # 筛选/排序结果按给定顺序从1编号
+        df = medicines.to_pandas(medicines.sort_by_drug_name(reverse=True))
+        assert df["#"].tolist() == [1, 2]
+        assert df["药名"].tolist() == ["阿莫西林", "布洛芬"]
+
+    def test_sort_by_expiry(self):
+        """测试按有效期排序：按日期数值比较，无有效期的排在最后"""
+        medicines = StructuredMedicineList([
+            StructuredMedicine(id=7001, original_text="a", drug_name="A", expiry_date="2027-06-15"),
+            StructuredMedicine(id=7002, original_text="b", drug_name="B", expiry_date=""),
+            StructuredMedicine(id=7003, original_text="c", drug_name="C", expiry_date="2027-06"),
+            StructuredMedicine(id=7004, original_text="d", drug_name="D", expiry_date="2026-12-01"),
+        ])
+        assert [m.drug_name for m in medicines.sort_by_expiry()] == ["D", "C", "A", "B"]
+
+        medicines.update_by_id(7002, expiry_date="2025-01")
+        assert medicines.sort_by_expiry()[0].drug_name == "B"
+
+    def test_non_string_expiry_date(self):
+        """测试有效期不是字符串（如LLM返回的数字2027）时仍能加载和排序"""
+        medicines = StructuredMedicineList.from_dict_list([
+            {'id': 7101, 'original_text': "a", 'drug_name': "A", 'expiry_date': 2027},
+            {'id': 7102, 'original_text': "b", 'drug_name': "B", 'expiry_date': "2026-05"},
+        ])
+        assert [m.drug_name for m in medicines.sort_by_expiry()] == ["B", "A"]
+
+    def test_filter_by_drug_name(self):
+        """测试按药名筛选不区分大小写，修改药名后仍能找到"""
+        medicines = StructuredMedicineList([
+            StructuredMedicine(id=8001, original_text="a", drug_name="Amoxicillin"),
+            StructuredMedicine(id=8002, original_text="b", drug_name="布洛芬"),
+        ])
+        assert [m.id for m in medicines.filter_by_drug_name("AMOX")] == [8001]
+        assert [m.id for m in medicines.filter_by_drug_name("洛芬")] == [8002]
+
+        medicines.update_by_id(8002, drug_name="Ibuprofen")
+        assert [m.id for m in medicines.filter_by_drug_name("ibu")] == [8002]
+
+    def test_null_drug_name(self):
+        """测试药名为null的已保存记录仍能加载和筛选"""
+        medicines = StructuredMedicineList.from_dict_list([
+            {'id': 8101, 'original_text': "a", 'drug_name': None},
+            {'id': 8102, 'original_text': "b", 'drug_name': "布洛芬"},
+        ])
+        assert len(medicines) == 2
+        assert [m.id for m in medicines.filter_by_drug_name("洛芬")] == [8102]
+        assert not medicines.get_by_id(8101).is_valid()
+
+    def test_filled_counts_after_mutations(self):
+        """测试增删改、修改ID和清空之后字段计数与逐条统计一致"""
+        medicines = StructuredMedicineList([
+            StructuredMedicine(id=9001, original_text="a", drug_name="A", brand_name="甲", expiry_date="2027-01"),
+            StructuredMedicine(id=9002, original_text="b", drug_name="B", specification="0.25g"),
+        ])
+        assert medicines.filled_counts() == {
+            'brand_name': 1, 'generic_name': 0, 'specification': 1, 'expiry_date': 1
+        }
+
+        medicines.add(StructuredMedicine(id=9003, original_text="c", drug_name="C", brand_name="丙"))
+        medicines.update_by_id(9001, brand_name="", generic_name="阿莫西林")
+        medicines.update_by_id(9002, id=9010, expiry_date="2026-05")
+        medicines.delete_by_id(9003)
+        assert medicines.filled_counts() == {
+            'brand_name': 0, 'generic_name': 1, 'specification': 1, 'expiry_date': 2
+        }
+
+        medicines.clear()
+        assert set(medicines.filled_counts().values()) == {0}
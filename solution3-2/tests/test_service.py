@@ -4,16 +4,13 @@
 
 import pytest
 from pathlib import Path
-from src.storage import JSONStorage
 from src.service import EntryService
 
 
 @pytest.fixture
 def temp_service(tmp_path):
-    """创建临时服务"""
-    file_path = tmp_path / "test_entries.json"
-    storage = JSONStorage(file_path)
-    return EntryService(storage)
+    """创建临时服务（数据文件写在临时目录中）"""
+    return EntryService(tmp_path)
 
 
 class TestEntryService:
@@ -113,7 +110,7 @@ class TestEntryService:
         temp_service.add_entry("药品Y")
 
         # 创建新服务实例（模拟重启应用）
-        new_service = EntryService(temp_service.storage)
+        new_service = EntryService(temp_service.data_dir)
 
         # 验证数据还在
         df_data = new_service.get_dataframe()
@@ -378,3 +375,48 @@ class TestEntryService:
         assert "✅" in status
         assert len(new_df) == 2
         assert new_df[0][1] == "修改后的药品2"
+
+    def test_save_dataframe_in_nested_bulk(self, temp_service):
+        """测试在bulk()中保存表格修改：报告成功，退出最外层bulk()时才写文件"""
+        temp_service.add_entry("药品1")
+
+        with temp_service.bulk():
+            temp_service.add_entry("药品2")
+            with temp_service.bulk():
+                status, new_df, count = temp_service.save_dataframe(temp_service.get_dataframe())
+            assert "✅" in status
+            assert len(new_df) == 2
+            # 尚未写入文件
+            assert len(EntryService(temp_service.data_dir).get_dataframe()) == 1
+
+        assert len(EntryService(temp_service.data_dir).get_dataframe()) == 2
+
+    def test_save_dataframe_missing_ids_and_timestamps(self, temp_service):
+        """测试缺少ID/时间的多行：ID各不相同且连续，时间取同一时刻"""
+        df_data = [
+            [3, "药品3", None, None],
+            [2, "药品2", "", ""],
+            [1, "药品1", "None", "None"],
+        ]
+
+        status, new_df, _ = temp_service.save_dataframe(df_data)
+
+        assert "✅" in status
+        ids = [row[3] for row in new_df]
+        assert sorted(ids) == list(range(min(ids), min(ids) + 3))
+        assert len({row[2] for row in new_df}) == 1
+
+    def test_save_dataframe_rows_to_entries(self, temp_service):
+        """测试每行按位置取出[序号, 文本, 时间, ID]：接受元组和多余的列，值原样保留"""
+        df_data = [
+            (2, " 药品2 ", "2025-01-01 11:00:00", 12346, "多余的列"),
+            [1, "药品1", "2025-01-01 10:00:00", "12345"],
+        ]
+
+        status, _, _ = temp_service.save_dataframe(df_data)
+
+        assert "✅" in status
+        assert temp_service.entry_list.to_dict_list() == [
+            {'id': 12345, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"},
+            {'id': 12346, 'text': "药品2", 'timestamp': "2025-01-01 11:00:00"},
+        ]
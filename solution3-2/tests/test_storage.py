@@ -56,6 +56,20 @@ class TestJSONStorage:
         loaded_data = temp_storage.load()
         assert loaded_data == []
 
+    def test_iter_load(self, temp_storage):
+        """测试逐条读取与整体加载结果一致"""
+        test_data = [
+            {'id': 1, 'text': "药品1", 'quantity': 1.5},
+            {'id': 2, 'text': "药品2", 'quantity': 2.0}
+        ]
+        temp_storage.save(test_data)
+
+        assert list(temp_storage.iter_load()) == test_data
+
+    def test_iter_load_nonexistent_file(self, temp_storage):
+        """测试逐条读取不存在的文件"""
+        assert list(temp_storage.iter_load()) == []
+
     def test_save_empty_list(self, temp_storage):
         """测试保存空列表"""
         success = temp_storage.save([])
@@ -0,0 +1,47 @@
+"""
+测试text_parser模块
+"""
+
+from src.models import Entry
+from src.text_parser import MedicineParserService
+
+
+class FakeLLM:
+    """实现批量接口的假LLM客户端，记录收到的文本"""
+
+    def __init__(self):
+        self.requested = []
+
+    def parse_medicine_batch(self, texts):
+        self.requested.extend(texts)
+        return [{'drug_name': t, 'confidence': 0.9} for t in texts]
+
+
+def _entries(texts):
+    return [Entry(id=i, text=t, timestamp="") for i, t in enumerate(texts)]
+
+
+def test_parse_batch_keeps_input_order(tmp_path):
+    """测试缓存命中与未命中混合时，结果顺序与输入顺序一致"""
+    llm = FakeLLM()
+    service = MedicineParserService(tmp_path, llm_client=llm)
+    service.parse_batch(_entries(["阿司匹林"]))
+
+    success, failed = service.parse_batch(_entries(["布洛芬", "阿司匹林", "头孢"]))
+
+    assert llm.requested == ["阿司匹林", "布洛芬", "头孢"]
+    assert [m.drug_name for m in success] == ["布洛芬", "阿司匹林", "头孢"]
+    assert failed == []
+
+
+def test_parse_batch_null_drug_name(tmp_path):
+    """测试模型返回的药名为null时记为解析失败，不抛出异常"""
+    class NullLLM:
+        def parse_medicine_batch(self, texts):
+            return [{'drug_name': None} for _ in texts]
+
+    service = MedicineParserService(tmp_path, llm_client=NullLLM())
+    success, failed = service.parse_batch(_entries(["看不清的录音"]))
+
+    assert success == []
+    assert failed == ["看不清的录音"]
@@ -6,7 +6,8 @@ Medicine Voice Collector V3 - Main Application Entry
 """
 
 import logging
-from src.storage import JSONStorage
+import threading
+from src.storage import JSONStorage, cleanup_old_files
 from src.service import EntryService
 from src.text_parser import MedicineParserService
 from src.ui import GradioUI
@@ -45,9 +46,14 @@ def main():
     logger.info(f"服务器地址: {config.SERVER_NAME}:{config.SERVER_PORT}")
     logger.info(f"数据目录: {config.DATA_DIR}")
 
-    # 清理过期数据
-    from src.storage import cleanup_old_files
-    cleanup_old_files(config.DATA_DIR, days=30)
+    # 清理过期数据（后台执行，不阻塞启动）
+    threading.Thread(
+        target=cleanup_old_files,
+        args=(config.DATA_DIR,),
+        kwargs={'days': 30},
+        name="cleanup-old-files",
+        daemon=True
+    ).start()
 
     # 初始化服务层
     logger.info("初始化服务层...")
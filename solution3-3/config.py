@@ -18,6 +18,12 @@ PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# 条目修改的延迟写盘时间（秒），期间的多次修改合并为一次写入
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+# 内存中最多缓存的用户数，超过后淘汰最久未访问的用户（淘汰前先写出未保存的修改）
+SESSION_CACHE_SIZE = 256
+
 # 数据文件路径 (将在运行时根据用户动态生成)
 # DATA_FILE = DATA_DIR / "voice_entries.json"
 # STRUCTURED_DATA_FILE = DATA_DIR / "structured_medicines.json"
@@ -49,6 +55,11 @@ CLAUDE_TEMPERATURE = 0.3  # 较低的温度以获得更稳定的结果
 
 # LLM批处理配置
 LLM_BATCH_SIZE = 10  # 每批处理的条目数量，可根据需要调整
+LLM_CONCURRENCY = 4  # 同时发出的批次请求数（受API速率限制约束）
+
+# LLM解析结果缓存（按文本哈希，所有用户共用）
+PARSER_CACHE_FILENAME = "llm_cache.json"
+PARSER_CACHE_MAX_ENTRIES = 10000  # 超过后淘汰最久未使用的条目
 
 # Debug logging for API Key
 if CLAUDE_API_KEY:
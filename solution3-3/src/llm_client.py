@@ -5,11 +5,39 @@ LLM客户端封装模块
 
 import logging
 import json
+import threading
 from typing import Dict, Any, Optional
 from anthropic import Anthropic
 
+# httpx随anthropic SDK一同安装；缺失时使用SDK默认的HTTP客户端
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 logger = logging.getLogger(__name__)
 
+# 进程内所有ClaudeClient共用一个HTTP连接池（keep-alive），重建客户端时不必重新建连和TLS握手
+_shared_http_client = None
+_shared_http_lock = threading.Lock()
+
+
+def _get_shared_http_client(pool_size: int):
+    """获取（首次调用时创建）共享的httpx客户端，httpx不可用时返回None"""
+    global _shared_http_client
+    if httpx is None:
+        return None
+    with _shared_http_lock:
+        if _shared_http_client is None:
+            # 连接池不小于parse_batch的并发数，避免并发请求排队等待连接
+            _shared_http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=max(pool_size, 32) * 2,
+                    max_keepalive_connections=max(pool_size, 32)
+                )
+            )
+        return _shared_http_client
+
 
 class LLMClient:
     """LLM客户端基类"""
@@ -23,8 +51,8 @@ class ClaudeClient(LLMClient):
     """Claude API客户端"""
 
     def __init__(self, api_key: str, model: str = "claude-3-5-sonnet-20241022",
-                 max_tokens: int = 1024, temperature: float = 0.3):
-        self.client = Anthropic(api_key=api_key)
+                 max_tokens: int = 1024, temperature: float = 0.3, pool_size: int = 32):
+        self.client = Anthropic(api_key=api_key, http_client=_get_shared_http_client(pool_size))
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
@@ -211,7 +239,8 @@ class ClaudeClient(LLMClient):
             "unit": "",
             "specification": "",
             "package_count": "",
-            "expiry_date": ""
+            "expiry_date": "",
+            "confidence": 0.0
         }
 
 
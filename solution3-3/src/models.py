@@ -5,7 +5,15 @@
 
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# 结构化数据表格的列（与StructuredMedicine.to_dataframe_row的顺序一致）
+STRUCTURED_DATAFRAME_HEADERS = ["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"]
+# 除序号外每一列对应的StructuredMedicine字段
+_STRUCTURED_DATAFRAME_FIELDS = [
+    "drug_name", "brand_name", "generic_name", "quantity", "unit",
+    "specification", "package_count", "expiry_date", "original_text", "timestamp"
+]
 
 
 @dataclass
@@ -42,12 +50,46 @@ class Entry:
         """转换为Dataframe行格式 [序号, 文本, 时间, ID]"""
         return [number, self.text, self.timestamp, self.id]
 
+    @property
+    def display_text(self) -> str:
+        """下拉框显示用的截断文本（按text缓存，text修改后自动重算）"""
+        cached = self.__dict__.get('_display')
+        if cached is None or cached[0] is not self.text:
+            text = self.text
+            cached = (text, text[:40] + ('...' if len(text) > 40 else ''))
+            self.__dict__['_display'] = cached
+        return cached[1]
+
 
 class EntryList:
     """条目列表管理类"""
 
     def __init__(self, entries: List[Entry] = None):
-        self.entries = entries or []
+        self._entries = entries or []
+        # to_dataframe结果缓存（None表示需要重建）
+        self._df_cache: Optional[List[List[Any]]] = None
+        # id -> 条目索引（重复id时指向第一个，None表示需要重建）
+        self._by_id: Optional[Dict[int, Entry]] = None
+
+    @property
+    def entries(self) -> List[Entry]:
+        """条目列表（按录入顺序）"""
+        return self._entries
+
+    @entries.setter
+    def entries(self, value: List[Entry]) -> None:
+        self._entries = value
+        self._df_cache = None
+        self._by_id = None
+
+    def _index(self) -> Dict[int, Entry]:
+        """获取id索引（按需重建）"""
+        if self._by_id is None:
+            index: Dict[int, Entry] = {}
+            for entry in self._entries:
+                index.setdefault(entry.id, entry)
+            self._by_id = index
+        return self._by_id
 
     def add(self, text: str) -> Entry:
         """添加新条目"""
@@ -55,20 +97,50 @@ class EntryList:
             raise ValueError("条目内容不能为空")
 
         entry = Entry.create(text)
-        self.entries.append(entry)
+        self._append(entry)
         return entry
 
+    def add_many(self, texts: List[str]) -> List[Entry]:
+        """
+        批量添加条目（同一毫秒内创建的条目ID按顺序递增，且大于已有条目的ID，避免重复）
+
+        Raises:
+            ValueError: 存在空内容（此时不做任何修改）
+        """
+        if not all(text and text.strip() for text in texts):
+            raise ValueError("条目内容不能为空")
+
+        entries = [Entry.create(text) for text in texts]
+        if entries:
+            # 连续两批在同一毫秒附近创建时，后一批从已有最大ID之后开始编号
+            next_id = max([entries[0].id] + [entry.id + 1 for entry in self._entries])
+            for i, entry in enumerate(entries):
+                entry.id = next_id + i
+                self._append(entry)
+        return entries
+
+    def _append(self, entry: Entry) -> None:
+        """追加条目并同步更新索引和dataframe缓存"""
+        self._entries.append(entry)
+        if self._by_id is not None:
+            self._by_id.setdefault(entry.id, entry)
+        # 新条目序号最大、排在最上面，已有行的序号不变，只需在表头插入一行
+        if self._df_cache is not None:
+            self._df_cache.insert(0, entry.to_dataframe_row(len(self._entries)))
+
     def get_all(self) -> List[Entry]:
         """获取所有条目"""
-        return self.entries.copy()
+        return self._entries.copy()
 
     def get_reversed(self) -> List[Entry]:
         """获取倒序的条目列表（最新的在前）"""
-        return list(reversed(self.entries))
+        return list(reversed(self._entries))
 
     def clear(self) -> None:
         """清空所有条目"""
-        self.entries.clear()
+        self._entries.clear()
+        self._df_cache = None
+        self._by_id = {}
 
     def delete_by_id(self, entry_id: int) -> bool:
         """
@@ -80,9 +152,13 @@ class EntryList:
         Returns:
             删除成功返回True，未找到返回False
         """
-        original_length = len(self.entries)
-        self.entries = [e for e in self.entries if e.id != entry_id]
-        return len(self.entries) < original_length
+        index = self._index()
+        if entry_id not in index:
+            return False
+        self._entries = [e for e in self._entries if e.id != entry_id]
+        self._df_cache = None
+        del index[entry_id]
+        return True
 
     def update_by_id(self, entry_id: int, new_text: str) -> bool:
         """
@@ -98,11 +174,12 @@ class EntryList:
         if not new_text or not new_text.strip():
             raise ValueError("条目内容不能为空")
 
-        for entry in self.entries:
-            if entry.id == entry_id:
-                entry.text = new_text.strip()
-                return True
-        return False
+        entry = self._index().get(entry_id)
+        if entry is None:
+            return False
+        entry.text = new_text.strip()
+        self._df_cache = None
+        return True
 
     def get_by_id(self, entry_id: int) -> Entry:
         """
@@ -114,31 +191,29 @@ class EntryList:
         Returns:
             找到返回Entry对象，未找到返回None
         """
-        for entry in self.entries:
-            if entry.id == entry_id:
-                return entry
-        return None
+        return self._index().get(entry_id)
 
     def count(self) -> int:
         """获取条目数量"""
-        return len(self.entries)
+        return len(self._entries)
 
     def to_dict_list(self) -> List[Dict[str, Any]]:
         """转换为字典列表"""
-        return [entry.to_dict() for entry in self.entries]
+        return [entry.to_dict() for entry in self._entries]
 
     def to_dataframe(self) -> List[List[Any]]:
         """
         转换为Dataframe格式（倒序，最新的在上面）
-        返回: [[序号, 文本, 时间, ID], ...]
+        返回: [[序号, 文本, 时间, ID], ...]（行列表与缓存共享，调用方不应修改）
         """
-        reversed_entries = self.get_reversed()
-        total = len(self.entries)
-
-        return [
-            entry.to_dataframe_row(total - i)
-            for i, entry in enumerate(reversed_entries)
-        ]
+        if self._df_cache is None:
+            reversed_entries = self.get_reversed()
+            total = len(self._entries)
+            self._df_cache = [
+                entry.to_dataframe_row(total - i)
+                for i, entry in enumerate(reversed_entries)
+            ]
+        return list(self._df_cache)
 
     @classmethod
     def from_dict_list(cls, data: List[Dict[str, Any]]) -> "EntryList":
@@ -148,11 +223,11 @@ class EntryList:
 
     def __len__(self) -> int:
         """支持len()函数"""
-        return len(self.entries)
+        return len(self._entries)
 
     def __bool__(self) -> bool:
         """支持布尔判断"""
-        return bool(self.entries)
+        return bool(self._entries)
 
 
 # ============================================================================
@@ -231,6 +306,18 @@ class StructuredMedicineList:
             raise ValueError("药品信息无效：缺少药名")
         self.medicines.append(medicine)
 
+    def replace_all(self, medicines: List[StructuredMedicine]) -> None:
+        """
+        整体替换所有药品（先全部校验，任一无效则不做修改）
+
+        Raises:
+            ValueError: 存在缺少药名的药品
+        """
+        medicines = list(medicines)
+        if not all(m.is_valid() for m in medicines):
+            raise ValueError("药品信息无效：缺少药名")
+        self.medicines = medicines
+
     def get_all(self) -> List[StructuredMedicine]:
         """获取所有结构化药品"""
         return self.medicines.copy()
@@ -291,6 +378,26 @@ class StructuredMedicineList:
             reverse=reverse
         )
 
+    def query(self, drug_name: str = "", sort_by: str = None, reverse: bool = False) -> List[StructuredMedicine]:
+        """
+        按药名筛选后排序（只遍历一次列表，结果就地排序）
+
+        Args:
+            drug_name: 药名关键词（不区分大小写），为空表示不筛选
+            sort_by: 排序字段 "drug_name" / "expiry_date"，为None表示保持原顺序
+            reverse: 是否降序
+        """
+        if drug_name:
+            keyword = drug_name.lower()
+            result = [m for m in self.medicines if keyword in m.drug_name.lower()]
+        else:
+            result = self.medicines.copy()
+        if sort_by == "drug_name":
+            result.sort(key=lambda m: m.drug_name, reverse=reverse)
+        elif sort_by == "expiry_date":
+            result.sort(key=lambda m: m.expiry_date if m.expiry_date else "9999-99-99", reverse=reverse)
+        return result
+
     def count(self) -> int:
         """获取数量"""
         return len(self.medicines)
@@ -312,6 +419,19 @@ class StructuredMedicineList:
             for i, medicine in enumerate(reversed_medicines)
         ]
 
+    def to_pandas(self):
+        """
+        转换为pandas DataFrame（与to_dataframe的行和顺序相同，按列构建，不经过逐行的列表）
+        pandas在这里才导入，只使用列表接口时不需要安装
+        """
+        import pandas as pd
+
+        reversed_medicines = self.get_reversed()
+        columns = {STRUCTURED_DATAFRAME_HEADERS[0]: range(len(reversed_medicines), 0, -1)}
+        for header, field in zip(STRUCTURED_DATAFRAME_HEADERS[1:], _STRUCTURED_DATAFRAME_FIELDS):
+            columns[header] = [getattr(m, field) for m in reversed_medicines]
+        return pd.DataFrame(columns, columns=STRUCTURED_DATAFRAME_HEADERS)
+
     @classmethod
     def from_dict_list(cls, data: List[Dict[str, Any]]) -> "StructuredMedicineList":
         """从字典列表创建StructuredMedicineList实例"""
@@ -0,0 +1,131 @@
+"""
+LLM解析结果缓存模块
+按文本哈希缓存解析结果，所有用户共用；超过容量时淘汰最久未使用的条目
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+# orjson为可选依赖，未安装时回退到json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class ParserCache:
+    """LLM解析结果缓存（LRU）"""
+
+    def __init__(self, file_path: Path, max_entries: int = 10000):
+        """
+        初始化缓存
+
+        Args:
+            file_path: 缓存持久化文件路径
+            max_entries: 最多缓存的条目数
+        """
+        self.file_path = file_path
+        self.max_entries = max_entries
+        # key -> 解析结果，按最近使用排序（末尾最新）
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # parse_batch在线程池中并发读写
+        self._lock = threading.Lock()
+        # 多个线程同时保存时依次写入，不共用同一个临时文件
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        """计算文本的缓存键"""
+        return hashlib.blake2b(text.strip().encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            命中返回解析结果字典的副本，未命中返回None
+        """
+        key = self._key(text)
+        with self._lock:
+            result = self._items.get(key)
+            if result is None:
+                return None
+            self._items.move_to_end(key)
+        logger.info(f"解析缓存命中: {text[:50]}")
+        return dict(result)
+
+    def put(self, text: str, result: Dict[str, Any]) -> None:
+        """写入缓存（只修改内存，调用save()持久化）"""
+        key = self._key(text)
+        with self._lock:
+            self._items[key] = dict(result)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+            self._dirty = True
+
+    def save(self) -> bool:
+        """将缓存持久化到文件（无变化时跳过）"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            items = dict(self._items)
+            self._dirty = False
+
+        try:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            if orjson is not None:
+                content = orjson.dumps(items)
+            else:
+                content = json.dumps(items, ensure_ascii=False).encode('utf-8')
+            # 先写临时文件再原子替换，写到一半崩溃也不会损坏原缓存
+            tmp_path = self.file_path.with_name(self.file_path.name + '.tmp')
+            with self._save_lock:
+                try:
+                    with open(tmp_path, 'wb') as f:
+                        f.write(content)
+                    os.replace(tmp_path, self.file_path)
+                except OSError:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+            logger.info(f"保存解析缓存: {self.file_path}, {len(items)} 条")
+            return True
+        except (IOError, TypeError) as e:
+            logger.error(f"保存解析缓存失败: {self.file_path}, 错误: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def _load(self) -> None:
+        """从文件加载缓存（文件中按最近使用顺序保存）"""
+        if not self.file_path.exists():
+            return
+        try:
+            with open(self.file_path, 'rb') as f:
+                content = f.read()
+            data = orjson.loads(content) if orjson is not None else json.loads(content)
+        except (ValueError, IOError) as e:
+            logger.error(f"加载解析缓存失败: {self.file_path}, 错误: {e}")
+            return
+
+        if isinstance(data, dict):
+            self._items = OrderedDict(data)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        logger.info(f"加载解析缓存: {self.file_path}, {len(self._items)} 条")
+
+    def __len__(self) -> int:
+        return len(self._items)
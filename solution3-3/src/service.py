@@ -3,36 +3,98 @@
 处理条目管理、导出等业务逻辑
 """
 
+import atexit
+import functools
+import inspect
 import logging
+import threading
+import time
+import weakref
 from datetime import datetime
 from pathlib import Path
-from typing import Tuple, List, Any, Dict
+from typing import Tuple, List, Any, Dict, Optional
 
-from .models import EntryList
-from .storage import JSONStorage
+from .models import Entry, EntryList
+from .storage import JournaledStorage
+from .session_cache import LRUSessionCache
+import config
+
+# pandas只用于处理界面传入的DataFrame和CSV导入；未安装时按普通列表处理
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
 
 logger = logging.getLogger(__name__)
 
+# 进程退出时写出所有存活实例未保存的修改；atexit只注册一次，实例被回收后自动移出
+_live_services = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_services() -> None:
+    """进程退出时调用每个EntryService的flush_all()"""
+    for service in list(_live_services):
+        try:
+            service.flush_all()
+        except Exception as e:
+            logger.error(f"退出前保存失败: {e}", exc_info=True)
+
+
+def _normalize_uid(method):
+    """
+    公开方法装饰器：在入口处把user_id规范化一次（去空白，空值为"default"），
+    内部辅助方法直接使用规范化后的user_id，不再重复处理
+    """
+    signature = inspect.signature(method)
+    if 'user_id' not in signature.parameters:
+        raise TypeError(f"{method.__qualname__} 没有user_id参数")
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # 按签名绑定参数，user_id无论按位置、关键字还是默认值传入都能取到
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        user_id = bound.arguments['user_id']
+        bound.arguments['user_id'] = user_id.strip() if user_id else "default"
+        return method(*bound.args, **bound.kwargs)
+
+    return wrapper
+
 
 class EntryService:
     """条目管理服务类"""
 
-    def __init__(self, data_dir: Path):
+    def __init__(self, data_dir: Path, save_delay: float = None):
+        """
+        Args:
+            data_dir: 数据目录
+            save_delay: 修改后延迟写盘的秒数（默认config.SAVE_DEBOUNCE_SECONDS）
+        """
         self.data_dir = data_dir
-        # 内存缓存：user_id -> EntryList
-        self.sessions: Dict[str, EntryList] = {}
+        # 内存缓存：user_id -> EntryList（LRU，淘汰前写出该用户未保存的修改）
+        self.sessions: Dict[str, EntryList] = LRUSessionCache(config.SESSION_CACHE_SIZE, on_evict=self.flush)
+
+        # 延迟写盘：user_id -> 待追加的日志操作（None表示需要整体保存）
+        self.save_delay = config.SAVE_DEBOUNCE_SECONDS if save_delay is None else save_delay
+        self._pending: Dict[str, Optional[List[Dict[str, Any]]]] = {}
+        self._pending_lock = threading.Lock()
+        # 保证同一时间只有一个线程在写文件，日志顺序与修改顺序一致
+        self._flush_lock = threading.RLock()
+        self._save_event = threading.Event()
+        self._save_thread = None
+        # 多个请求线程同时修改时只启动一个后台保存线程
+        self._save_thread_lock = threading.Lock()
+        _live_services.add(self)
         logger.info(f"EntryService 初始化, 数据目录: {data_dir}")
 
-    def _get_storage(self, user_id: str) -> JSONStorage:
-        """获取指定用户的存储对象"""
-        user_id = user_id.strip() if user_id else "default"
+    def _get_storage(self, user_id: str) -> JournaledStorage:
+        """获取指定用户的存储对象（user_id需已规范化）"""
         file_path = self.data_dir / f"voice_entries_{user_id}.json"
-        return JSONStorage(file_path)
+        return JournaledStorage(file_path)
 
     def _get_entry_list(self, user_id: str) -> EntryList:
-        """获取指定用户的条目列表（带缓存）"""
-        user_id = user_id.strip() if user_id else "default"
-        
+        """获取指定用户的条目列表（带缓存，user_id需已规范化）"""
         # 如果缓存中没有，则加载
         if user_id not in self.sessions:
             storage = self._get_storage(user_id)
@@ -43,23 +105,94 @@ class EntryService:
         return self.sessions[user_id]
 
     def _save_user_data(self, user_id: str) -> bool:
-        """保存指定用户的数据"""
-        user_id = user_id.strip() if user_id else "default"
+        """立即整体保存指定用户的数据（同时丢弃该用户尚未写入的日志操作）"""
         if user_id not in self.sessions:
             return False
-            
-        entry_list = self.sessions[user_id]
-        storage = self._get_storage(user_id)
-        
-        data = entry_list.to_dict_list()
-        result = storage.save(data)
-        
+
+        with self._flush_lock:
+            with self._pending_lock:
+                self._pending.pop(user_id, None)
+
+            entry_list = self.sessions[user_id]
+            storage = self._get_storage(user_id)
+
+            data = entry_list.to_dict_list()
+            result = storage.save(data)
+
         if result:
             logger.info(f"保存用户数据成功: {user_id}, {len(data)} 条")
         else:
             logger.error(f"保存用户数据失败: {user_id}")
         return result
 
+    def _append_ops(self, user_id: str, ops: List[Dict[str, Any]]) -> bool:
+        """
+        以追加日志的方式持久化修改；首次保存、追加失败或日志过大时整体保存
+
+        Args:
+            user_id: 用户ID
+            ops: 日志操作记录列表，格式见JournaledStorage.append
+        """
+        storage = self._get_storage(user_id)
+        if not storage.append_many(ops) or storage.needs_compaction():
+            return self._save_user_data(user_id)
+        return True
+
+    def _mark_dirty(self, user_id: str, ops: List[Dict[str, Any]] = None) -> None:
+        """
+        记录一次修改，由后台线程在save_delay秒后统一写盘
+
+        Args:
+            user_id: 用户ID
+            ops: 可以追加到日志的操作列表（按顺序）；为None时整体保存
+        """
+        # 新用户立即写出快照，保证数据文件存在
+        if not self._get_storage(user_id).exists():
+            self._save_user_data(user_id)
+            return
+
+        with self._pending_lock:
+            if ops is None or (user_id in self._pending and self._pending[user_id] is None):
+                self._pending[user_id] = None
+            else:
+                self._pending.setdefault(user_id, []).extend(ops)
+        self._save_event.set()
+        with self._save_thread_lock:
+            if self._save_thread is None or not self._save_thread.is_alive():
+                self._save_thread = threading.Thread(
+                    target=self._save_worker, name="entry-save", daemon=True
+                )
+                self._save_thread.start()
+
+    def _save_worker(self) -> None:
+        """后台保存线程：等待修改，延迟一段时间以合并后续修改后写盘"""
+        while True:
+            self._save_event.wait()
+            time.sleep(self.save_delay)
+            self.flush_all()
+
+    @_normalize_uid
+    def flush(self, user_id: str) -> bool:
+        """立即写出指定用户尚未保存的修改"""
+        with self._flush_lock:
+            with self._pending_lock:
+                if user_id not in self._pending:
+                    return True
+                ops = self._pending.pop(user_id)
+            if ops is None:
+                return self._save_user_data(user_id)
+            return self._append_ops(user_id, ops)
+
+    def flush_all(self) -> bool:
+        """立即写出所有用户尚未保存的修改（进程退出时自动调用）"""
+        with self._flush_lock:
+            with self._pending_lock:
+                user_ids = list(self._pending)
+                self._save_event.clear()
+            results = [self.flush(user_id) for user_id in user_ids]
+        return all(results)
+
+    @_normalize_uid
     def add_entry(self, text: str, user_id: str) -> Tuple[str, List[List[Any]], str, str]:
         """
         添加新条目
@@ -71,20 +204,47 @@ class EntryService:
         Returns:
             (状态消息, dataframe数据, 统计信息, 清空的文本框)
         """
+        entry_list = self._get_entry_list(user_id)
         if not text or not text.strip():
             logger.warning("添加失败: 空内容")
-            return "❌ 请输入内容", self.get_dataframe(user_id), self.get_count(user_id), ""
+            return self._result(entry_list, "❌ 请输入内容", "")
 
         try:
-            entry_list = self._get_entry_list(user_id)
-            entry_list.add(text)
-            self._save_user_data(user_id)
+            entry = entry_list.add(text)
+            self._mark_dirty(user_id, [{'op': 'add', 'entry': entry.to_dict()}])
             logger.info(f"用户 {user_id} 添加条目: {text[:50]}...")
-            return "✅ 已添加", self.get_dataframe(user_id), self.get_count(user_id), ""
+            return self._result(entry_list, "✅ 已添加", "")
         except Exception as e:
             logger.error(f"添加条目失败: {e}", exc_info=True)
-            return f"❌ 添加失败: {e}", self.get_dataframe(user_id), self.get_count(user_id), text
+            return self._result(entry_list, f"❌ 添加失败: {e}", text)
+
+    @_normalize_uid
+    def add_entries(self, texts: List[str], user_id: str) -> Tuple[str, List[List[Any]], str]:
+        """
+        批量添加条目（连续语音模式下合并一段时间内识别的多条文本，只返回一次表格）
 
+        Args:
+            texts: 条目文本列表（空内容会被忽略）
+            user_id: 用户ID
+
+        Returns:
+            (状态消息, dataframe数据, 统计信息)
+        """
+        entry_list = self._get_entry_list(user_id)
+        texts = [text for text in texts if text and text.strip()]
+        if not texts:
+            return self._result(entry_list, "❌ 请输入内容")
+
+        try:
+            entries = entry_list.add_many(texts)
+            self._mark_dirty(user_id, [{'op': 'add', 'entry': entry.to_dict()} for entry in entries])
+            logger.info(f"用户 {user_id} 批量添加条目: {len(entries)} 条")
+            return self._result(entry_list, f"✅ 已添加 {len(entries)} 条")
+        except Exception as e:
+            logger.error(f"批量添加条目失败: {e}", exc_info=True)
+            return self._result(entry_list, f"❌ 添加失败: {e}")
+
+    @_normalize_uid
     def clear_all(self, user_id: str) -> Tuple[str, List[List[Any]], str]:
         """
         清空所有条目
@@ -98,10 +258,11 @@ class EntryService:
         entry_list = self._get_entry_list(user_id)
         count = entry_list.count()
         entry_list.clear()
-        self._save_user_data(user_id)
+        self._mark_dirty(user_id)
         logger.warning(f"用户 {user_id} 清空所有数据: {count} 条")
-        return "✅ 已清空所有条目", [], self.get_count(user_id)
+        return "✅ 已清空所有条目", [], self._format_count(entry_list)
 
+    @_normalize_uid
     def delete_entry(self, entry_id: int, user_id: str) -> Tuple[str, List[List[Any]], str]:
         """
         删除指定ID的条目
@@ -113,20 +274,21 @@ class EntryService:
         Returns:
             (状态消息, dataframe数据, 统计信息)
         """
+        entry_list = self._get_entry_list(user_id)
         if not entry_id:
-            return "❌ 请先选择条目", self.get_dataframe(user_id), self.get_count(user_id)
+            return self._result(entry_list, "❌ 请先选择条目")
 
         try:
             entry_id = int(entry_id)
-            entry_list = self._get_entry_list(user_id)
             if entry_list.delete_by_id(entry_id):
-                self._save_user_data(user_id)
-                return "✅ 已删除", self.get_dataframe(user_id), self.get_count(user_id)
+                self._mark_dirty(user_id, [{'op': 'delete', 'id': entry_id}])
+                return self._result(entry_list, "✅ 已删除")
             else:
-                return "❌ 未找到该条目", self.get_dataframe(user_id), self.get_count(user_id)
+                return self._result(entry_list, "❌ 未找到该条目")
         except (ValueError, TypeError) as e:
-            return f"❌ 删除失败: {e}", self.get_dataframe(user_id), self.get_count(user_id)
+            return self._result(entry_list, f"❌ 删除失败: {e}")
 
+    @_normalize_uid
     def update_entry(self, entry_id: int, new_text: str, user_id: str) -> Tuple[str, List[List[Any]], str, str]:
         """
         更新指定ID的条目
@@ -139,23 +301,24 @@ class EntryService:
         Returns:
             (状态消息, dataframe数据, 统计信息, 新的entry_id用于刷新选择)
         """
+        entry_list = self._get_entry_list(user_id)
         if not entry_id:
-            return "❌ 请先选择条目", self.get_dataframe(user_id), self.get_count(user_id), None
+            return self._result(entry_list, "❌ 请先选择条目", None)
 
         if not new_text or not new_text.strip():
-            return "❌ 内容不能为空", self.get_dataframe(user_id), self.get_count(user_id), entry_id
+            return self._result(entry_list, "❌ 内容不能为空", entry_id)
 
         try:
             entry_id = int(entry_id)
-            entry_list = self._get_entry_list(user_id)
             if entry_list.update_by_id(entry_id, new_text):
-                self._save_user_data(user_id)
-                return "✅ 已更新", self.get_dataframe(user_id), self.get_count(user_id), None
+                self._mark_dirty(user_id, [{'op': 'update', 'id': entry_id, 'fields': {'text': new_text.strip()}}])
+                return self._result(entry_list, "✅ 已更新", None)
             else:
-                return "❌ 未找到该条目", self.get_dataframe(user_id), self.get_count(user_id), None
+                return self._result(entry_list, "❌ 未找到该条目", None)
         except ValueError as e:
-            return f"❌ 更新失败: {e}", self.get_dataframe(user_id), self.get_count(user_id), entry_id
+            return self._result(entry_list, f"❌ 更新失败: {e}", entry_id)
 
+    @_normalize_uid
     def get_entry_choices(self, user_id: str) -> List[Tuple[str, str]]:
         """
         获取条目选择列表（用于下拉框）
@@ -166,20 +329,14 @@ class EntryService:
         Returns:
             [(显示文本, ID), ...] 倒序排列
         """
-        entry_list = self._get_entry_list(user_id)
-        if not entry_list:
-            return []
-
-        choices = []
-        for i, entry in enumerate(entry_list.get_reversed()):
-            num = len(entry_list) - i
-            # 截断长文本
-            text = entry.text[:40] + ('...' if len(entry.text) > 40 else '')
-            display = f"#{num} - {text}"
-            choices.append((display, str(entry.id)))
-
-        return choices
-
+        entries = self._get_entry_list(user_id).entries
+        total = len(entries)
+        return [
+            (f"#{total - i} - {entry.display_text}", str(entry.id))
+            for i, entry in enumerate(reversed(entries))
+        ]
+
+    @_normalize_uid
     def get_entry_text(self, entry_id: int, user_id: str) -> str:
         """
         根据ID获取条目文本
@@ -202,6 +359,7 @@ class EntryService:
         except (ValueError, TypeError):
             return ""
 
+    @_normalize_uid
     def save_dataframe(self, df_data: List[List[Any]], user_id: str) -> Tuple[str, List[List[Any]], str]:
         """
         保存从Dataframe编辑的数据
@@ -213,13 +371,13 @@ class EntryService:
         Returns:
             (状态消息, dataframe数据, 统计信息)
         """
-        # 处理pandas DataFrame
-        try:
-            import pandas as pd
-            if isinstance(df_data, pd.DataFrame):
-                df_data = df_data.values.tolist()
-        except ImportError:
-            pass
+        # 处理pandas DataFrame：整列向量化清洗，不逐行处理
+        new_entries = None
+        if pd is not None and isinstance(df_data, pd.DataFrame):
+            if df_data.empty:
+                df_data = []
+            else:
+                new_entries = self._records_from_dataframe(df_data)
 
         entry_list = self._get_entry_list(user_id)
 
@@ -227,41 +385,12 @@ class EntryService:
         if df_data is None or (isinstance(df_data, list) and len(df_data) == 0):
             entry_list.clear()
             self._save_user_data(user_id)
-            return "✅ 已清空", [], self.get_count(user_id)
+            return "✅ 已清空", [], self._format_count(entry_list)
 
         try:
             # 将Dataframe数据转换回Entry对象
-            new_entries = []
-            for row in df_data:
-                if not row or not isinstance(row, (list, tuple)) or len(row) < 4:
-                    continue
-
-                text = row[1]
-                if text is None or text == '' or str(text).strip() == '' or str(text).strip().lower() == 'none':
-                    continue
-
-                text = str(text).strip()
-
-                try:
-                    entry_id = row[3]
-                    if entry_id is None or str(entry_id).strip() == '' or str(entry_id).strip().lower() == 'none':
-                        entry_id = int(datetime.now().timestamp() * 1000)
-                    else:
-                        entry_id = int(float(entry_id))
-                except (ValueError, TypeError):
-                    entry_id = int(datetime.now().timestamp() * 1000)
-
-                timestamp = row[2]
-                if timestamp is None or str(timestamp).strip() == '' or str(timestamp).strip().lower() == 'none':
-                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    timestamp = str(timestamp).strip()
-
-                new_entries.append({
-                    'id': entry_id,
-                    'text': text,
-                    'timestamp': timestamp
-                })
+            if new_entries is None:
+                new_entries = self._records_from_rows(df_data)
 
             new_entries.reverse()
             
@@ -278,26 +407,109 @@ class EntryService:
             if save_result:
                 timestamp = datetime.now().strftime('%H:%M:%S')
                 logger.info(f"保存表格修改: {len(new_entries)} 条数据")
-                return f"✅ 已保存 {len(new_entries)} 条数据到文件 ({timestamp})", self.get_dataframe(user_id), self.get_count(user_id)
+                return self._result(entry_list, f"✅ 已保存 {len(new_entries)} 条数据到文件 ({timestamp})")
             else:
                 logger.error("保存表格修改失败")
-                return "❌ 保存失败", self.get_dataframe(user_id), self.get_count(user_id)
+                return self._result(entry_list, "❌ 保存失败")
 
         except Exception as e:
             logger.error(f"保存表格修改失败: {e}", exc_info=True)
-            return f"❌ 保存失败: {e}", self.get_dataframe(user_id), self.get_count(user_id)
+            return self._result(entry_list, f"❌ 保存失败: {e}")
+
+    @staticmethod
+    def _records_from_rows(rows: List[List[Any]]) -> List[Dict[str, Any]]:
+        """将Dataframe行列表 [序号, 文本, 时间, ID] 逐行清洗为条目字典列表（顺序不变）"""
+        now = datetime.now()
+        now_ms = int(now.timestamp() * 1000)
+        now_str = now.strftime('%Y-%m-%d %H:%M:%S')
+
+        new_entries = []
+        for i, row in enumerate(rows):
+            if not row or not isinstance(row, (list, tuple)) or len(row) < 4:
+                continue
+
+            text = row[1]
+            if text is None or text == '' or str(text).strip() == '' or str(text).strip().lower() == 'none':
+                continue
+
+            text = str(text).strip()
+
+            try:
+                entry_id = row[3]
+                if entry_id is None or str(entry_id).strip() == '' or str(entry_id).strip().lower() == 'none':
+                    entry_id = now_ms + i
+                else:
+                    entry_id = int(float(entry_id))
+            except (ValueError, TypeError):
+                # 缺失ID按行号在当前时间戳上递增，保证互不相同
+                entry_id = now_ms + i
+
+            timestamp = row[2]
+            if timestamp is None or str(timestamp).strip() == '' or str(timestamp).strip().lower() == 'none':
+                timestamp = now_str
+            else:
+                timestamp = str(timestamp).strip()
+
+            new_entries.append({
+                'id': entry_id,
+                'text': text,
+                'timestamp': timestamp
+            })
+        return new_entries
+
+    @staticmethod
+    def _records_from_dataframe(df) -> List[Dict[str, Any]]:
+        """将pandas DataFrame整列清洗为条目字典列表（顺序不变），规则与_records_from_rows一致"""
+        if df.shape[1] < 4:
+            return []
 
+        def clean(column):
+            values = column.fillna('').astype(str).str.strip()
+            return values, values.ne('') & values.str.lower().ne('none')
+
+        now = datetime.now()
+        texts, mask = clean(df.iloc[:, 1])
+        timestamps, has_timestamp = clean(df.iloc[:, 2])
+        timestamps = timestamps.where(has_timestamp, now.strftime('%Y-%m-%d %H:%M:%S'))
+
+        ids = pd.to_numeric(df.iloc[:, 3], errors='coerce').replace([float('inf'), float('-inf')], float('nan'))
+        # 缺失ID按行号在当前时间戳上递增，保证互不相同
+        fallback_ids = pd.Series(range(len(df)), index=df.index) + int(now.timestamp() * 1000)
+        ids = ids.where(ids.notna(), fallback_ids).astype('int64')
+
+        return [
+            {'id': entry_id, 'text': text, 'timestamp': timestamp}
+            for entry_id, text, timestamp in zip(
+                ids[mask].tolist(), texts[mask].tolist(), timestamps[mask].tolist()
+            )
+        ]
+
+    @_normalize_uid
+    def get_entries(self, user_id: str) -> List[Entry]:
+        """获取指定用户的所有条目（按录入顺序）"""
+        return self._get_entry_list(user_id).get_all()
+
+    @_normalize_uid
     def get_dataframe(self, user_id: str) -> List[List[Any]]:
         """获取Dataframe格式数据"""
         entry_list = self._get_entry_list(user_id)
         return entry_list.to_dataframe()
 
+    @_normalize_uid
     def get_count(self, user_id: str) -> str:
         """获取统计信息"""
-        entry_list = self._get_entry_list(user_id)
-        count = entry_list.count()
-        return f"📊 已收集: **{count}** 条"
+        return self._format_count(self._get_entry_list(user_id))
+
+    @staticmethod
+    def _format_count(entry_list: EntryList) -> str:
+        """格式化统计信息"""
+        return f"📊 已收集: **{entry_list.count()}** 条"
 
+    def _result(self, entry_list: EntryList, message: str, *extra) -> tuple:
+        """组装界面返回值 (状态消息, dataframe数据, 统计信息, *extra)，条目列表只查找一次"""
+        return (message, entry_list.to_dataframe(), self._format_count(entry_list), *extra)
+
+    @_normalize_uid
     def refresh(self, user_id: str) -> Tuple[List[List[Any]], str]:
         """
         刷新数据（重新加载）
@@ -309,11 +521,14 @@ class EntryService:
             (dataframe数据, 统计信息)
         """
         logger.info(f"刷新数据: {user_id}")
-        # 强制重新加载
+        # 先写出未保存的修改，再强制重新加载
+        self.flush(user_id)
         if user_id in self.sessions:
             del self.sessions[user_id]
-        return self.get_dataframe(user_id), self.get_count(user_id)
+        entry_list = self._get_entry_list(user_id)
+        return entry_list.to_dataframe(), self._format_count(entry_list)
 
+    @_normalize_uid
     def export_to_text(self, user_id: str) -> str:
         """
         导出为文本文件
@@ -333,9 +548,10 @@ class EntryService:
         filepath = Path(filename)
 
         try:
+            # 先拼好全部内容再一次写入
+            content = ''.join(f"{i}. {entry.text}\n" for i, entry in enumerate(entry_list.entries, 1))
             with open(filepath, 'w', encoding='utf-8') as f:
-                for i, entry in enumerate(entry_list.get_all(), 1):
-                    f.write(f"{i}. {entry.text}\n")
+                f.write(content)
             logger.info(f"导出成功: {filepath}, {entry_list.count()} 条")
             return str(filepath)
         except IOError as e:
@@ -364,7 +580,8 @@ class EntryService:
             suffix = path.suffix.lower()
             
             if suffix == '.csv':
-                import pandas as pd
+                if pd is None:
+                    raise ImportError("导入CSV需要安装pandas")
                 df = pd.read_csv(path)
                 # 尝试查找可能的文本列
                 text_col = None
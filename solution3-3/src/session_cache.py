@@ -0,0 +1,42 @@
+"""
+用户会话缓存模块
+按最近使用淘汰的内存缓存，限制长时间运行时缓存的用户数量
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LRUSessionCache(OrderedDict):
+    """LRU会话缓存：超过maxsize时淘汰最久未访问的用户"""
+
+    def __init__(self, maxsize: int = 256, on_evict: Optional[Callable[[Hashable], Any]] = None):
+        """
+        Args:
+            maxsize: 最多缓存的用户数
+            on_evict: 淘汰前的回调（参数为user_id，此时该用户仍在缓存中，可用于写出未保存的修改）
+        """
+        super().__init__()
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            oldest = next(iter(self))
+            if self.on_evict is not None:
+                try:
+                    self.on_evict(oldest)
+                except Exception as e:
+                    logger.error(f"淘汰会话前保存失败: {oldest}, 错误: {e}", exc_info=True)
+            super().__delitem__(oldest)
+            logger.info(f"淘汰会话缓存: {oldest}")
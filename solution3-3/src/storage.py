@@ -1,25 +1,55 @@
 """
 数据存储模块
-负责JSON文件的读写操作
+负责JSON文件的读写操作，以及快照+追加日志（journal）的增量存储
 """
 
 import json
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# orjson为可选依赖，编码/解码比标准库json快数倍；未安装时回退到json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# msgpack为可选依赖，用于写二进制缓存副本加快加载；未安装时只读写JSON
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 
 import time
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 
+# 同一份数据的各个文件：快照、增量日志、二进制缓存副本（按后缀从长到短匹配）
+_DATA_FILE_SUFFIXES = (".journal.jsonl", ".jsonl", ".msgpack", ".json")
+
+
+def _data_file_base(name: str) -> Optional[str]:
+    """用户数据文件名去掉后缀后的主名；不是用户数据文件时返回None"""
+    if not (name.startswith("voice_entries_") or name.startswith("structured_medicines_")):
+        return None
+    for suffix in _DATA_FILE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return None
+
+
 def cleanup_old_files(data_dir: Path, days: int = 30) -> None:
     """
     清理超过指定天数未修改的数据文件
-    
+    启动时在后台线程中执行，只删除过期文件，不影响正在使用的数据
+
+    快照、日志和缓存副本作为一个整体，按其中最新的修改时间判断是否过期：
+    追加日志不会更新快照的修改时间，单独按文件判断会删掉仍在使用的快照
+
     Args:
         data_dir: 数据目录
         days: 保留天数
@@ -28,31 +58,38 @@ def cleanup_old_files(data_dir: Path, days: int = 30) -> None:
         return
         
     logger.info(f"开始清理过期文件 (保留 {days} 天)...")
-    cutoff_time = datetime.now() - timedelta(days=days)
+    cutoff_timestamp = time.time() - days * 86400
     count = 0
     
     try:
-        for file_path in data_dir.glob("*.json"):
-            # 只处理用户数据文件
-            if not (file_path.name.startswith("voice_entries_") or 
-                    file_path.name.startswith("structured_medicines_")):
+        # scandir直接返回目录项，无需为每个文件构造Path再单独stat
+        # 主名 -> (最新修改时间, [(文件名, 路径), ...])
+        groups: Dict[str, list] = {}
+        with os.scandir(data_dir) as it:
+            for entry in it:
+                base = _data_file_base(entry.name)
+                if base is None:
+                    continue
+                group = groups.setdefault(base, [0.0, []])
+                group[0] = max(group[0], entry.stat().st_mtime)
+                group[1].append((entry.name, entry.path))
+
+        for newest_mtime, files in groups.values():
+            if newest_mtime >= cutoff_timestamp:
                 continue
-                
-            # 检查最后修改时间
-            mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-            if mtime < cutoff_time:
+            for name, path in files:
                 try:
-                    file_path.unlink()
-                    logger.info(f"删除过期文件: {file_path.name} (最后修改: {mtime})")
+                    os.unlink(path)
+                    logger.info(f"删除过期文件: {name} (最后修改: {datetime.fromtimestamp(newest_mtime)})")
                     count += 1
                 except OSError as e:
-                    logger.error(f"删除文件失败 {file_path.name}: {e}")
+                    logger.error(f"删除文件失败 {name}: {e}")
                     
         if count > 0:
             logger.info(f"清理完成: 删除了 {count} 个过期文件")
         else:
             logger.info("清理完成: 没有发现过期文件")
-            
+
     except Exception as e:
         logger.error(f"清理过程出错: {e}")
 
@@ -63,6 +100,8 @@ class JSONStorage:
 
     def __init__(self, file_path: Path):
         self.file_path = file_path
+        # 二进制缓存副本：不比JSON文件旧时优先读取，JSON仍是权威数据
+        self.sidecar_path = file_path.with_suffix('.msgpack')
         logger.info(f"JSONStorage 初始化: {file_path}")
 
     def load(self) -> List[Dict[str, Any]]:
@@ -76,22 +115,29 @@ class JSONStorage:
             logger.info(f"数据文件不存在: {self.file_path}")
             return []
 
+        data = self._load_sidecar()
+        if data is not None:
+            logger.info(f"加载缓存副本成功: {self.sidecar_path}, {len(data)} 条")
+            return data
+
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                result = data if isinstance(data, list) else []
-                logger.info(f"加载文件成功: {self.file_path}, {len(result)} 条")
-                return result
-        except (json.JSONDecodeError, IOError) as e:
+            # 按字节整体读取后直接解析，省去文本模式的逐块解码
+            data = _loads(self.file_path.read_bytes())
+            result = data if isinstance(data, list) else []
+            logger.info(f"加载文件成功: {self.file_path}, {len(result)} 条")
+            self._save_sidecar(result)
+            return result
+        except (ValueError, IOError) as e:
             logger.error(f"加载文件失败: {self.file_path}, 错误: {e}")
             return []
 
-    def save(self, data: List[Dict[str, Any]]) -> bool:
+    def save(self, data: List[Dict[str, Any]], pretty: bool = False) -> bool:
         """
         保存数据到JSON文件
 
         Args:
             data: 要保存的数据字典列表
+            pretty: 是否缩进排版（便于人工查看）；默认紧凑格式，文件更小、读写更快
 
         Returns:
             保存成功返回True，失败返回False
@@ -100,14 +146,58 @@ class JSONStorage:
             # 确保父目录存在
             self.file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # 先整体编码再一次性写入，避免json.dump逐个片段调用write
+            if orjson is not None:
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+            elif pretty:
+                payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+            else:
+                payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            # 先写临时文件再原子替换，写到一半崩溃也不会损坏原文件
+            tmp_path = self.file_path.with_name(self.file_path.name + '.tmp')
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.file_path)
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            self._save_sidecar(data)
             logger.info(f"保存文件成功: {self.file_path}, {len(data)} 条")
             return True
         except IOError as e:
             logger.error(f"保存文件失败: {self.file_path}, 错误: {e}")
             return False
 
+    def _load_sidecar(self) -> Optional[List[Dict[str, Any]]]:
+        """读取缓存副本；不可用、比JSON文件旧或损坏时返回None"""
+        if msgpack is None:
+            return None
+        try:
+            if self.sidecar_path.stat().st_mtime < self.file_path.stat().st_mtime:
+                return None
+            data = msgpack.unpackb(self.sidecar_path.read_bytes(), raw=False)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取缓存副本失败，改为读取JSON: {self.sidecar_path}, 错误: {e}")
+            return None
+        return data if isinstance(data, list) else None
+
+    def _save_sidecar(self, data: List[Dict[str, Any]]) -> None:
+        """写入缓存副本；失败时删除旧副本，避免读到过期数据"""
+        if msgpack is None:
+            return
+        tmp_path = self.sidecar_path.with_name(self.sidecar_path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(msgpack.packb(data, use_bin_type=True))
+            os.replace(tmp_path, self.sidecar_path)
+        except Exception as e:
+            logger.warning(f"写入缓存副本失败: {self.sidecar_path}, 错误: {e}")
+            tmp_path.unlink(missing_ok=True)
+            self.sidecar_path.unlink(missing_ok=True)
+
     def clear(self) -> bool:
         """清空数据文件"""
         logger.warning(f"清空文件: {self.file_path}")
@@ -116,3 +206,149 @@ class JSONStorage:
     def exists(self) -> bool:
         """检查文件是否存在"""
         return self.file_path.exists()
+
+
+class JournaledStorage:
+    """
+    快照+追加日志存储
+    快照仍是JSONStorage管理的JSON文件；单条增删改只向日志追加一行操作记录，
+    加载时在快照上重放日志，日志过大或加载时发现日志则合并回快照
+    """
+
+    # 日志超过快照大小且不小于该值时合并
+    COMPACT_MIN_BYTES = 64 * 1024
+
+    def __init__(self, file_path: Path):
+        self.snapshot = JSONStorage(file_path)
+        self.journal_path = file_path.with_suffix('.journal.jsonl')
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        加载快照并重放日志
+
+        Returns:
+            数据字典列表
+        """
+        if not self.journal_path.exists():
+            return self.snapshot.load()
+        if not self.snapshot.exists():
+            # 日志只在快照存在时才会写入，快照丢失后在空列表上重放会得到残缺的数据，
+            # 再保存就会覆盖掉可能恢复的数据：不重放，把日志改名保留以便人工恢复
+            orphan_path = self.journal_path.with_name(self.journal_path.name + '.orphan')
+            logger.error(f"快照不存在，不从日志重建: {self.journal_path}，日志已保留为 {orphan_path}")
+            try:
+                os.replace(self.journal_path, orphan_path)
+            except OSError as e:
+                logger.error(f"保留日志失败: {self.journal_path}, 错误: {e}")
+            return []
+
+        data = self.snapshot.load()
+
+        count = 0
+        try:
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        op = _loads(line)
+                    except ValueError:
+                        # 崩溃时最后一行可能只写了一半，跳过
+                        logger.warning(f"跳过损坏的日志行: {self.journal_path}")
+                        continue
+                    _apply_op(data, op)
+                    count += 1
+        except IOError as e:
+            logger.error(f"读取日志失败: {self.journal_path}, 错误: {e}")
+            return data
+
+        logger.info(f"重放日志: {self.journal_path}, {count} 条操作")
+        # 合并回快照，日志只保留上次加载之后的操作
+        self.save(data)
+        return data
+
+    def append(self, op: Dict[str, Any]) -> bool:
+        """
+        追加一条操作记录：{"op": "add", "entry": {...}} / {"op": "update", "id": ..., "fields": {...}}
+        / {"op": "delete", "id": ...}
+
+        Returns:
+            追加成功返回True；快照尚不存在或写入失败返回False（调用方应改为整体保存）
+        """
+        return self.append_many([op])
+
+    def append_many(self, ops: List[Dict[str, Any]]) -> bool:
+        """按顺序追加多条操作记录，一次写入；返回值同append"""
+        if not self.snapshot.exists():
+            return False
+        payload = b''.join(_dumps(op) + b'\n' for op in ops)
+        try:
+            with open(self.journal_path, 'a+b') as f:
+                # 上次写入中断时日志末尾是没有换行的半行：先补一个换行，
+                # 否则新记录会接在半行后面，加载时整行被跳过
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        payload = b'\n' + payload
+                f.write(payload)
+            return True
+        except IOError as e:
+            logger.error(f"追加日志失败: {self.journal_path}, 错误: {e}")
+            return False
+
+    def needs_compaction(self) -> bool:
+        """日志是否已大到需要合并回快照"""
+        try:
+            journal_size = self.journal_path.stat().st_size
+        except OSError:
+            return False
+        try:
+            snapshot_size = self.snapshot.file_path.stat().st_size
+        except OSError:
+            snapshot_size = 0
+        return journal_size > max(snapshot_size, self.COMPACT_MIN_BYTES)
+
+    def save(self, data: List[Dict[str, Any]]) -> bool:
+        """整体保存快照并清空日志"""
+        if not self.snapshot.save(data):
+            return False
+        try:
+            self.journal_path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"清空日志失败: {self.journal_path}, 错误: {e}")
+            return False
+        return True
+
+    def exists(self) -> bool:
+        """检查数据文件是否存在"""
+        return self.snapshot.exists()
+
+
+def _dumps(obj: Any) -> bytes:
+    """序列化为单行JSON字节串"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(raw: bytes) -> Any:
+    """解析JSON字节串，格式错误时抛出ValueError"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _apply_op(data: List[Dict[str, Any]], op: Dict[str, Any]) -> None:
+    """在数据列表上应用一条日志操作（与EntryList的增删改语义一致）"""
+    kind = op.get('op')
+    if kind == 'add':
+        data.append(op['entry'])
+    elif kind == 'update':
+        for item in data:
+            if item.get('id') == op['id']:
+                item.update(op['fields'])
+                break
+    elif kind == 'delete':
+        data[:] = [item for item in data if item.get('id') != op['id']]
+    else:
+        logger.warning(f"未知的日志操作: {kind}")
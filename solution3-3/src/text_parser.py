@@ -4,30 +4,64 @@
 """
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Any
 from .models import Entry, EntryList, StructuredMedicine, StructuredMedicineList
 from .storage import JSONStorage
 from .llm_client import create_llm_client
+from .parser_cache import ParserCache
+from .session_cache import LRUSessionCache
 import config
 
 logger = logging.getLogger(__name__)
 
 
+def paginate(rows: List[List], page: int, page_size: int) -> Tuple[List[List], int]:
+    """
+    截取第page页（从1开始，超出范围时取最后一页）
+
+    Returns:
+        (当前页的行, 总页数)，没有数据时总页数为1
+    """
+    page_size = max(1, int(page_size))
+    total_pages = max(1, -(-len(rows) // page_size))
+    page = min(max(1, int(page or 1)), total_pages)
+    start = (page - 1) * page_size
+    return rows[start:start + page_size], total_pages
+
+
 class MedicineParserService:
     """药品文本解析服务"""
 
-    def __init__(self, data_dir: Path, llm_client=None):
+    def __init__(self, data_dir: Path, llm_client=None, parser_cache: ParserCache = None):
         """
         初始化解析服务
 
         Args:
             data_dir: 数据目录
             llm_client: LLM客户端（如果为None，则自动创建）
+            parser_cache: 解析结果缓存（如果为None，则在数据目录下自动创建，所有用户共用）
         """
         self.data_dir = data_dir
-        # 内存缓存：user_id -> StructuredMedicineList
-        self.sessions: Dict[str, StructuredMedicineList] = {}
+        # 内存缓存：user_id -> StructuredMedicineList（LRU；修改后都会立即保存，淘汰时无需写盘，
+        # 只需丢弃该用户的视图缓存等状态，不再引用被淘汰的列表）
+        self.sessions: Dict[str, StructuredMedicineList] = LRUSessionCache(
+            config.SESSION_CACHE_SIZE, on_evict=self._forget_user
+        )
+        # 视图缓存：user_id -> {视图名: (structured_list, 版本, 参数, 结果)}，结果由调用方只读使用
+        # 修改数据时递增用户版本并整体丢弃该用户的视图（一次pop，不遍历其他线程正在写入的dict）；
+        # 会话被淘汰或重新加载后structured_list对象不同，缓存同样失效
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._view_cache: Dict[str, Dict[str, Tuple[StructuredMedicineList, int, Any, Any]]] = {}
+        # 缓存数据对应的文件修改时间：user_id -> st_mtime_ns（文件不存在为None），用于判断是否需要重新读取
+        self._file_mtimes: Dict[str, Any] = {}
+        # 每个用户一把读文件的锁：UI在线程中调用，同一用户同时触发的多次加载只读一次文件，
+        # 后到的调用等前一次读完后发现文件未变化，直接使用缓存
+        self._load_locks: Dict[str, threading.RLock] = {}
         
         # 初始化LLM客户端
         if llm_client is None:
@@ -36,11 +70,20 @@ class MedicineParserService:
                 api_key=config.CLAUDE_API_KEY,
                 model=config.CLAUDE_MODEL,
                 max_tokens=config.CLAUDE_MAX_TOKENS,
-                temperature=config.CLAUDE_TEMPERATURE
+                temperature=config.CLAUDE_TEMPERATURE,
+                pool_size=config.LLM_CONCURRENCY
             )
         else:
             self.llm_client = llm_client
 
+        if parser_cache is None:
+            self.parser_cache = ParserCache(
+                data_dir / config.PARSER_CACHE_FILENAME,
+                max_entries=config.PARSER_CACHE_MAX_ENTRIES
+            )
+        else:
+            self.parser_cache = parser_cache
+
         logger.info("MedicineParserService 初始化完成")
 
     def _get_storage(self, user_id: str) -> JSONStorage:
@@ -53,33 +96,92 @@ class MedicineParserService:
         """获取指定用户的结构化数据列表（带缓存）"""
         user_id = user_id.strip() if user_id else "default"
         
-        # 如果缓存中没有，则加载
+        # 如果缓存中没有，则加载（加锁后再检查一次，并发的调用只有一个读文件）
         if user_id not in self.sessions:
-            storage = self._get_storage(user_id)
-            data = storage.load()
-            if data:
-                self.sessions[user_id] = StructuredMedicineList.from_dict_list(data)
-                logger.info(f"加载用户结构化数据: {user_id}, {len(data)} 条")
-            else:
-                self.sessions[user_id] = StructuredMedicineList()
-                logger.info(f"初始化用户结构化数据: {user_id}")
+            with self._load_lock(user_id):
+                if user_id not in self.sessions:
+                    storage = self._get_storage(user_id)
+                    self._file_mtimes[user_id] = self._file_mtime(storage)
+                    data = storage.load()
+                    if data:
+                        self.sessions[user_id] = StructuredMedicineList.from_dict_list(data)
+                        logger.info(f"加载用户结构化数据: {user_id}, {len(data)} 条")
+                    else:
+                        self.sessions[user_id] = StructuredMedicineList()
+                        logger.info(f"初始化用户结构化数据: {user_id}")
             
         return self.sessions[user_id]
 
+    def _load_lock(self, user_id: str) -> threading.RLock:
+        """获取用户的加载锁（dict.setdefault是原子操作，并发调用拿到的是同一把锁）"""
+        return self._load_locks.setdefault(user_id, threading.RLock())
+
+    def _invalidate(self, user_id: str) -> None:
+        """用户数据被修改后使该用户的视图缓存失效"""
+        user_id = user_id.strip() if user_id else "default"
+        self._versions[user_id] += 1
+        self._view_cache.pop(user_id, None)
+
+    def _forget_user(self, user_id: str) -> None:
+        """会话被淘汰时丢弃该用户的视图缓存、版本、文件时间和加载锁（再次访问时重新加载）"""
+        self._view_cache.pop(user_id, None)
+        self._versions.pop(user_id, None)
+        self._file_mtimes.pop(user_id, None)
+        self._load_locks.pop(user_id, None)
+
+    def _cached_view(self, user_id: str, name: str, compute, params: Any = None):
+        """
+        按用户和数据版本缓存视图结果（每个视图名只保留最近一次参数的结果）
+
+        Args:
+            user_id: 用户ID
+            name: 视图名
+            compute: 根据StructuredMedicineList计算结果的函数
+            params: 计算所用的参数，与缓存的不同时重新计算并替换
+        """
+        user_id = user_id.strip() if user_id else "default"
+        structured_list = self._get_structured_list(user_id)
+        version = self._versions[user_id]
+        views = self._view_cache.setdefault(user_id, {})
+        cached = views.get(name)
+        if (cached is not None and cached[0] is structured_list
+                and cached[1] == version and cached[2] == params):
+            return cached[3]
+        result = compute(structured_list)
+        views[name] = (structured_list, version, params, result)
+        return result
+
+    @staticmethod
+    def _file_mtime(storage: JSONStorage):
+        """返回数据文件的修改时间（纳秒），文件不存在时返回None"""
+        try:
+            return storage.file_path.stat().st_mtime_ns
+        except OSError:
+            return None
+
     def load_structured_data(self, user_id: str) -> None:
-        """从存储加载结构化数据（强制刷新）"""
-        if user_id in self.sessions:
-            del self.sessions[user_id]
-        self._get_structured_list(user_id)
+        """从存储加载结构化数据（文件自上次读取或保存后未被修改时直接使用缓存）"""
+        user_id = user_id.strip() if user_id else "default"
+        with self._load_lock(user_id):
+            if user_id in self.sessions:
+                mtime = self._file_mtime(self._get_storage(user_id))
+                if mtime == self._file_mtimes.get(user_id):
+                    return
+                del self.sessions[user_id]
+            self._invalidate(user_id)
+            self._get_structured_list(user_id)
 
     def save_structured_data(self, user_id: str) -> bool:
         """保存结构化数据到存储"""
+        user_id = user_id.strip() if user_id else "default"
         structured_list = self._get_structured_list(user_id)
         storage = self._get_storage(user_id)
         
         data = structured_list.to_dict_list()
         result = storage.save(data)
         if result:
+            # 自己写入的文件不需要重新读取
+            self._file_mtimes[user_id] = self._file_mtime(storage)
             logger.info(f"保存结构化数据成功: {user_id}, {len(data)} 条")
         return result
 
@@ -95,7 +197,6 @@ class MedicineParserService:
         """
         from pathlib import Path
         from datetime import datetime
-        import pandas as pd
         
         structured_list = self._get_structured_list(user_id)
         if not structured_list or structured_list.count() == 0:
@@ -110,9 +211,7 @@ class MedicineParserService:
         
         try:
             # 转换为DataFrame
-            df_data = structured_list.to_dataframe()
-            headers = ["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"]
-            df = pd.DataFrame(df_data, columns=headers)
+            df = structured_list.to_pandas()
             
             # 导出CSV
             df.to_csv(filepath, index=False, encoding='utf-8-sig')  # utf-8-sig以支持Excel打开
@@ -124,7 +223,7 @@ class MedicineParserService:
 
     def parse_single_text(self, text: str) -> StructuredMedicine:
         """
-        解析单条文本
+        解析单条文本（优先使用解析缓存）
 
         Args:
             text: 原始文本
@@ -134,11 +233,26 @@ class MedicineParserService:
         """
         logger.info(f"开始解析文本: {text}")
 
-        # 调用LLM解析
-        parsed_data = self.llm_client.parse_medicine_text(text)
+        parsed_data = self.parser_cache.get(text)
+        if parsed_data is None:
+            # 调用LLM解析
+            parsed_data = self.llm_client.parse_medicine_text(text)
+            self._remember(text, parsed_data)
+            self.parser_cache.save()
 
-        # 创建StructuredMedicine对象
-        medicine = StructuredMedicine.create(
+        medicine = self._build_medicine(text, parsed_data)
+        logger.info(f"解析完成: {medicine.drug_name}")
+        return medicine
+
+    def _remember(self, text: str, parsed_data: Dict) -> None:
+        """缓存LLM解析结果（后备解析的结果置信度为0，不缓存，下次仍请求LLM）"""
+        if parsed_data.get('confidence', 1.0) > 0:
+            self.parser_cache.put(text, parsed_data)
+
+    @staticmethod
+    def _build_medicine(text: str, parsed_data: Dict) -> StructuredMedicine:
+        """根据解析结果创建StructuredMedicine对象"""
+        return StructuredMedicine.create(
             original_text=text,
             drug_name=parsed_data.get('drug_name', ''),
             brand_name=parsed_data.get('brand_name', ''),
@@ -150,12 +264,9 @@ class MedicineParserService:
             expiry_date=parsed_data.get('expiry_date', '')
         )
 
-        logger.info(f"解析完成: {medicine.drug_name}")
-        return medicine
-
     def parse_batch(self, entries: List[Entry]) -> Tuple[List[StructuredMedicine], List[str]]:
         """
-        批量解析文本
+        批量解析文本（缓存命中的直接使用，其余分批并发请求LLM）
         
         Args:
             entries: Entry对象列表
@@ -164,61 +275,78 @@ class MedicineParserService:
             (成功解析的StructuredMedicine列表, 失败的文本列表)
         """
         logger.info(f"开始批量解析: {len(entries)} 条")
-        
+
+        # 与entries一一对应的解析结果，None表示未命中缓存
+        parsed_list = [self.parser_cache.get(entry.text) for entry in entries]
+        # 未命中的文本去重后再请求（同一药品常被重复录入），结果回填到所有相同文本的位置
+        pending: Dict[str, List[int]] = {}
+        for i, parsed in enumerate(parsed_list):
+            if parsed is None:
+                pending.setdefault(entries[i].text.strip(), []).append(i)
+        misses = [positions[0] for positions in pending.values()]
+        logger.info(f"解析缓存命中 {len(entries) - sum(map(len, pending.values()))} 条, 需请求LLM {len(misses)} 条")
+
+        if misses:
+            batch_size = config.LLM_BATCH_SIZE
+            batches = [misses[i:i + batch_size] for i in range(0, len(misses), batch_size)]
+            workers = max(1, min(config.LLM_CONCURRENCY, len(batches)))
+            logger.info(f"使用批次大小: {batch_size}, 并发数: {workers}")
+
+            # LLM请求是网络IO，多个批次并发发出；map按提交顺序返回结果
+            texts_list = [[entries[i].text for i in batch] for batch in batches]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(self._request_chunk, texts_list, range(1, len(batches) + 1))
+                for batch, parsed_results in zip(batches, results):
+                    for i, parsed_data in zip(batch, parsed_results):
+                        for j in pending[entries[i].text.strip()]:
+                            parsed_list[j] = parsed_data
+            self.parser_cache.save()
+
         success_list = []
         failed_list = []
-        
-        # 从配置读取批次大小
-        import config
-        batch_size = config.LLM_BATCH_SIZE
-        logger.info(f"使用批次大小: {batch_size}")
-        
-        # 分批处理
-        for i in range(0, len(entries), batch_size):
-            batch = entries[i:i+batch_size]
-            texts = [entry.text for entry in batch]
-            
+        for entry, parsed_data in zip(entries, parsed_list):
+            if parsed_data is None:
+                failed_list.append(entry.text)
+                continue
             try:
-                # 调用批量API
-                logger.info(f"处理批次 {i//batch_size + 1}: {len(texts)} 条")
-                parsed_results = self.llm_client.parse_medicine_batch(texts)
-                
-                # 将结果映射回原始数据
-                for j, parsed_data in enumerate(parsed_results):
-                    original_text = batch[j].text
-                    
-                    try:
-                        # 创建StructuredMedicine对象
-                        medicine = StructuredMedicine.create(
-                            original_text=original_text,
-                            drug_name=parsed_data.get('drug_name', ''),
-                            brand_name=parsed_data.get('brand_name', ''),
-                            generic_name=parsed_data.get('generic_name', ''),
-                            quantity=parsed_data.get('quantity', 0.0),
-                            unit=parsed_data.get('unit', ''),
-                            specification=parsed_data.get('specification', ''),
-                            package_count=parsed_data.get('package_count', ''),
-                            expiry_date=parsed_data.get('expiry_date', '')
-                        )
-                        
-                        if medicine.is_valid():
-                            success_list.append(medicine)
-                        else:
-                            logger.warning(f"解析结果无效: {original_text}")
-                            failed_list.append(original_text)
-                    except Exception as e:
-                        logger.error(f"创建Medicine对象失败: {original_text}, 错误: {e}")
-                        failed_list.append(original_text)
-                        
-            except Exception as e:
-                logger.error(f"批次处理失败: {e}", exc_info=True)
-                # 如果批次失败，将所有文本加入失败列表
-                for entry in batch:
+                medicine = self._build_medicine(entry.text, parsed_data)
+                if medicine.is_valid():
+                    success_list.append(medicine)
+                else:
+                    logger.warning(f"解析结果无效: {entry.text}")
                     failed_list.append(entry.text)
-        
+            except Exception as e:
+                logger.error(f"创建Medicine对象失败: {entry.text}, 错误: {e}")
+                failed_list.append(entry.text)
+
         logger.info(f"批量解析完成: 成功 {len(success_list)}, 失败 {len(failed_list)}")
         return success_list, failed_list
 
+    def _request_chunk(self, texts: List[str], number: int) -> List[Dict]:
+        """
+        请求LLM解析一个批次并写入缓存（在线程池中执行）
+
+        Args:
+            texts: 本批次的文本列表
+            number: 批次序号（用于日志）
+
+        Returns:
+            与texts一一对应的解析结果，整批失败时对应位置为None
+        """
+        try:
+            # 调用批量API
+            logger.info(f"处理批次 {number}: {len(texts)} 条")
+            parsed_results = self.llm_client.parse_medicine_batch(texts)
+        except Exception as e:
+            logger.error(f"批次处理失败: {e}", exc_info=True)
+            return [None] * len(texts)
+
+        parsed_results = list(parsed_results)[:len(texts)]
+        for text, parsed_data in zip(texts, parsed_results):
+            if isinstance(parsed_data, dict):
+                self._remember(text, parsed_data)
+        return parsed_results + [None] * (len(texts) - len(parsed_results))
+
     def parse_and_save(self, entries: List[Entry], user_id: str, append: bool = False) -> Tuple[int, int, List[str]]:
         """
         解析并保存
@@ -245,6 +373,7 @@ class MedicineParserService:
             except ValueError as e:
                 logger.error(f"添加失败: {e}")
                 failed_list.append(medicine.original_text)
+        self._invalidate(user_id)
 
         # 保存
         self.save_structured_data(user_id)
@@ -257,15 +386,51 @@ class MedicineParserService:
         return structured_list.get_all()
 
     def get_structured_dataframe(self, user_id: str) -> List[List]:
-        """获取结构化数据的Dataframe格式"""
-        structured_list = self._get_structured_list(user_id)
-        return structured_list.to_dataframe()
+        """获取结构化数据的Dataframe格式（数据未修改时返回缓存结果的副本）"""
+        return list(self._cached_view(user_id, 'dataframe', StructuredMedicineList.to_dataframe))
 
-    def filter_by_drug_name(self, drug_name: str, user_id: str) -> List[List]:
-        """按药名筛选并返回Dataframe格式"""
-        structured_list = self._get_structured_list(user_id)
-        filtered = structured_list.filter_by_drug_name(drug_name)
-        return self._medicines_to_dataframe(filtered)
+    def get_structured_pandas(self, user_id: str):
+        """
+        获取pandas DataFrame格式的结构化数据（供Gradio表格直接显示，省去列表到DataFrame的转换）
+        数据未修改时返回缓存的同一个对象，调用方不能修改
+        """
+        return self._cached_view(user_id, 'pandas', StructuredMedicineList.to_pandas)
+
+    def get_structured_dataframe_page(self, user_id: str, page: int, page_size: int = 100) -> Tuple[List[List], int]:
+        """
+        获取结构化数据Dataframe格式的一页（基于缓存的完整结果，不重复构建）
+
+        Returns:
+            (当前页的行, 总页数)
+        """
+        rows = self._cached_view(user_id, 'dataframe', StructuredMedicineList.to_dataframe)
+        return paginate(rows, page, page_size)
+
+    def query_dataframe(self, user_id: str, drug_name: str = "", sort_by: str = None,
+                        reverse: bool = False) -> List[List]:
+        """
+        按药名筛选并排序，返回Dataframe格式（一次完成筛选和排序；只缓存每个用户最近一次查询的结果，
+        翻页时不重复计算，输入筛选词时不会为每个前缀各留一份）
+
+        Args:
+            user_id: 用户ID
+            drug_name: 药名关键词，为空表示不筛选
+            sort_by: 排序字段 "drug_name" / "expiry_date"，为None表示保持原顺序
+            reverse: 是否降序
+
+        Returns:
+            序号从1开始的行列表；不筛选也不排序时与get_structured_dataframe相同（最新的在前）
+        """
+        drug_name = (drug_name or "").strip()
+        if not drug_name and sort_by is None:
+            return self._cached_view(user_id, 'dataframe', StructuredMedicineList.to_dataframe)
+        return self._cached_view(
+            user_id, 'query',
+            lambda structured_list: self._medicines_to_dataframe(
+                structured_list.query(drug_name, sort_by, reverse)
+            ),
+            params=(drug_name, sort_by, reverse)
+        )
 
     def filter_by_expiry(self, user_id: str, before_date: str = None, after_date: str = None) -> List[List]:
         """按有效期筛选并返回Dataframe格式"""
@@ -273,18 +438,6 @@ class MedicineParserService:
         filtered = structured_list.filter_by_expiry(before_date, after_date)
         return self._medicines_to_dataframe(filtered)
 
-    def sort_by_drug_name(self, user_id: str, reverse: bool = False) -> List[List]:
-        """按药名排序并返回Dataframe格式"""
-        structured_list = self._get_structured_list(user_id)
-        sorted_list = structured_list.sort_by_drug_name(reverse)
-        return self._medicines_to_dataframe(sorted_list)
-
-    def sort_by_expiry(self, user_id: str, reverse: bool = False) -> List[List]:
-        """按有效期排序并返回Dataframe格式"""
-        structured_list = self._get_structured_list(user_id)
-        sorted_list = structured_list.sort_by_expiry(reverse)
-        return self._medicines_to_dataframe(sorted_list)
-
     def _medicines_to_dataframe(self, medicines: List[StructuredMedicine]) -> List[List]:
         """将药品列表转换为Dataframe格式"""
         return [
@@ -305,20 +458,17 @@ class MedicineParserService:
         """
         try:
             structured_list = self._get_structured_list(user_id)
-            structured_list.clear()
-            
-            for row in df_data:
-                # headers=["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"]
-                if len(row) < 10:
-                    continue
-                    
-                # 从row重建StructuredMedicine
-                # 注意：row[0]是序号，跳过
-                # 使用create方法会自动生成ID和时间（如果未提供）
-                # 这里我们尽量保留原有信息
-                
-                medicine = StructuredMedicine.create(
-                    original_text=str(row[9]) if row[9] else "",
+
+            # headers=["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"]
+            # row[0]是序号，跳过；ID按行号在当前时间戳上递增，没有时间的行使用当前时间
+            now = datetime.now()
+            now_ms = int(now.timestamp() * 1000)
+            now_str = now.strftime('%Y-%m-%d %H:%M:%S')
+            rows = [row for row in df_data if len(row) >= 10]
+            medicines = [
+                StructuredMedicine(
+                    id=now_ms + i,
+                    original_text=(str(row[9]) if row[9] else "").strip(),
                     drug_name=str(row[1]) if row[1] else "",
                     brand_name=str(row[2]) if row[2] else "",
                     generic_name=str(row[3]) if row[3] else "",
@@ -326,40 +476,59 @@ class MedicineParserService:
                     unit=str(row[5]) if row[5] else "",
                     specification=str(row[6]) if row[6] else "",
                     package_count=str(row[7]) if row[7] else "",
-                    expiry_date=str(row[8]) if row[8] else ""
+                    expiry_date=str(row[8]) if row[8] else "",
+                    timestamp=str(row[10]) if len(row) > 10 and row[10] else now_str
                 )
-                # 如果有时间，覆盖默认生成的
-                if len(row) > 10 and row[10]:
-                    medicine.timestamp = str(row[10])
-                    
-                structured_list.add(medicine)
-                
+                for i, row in enumerate(rows)
+            ]
+            structured_list.replace_all(medicines)
+            self._invalidate(user_id)
+
             return True
         except Exception as e:
             logger.error(f"更新结构化数据失败: {e}")
             return False
 
     def get_statistics(self, user_id: str) -> dict:
-        """获取统计信息"""
-        structured_list = self._get_structured_list(user_id)
-        total = structured_list.count()
-
-        # 统计各字段的填充率
-        all_medicines = structured_list.get_all()
+        """获取统计信息（数据未修改时返回缓存结果）"""
+        return dict(self._cached_view(user_id, 'statistics', self._compute_statistics))
+
+    def format_statistics(self, user_id: str, template: str) -> str:
+        """用统计信息填充模板（format_map），数据未修改时返回缓存的文本"""
+        return self._cached_view(
+            user_id, 'statistics_text',
+            lambda structured_list: template.format_map(
+                self._cached_view(user_id, 'statistics', self._compute_statistics)
+            ),
+            params=template
+        )
 
-        stats = {
-            'total': total,
-            'with_brand_name': sum(1 for m in all_medicines if m.brand_name),
-            'with_generic_name': sum(1 for m in all_medicines if m.generic_name),
-            'with_specification': sum(1 for m in all_medicines if m.specification),
-            'with_expiry_date': sum(1 for m in all_medicines if m.expiry_date),
+    @staticmethod
+    def _compute_statistics(structured_list: StructuredMedicineList) -> dict:
+        """统计各字段的填充数（一次遍历）"""
+        brand = generic = specification = expiry = 0
+        for m in structured_list.medicines:
+            if m.brand_name:
+                brand += 1
+            if m.generic_name:
+                generic += 1
+            if m.specification:
+                specification += 1
+            if m.expiry_date:
+                expiry += 1
+
+        return {
+            'total': structured_list.count(),
+            'with_brand_name': brand,
+            'with_generic_name': generic,
+            'with_specification': specification,
+            'with_expiry_date': expiry,
         }
 
-        return stats
-
     def clear_all(self, user_id: str) -> None:
         """清空所有结构化数据"""
         structured_list = self._get_structured_list(user_id)
         structured_list.clear()
+        self._invalidate(user_id)
         self.save_structured_data(user_id)
         logger.warning(f"用户 {user_id} 已清空所有结构化数据")
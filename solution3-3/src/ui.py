@@ -3,11 +3,69 @@ Gradio UI组件模块 - 多Tab版本
 包含：语音收集、智能结构化、数据分析三个Tab
 """
 
+import asyncio
+import json
+import logging
+
 import gradio as gr
+import pandas as pd
 from .service import EntryService
-from .text_parser import MedicineParserService
+from .text_parser import MedicineParserService, paginate
+from .models import Entry, STRUCTURED_DATAFRAME_HEADERS
 from .voice import VOICE_RECOGNITION_JS
 
+# 表格设置max_height后前端只渲染可见的行；Tab3按页从服务器取数据。
+# Tab1、Tab2的表格可编辑，保存时提交整张表，所以不分页
+DATAFRAME_MAX_HEIGHT = 500
+TAB3_PAGE_SIZE = 100
+# Tab3视图：(药名关键词, 排序字段, 是否降序)，筛选和排序可以同时生效
+TAB3_FULL_VIEW = ("", None, False)
+TAB3_SORT_FIELDS = {"药名": "drug_name", "有效期": "expiry_date"}
+
+logger = logging.getLogger(__name__)
+
+# Tab3统计信息（字段见MedicineParserService.get_statistics）
+_STATS_TEMPLATE = """### 📊 统计信息
+
+- **总计**: {total} 条
+- **有商品名**: {with_brand_name} 条
+- **有学术名**: {with_generic_name} 条
+- **有规格**: {with_specification} 条
+- **有效期**: {with_expiry_date} 条
+"""
+
+# 自定义CSS样式（与语音识别脚本VOICE_RECOGNITION_JS一样是模块常量，重复build时直接复用）
+_CUSTOM_CSS = """
+.voice-btn {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
+    color: white !important;
+    border: none !important;
+    font-size: 18px !important;
+    padding: 20px !important;
+    font-weight: bold !important;
+}
+.continuous-btn {
+    background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%) !important;
+    color: white !important;
+    border: none !important;
+    font-size: 18px !important;
+    padding: 20px !important;
+    font-weight: bold !important;
+}
+.hidden-user-input {
+    display: none !important;
+}
+"""
+
+
+def _df_to_list(data) -> list:
+    """将Dataframe组件的值（pandas DataFrame或列表）转换为行列表，其他值视为空"""
+    if isinstance(data, pd.DataFrame):
+        return data.to_numpy(copy=False).tolist()
+    if isinstance(data, list):
+        return data
+    return []
+
 
 class GradioUI:
     """Gradio用户界面类（多Tab版本）"""
@@ -24,7 +82,7 @@ class GradioUI:
             title="药品信息管理系统 V3.1",
             theme=gr.themes.Soft(),
             head=VOICE_RECOGNITION_JS,
-            css=self._get_custom_css()
+            css=_CUSTOM_CSS
         ) as app:
 
             # 全局标题
@@ -47,9 +105,14 @@ class GradioUI:
 
             gr.Markdown("---")
 
+            # 当前选中的Tab（1/2/3）：切换用户时只加载可见Tab的数据，
+            # Tab2、Tab3的数据在选中时才加载，第一次打开时要等一次读取
+            self.active_tab = gr.State(1)
+
             # 创建三个Tab
             with gr.Tabs() as tabs:
                 with gr.Tab("📝 语音采集") as tab1:
+                    self.tab1 = tab1
                     self._build_tab1_voice_collection()
                 
                 with gr.Tab("🧠 智能结构化") as tab2:
@@ -95,6 +158,11 @@ class GradioUI:
                 )
 
         self.continuous_status = gr.Markdown("状态: 未启动")
+        # 连续模式的批量添加：JS把一段时间内识别的文本合并后点击该按钮（通过CSS隐藏）
+        self.voice_batch = gr.Textbox(value="[]", elem_classes=["hidden-user-input"])
+        self.voice_batch_btn = gr.Button(
+            "批量添加", elem_id="mt_voice_batch_btn", elem_classes=["hidden-user-input"]
+        )
 
         self.text_input = gr.Textbox(
             label="📝 识别结果 / 手动输入",
@@ -120,6 +188,7 @@ class GradioUI:
             row_count=(0, "dynamic"),
             interactive=True,
             wrap=True,
+            max_height=DATAFRAME_MAX_HEIGHT,
             column_widths=["8%", "52%", "25%", "15%"]
         )
 
@@ -147,7 +216,8 @@ class GradioUI:
                     headers=["#", "药品信息", "录入时间"],
                     label="待处理的原始文本",
                     interactive=False,
-                    wrap=True
+                    wrap=True,
+                    max_height=DATAFRAME_MAX_HEIGHT
                 )
 
             with gr.Column(scale=1):
@@ -186,10 +256,11 @@ class GradioUI:
 
         self.tab2_result_df = gr.Dataframe(
             value=[],
-            headers=["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"],
+            headers=STRUCTURED_DATAFRAME_HEADERS,
             label="AI解析结果（可编辑）",
             interactive=True,
             wrap=True,
+            max_height=DATAFRAME_MAX_HEIGHT,
             column_widths=["5%", "10%", "8%", "10%", "5%", "5%", "8%", "8%", "10%", "20%", "11%"]
         )
 
@@ -235,13 +306,22 @@ class GradioUI:
         # 统计信息
         self.tab3_stats = gr.Markdown("### 📊 统计信息\n加载中...")
 
-        # 数据展示
+        # 数据展示（按页取数据，只把当前页发送给浏览器）
+        with gr.Row():
+            self.tab3_page = gr.Number(value=1, precision=0, minimum=1, label="页码", scale=1)
+            self.tab3_page_info = gr.Markdown("第 1 / 1 页")
+        # 当前视图（见TAB3_FULL_VIEW），翻页、筛选、排序时按它重新取数据
+        self.tab3_view = gr.State(TAB3_FULL_VIEW)
+        # Tab3当前显示的是哪个用户的数据（None表示还没加载），选中Tab3时不是当前用户才加载
+        self.tab3_loaded = gr.State(None)
+
         self.tab3_data_df = gr.Dataframe(
             value=[],
-            headers=["#", "药名", "商品名", "学术名", "数量", "单位", "规格", "包装", "有效期", "原文", "时间"],
+            headers=STRUCTURED_DATAFRAME_HEADERS,
             label="结构化数据",
             interactive=False,
             wrap=True,
+            max_height=DATAFRAME_MAX_HEIGHT,
             column_widths=["5%", "10%", "8%", "10%", "5%", "5%", "8%", "8%", "10%", "20%", "11%"]
         )
 
@@ -249,48 +329,78 @@ class GradioUI:
             self.tab3_refresh_btn = gr.Button("🔄 刷新数据", variant="primary", size="lg")
             self.tab3_export_btn = gr.Button("📥 导出当前视图", variant="secondary")
 
-    def _bind_user_events_callback(self, user_id):
-        """切换用户并刷新所有数据的回调函数"""
-        # 刷新Tab1数据
-        df1, count1 = self.entry_service.refresh(user_id)
-        
-        # 刷新Tab2数据 (清空显示)
+    async def _bind_user_events_callback(self, user_id, active_tab=1):
+        """
+        切换用户并刷新数据的回调函数
+        Tab1总是刷新；Tab2、Tab3只在可见时加载，否则保持不变，等选中时再加载（见on_tab2_select、on_tab3_select）
+        两个服务互不依赖，读文件放到线程中并发执行，不阻塞事件循环
+        """
+        skip = gr.skip()
+        tasks = [asyncio.to_thread(self.entry_service.refresh, user_id)]
+        if active_tab == 2:
+            tasks.append(asyncio.to_thread(self._load_tab2_result, user_id))
+        elif active_tab == 3:
+            tasks.append(asyncio.to_thread(self._load_tab3, user_id))
+        (df1, count1), *loaded = await asyncio.gather(*tasks)
+
+        df2_result = loaded[0] if active_tab == 2 else skip
+        if active_tab == 3:
+            tab3_updates = loaded[0]
+        else:
+            # 标记为未加载，下次选中Tab3时按新用户加载
+            tab3_updates = (skip,) * (len(self._tab3_user_outputs()) - 1) + (None,)
+
+        # Tab2的原始数据清空显示
         df2_source = []
-        df2_result = self.parser_service.get_structured_dataframe(user_id)
-        
-        # 刷新Tab3数据
-        self.parser_service.load_structured_data(user_id)
-        df3 = self.parser_service.get_structured_dataframe(user_id)
-        stats = self.parser_service.get_statistics(user_id)
-        stats_text = f"""### 📊 统计信息
-
-- **总计**: {stats['total']} 条
-- **有商品名**: {stats['with_brand_name']} 条
-- **有学术名**: {stats['with_generic_name']} 条
-- **有规格**: {stats['with_specification']} 条
-- **有效期**: {stats['with_expiry_date']} 条
-"""
-        
+
         return (
             f"✅ 当前用户: {user_id}", 
             df1, count1, 
             df2_source, "就绪", df2_result,
-            df3, stats_text
+            *tab3_updates
         )
 
+    def _load_tab2_result(self, user_id):
+        """重新读取并返回Tab2结果表（pandas DataFrame，在线程中执行）"""
+        self.parser_service.load_structured_data(user_id)
+        return self.parser_service.get_structured_pandas(user_id)
+
+    def _load_tab3(self, user_id):
+        """
+        重新读取并返回Tab3的输出（在线程中执行）
+
+        Returns:
+            与_tab3_user_outputs顺序一致：(第一页, 统计信息, 页码, 视图, 分页信息, 已加载的用户)
+        """
+        self.parser_service.load_structured_data(user_id)
+        stats_text = self.parser_service.format_statistics(user_id, _STATS_TEMPLATE)
+        df3, page, view, page_info = self._tab3_page(user_id, TAB3_FULL_VIEW, 1)
+        return df3, stats_text, page, view, page_info, user_id
+
     def _bind_user_events(self):
-        """绑定用户切换事件"""
+        """绑定用户切换和Tab选中事件"""
         self.user_input.submit(
             fn=self._bind_user_events_callback,
-            inputs=[self.user_input],
+            inputs=[self.user_input, self.active_tab],
             outputs=[
                 self.user_status,
                 self.dataframe, self.count_display,
                 self.tab2_source_df, self.tab2_status, self.tab2_result_df,
-                self.tab3_data_df, self.tab3_stats
-            ]
+                *self._tab3_user_outputs()
+            ],
+            show_progress="hidden"
         )
 
+        # 记录当前选中的Tab（Tab2、Tab3在各自的select事件里一并更新）
+        self.tab1.select(fn=lambda: 1, outputs=[self.active_tab], show_progress="hidden")
+
+    def _tab3_user_outputs(self) -> list:
+        """切换用户/选中Tab3时更新的Tab3组件（与_load_tab3返回的顺序一致）"""
+        return [
+            self.tab3_data_df, self.tab3_stats, self.tab3_page, self.tab3_view, self.tab3_page_info,
+            self.tab3_loaded
+        ]
+
     def _bind_tab1_events(self):
         """绑定Tab1事件"""
 
@@ -329,11 +439,30 @@ class GradioUI:
             """
         )
 
+        # 连续模式批量添加：点击时由JS取出队列中的文本，一次添加、只返回一次表格；
+        # 处理中又有新的一批时也要排队处理，不能丢弃
+        def add_voice_batch(batch, user_id):
+            """添加连续模式识别的一批文本"""
+            texts = json.loads(batch or "[]")
+            if not texts:
+                return gr.skip(), gr.skip(), gr.skip()
+            return self.entry_service.add_entries(texts, user_id)
+
+        self.voice_batch_btn.click(
+            fn=add_voice_batch,
+            inputs=[self.voice_batch, self.user_input],
+            outputs=[self.status, self.dataframe, self.count_display],
+            trigger_mode="multiple",
+            show_progress="hidden",
+            js="(batch, userId) => [window.takeVoiceQueue(), userId]"
+        )
+
         # 添加按钮
         self.add_btn.click(
             fn=self.entry_service.add_entry,
             inputs=[self.text_input, self.user_input],
-            outputs=[self.status, self.dataframe, self.count_display, self.text_input]
+            outputs=[self.status, self.dataframe, self.count_display, self.text_input],
+            show_progress="hidden"
         )
 
         # 保存表格
@@ -347,7 +476,8 @@ class GradioUI:
         self.refresh_btn.click(
             fn=self.entry_service.refresh,
             inputs=[self.user_input],
-            outputs=[self.dataframe, self.count_display]
+            outputs=[self.dataframe, self.count_display],
+            show_progress="hidden"
         )
 
         # 导出
@@ -368,7 +498,8 @@ class GradioUI:
         self.text_input.submit(
             fn=self.entry_service.add_entry,
             inputs=[self.text_input, self.user_input],
-            outputs=[self.status, self.dataframe, self.count_display, self.text_input]
+            outputs=[self.status, self.dataframe, self.count_display, self.text_input],
+            show_progress="hidden"
         )
 
         # 页面加载时刷新 - 实际上由_bind_user_events_callback处理
@@ -376,27 +507,23 @@ class GradioUI:
 
     def _bind_tab2_events(self):
         """绑定Tab2事件"""
+        # 处理函数在应用运行期间一直被引用，绑定时取好服务方法，调用时不再逐层查找属性
+        get_entries = self.entry_service.get_entries
+        parse_file_to_entries = self.entry_service.parse_file_to_entries
+        parse_and_save = self.parser_service.parse_and_save
+        get_structured_pandas = self.parser_service.get_structured_pandas
+        update_from_dataframe = self.parser_service.update_from_dataframe
+        save_structured_data = self.parser_service.save_structured_data
 
         def load_voice_data(user_id, current_data):
             """加载语音数据并追加"""
-            print(f"DEBUG: load_voice_data called with user_id='{user_id}'")
-            entry_list = self.entry_service._get_entry_list(user_id)
-            entries = entry_list.get_all()
-            print(f"DEBUG: Found {len(entries)} entries for user '{user_id}'")
+            logger.debug("load_voice_data user_id=%s", user_id)
+            entries = get_entries(user_id)
+            logger.debug("load_voice_data found %d entries for user %s", len(entries), user_id)
             if not entries:
                 return current_data, f"⚠️ 没有语音数据 (User: {user_id})"
 
-            # 处理current_data，确保它是列表
-            import pandas as pd
-            if isinstance(current_data, pd.DataFrame):
-                current_data_list = current_data.values.tolist()
-            elif isinstance(current_data, list):
-                current_data_list = current_data
-            else:
-                current_data_list = []
-
-            # 转换为dataframe格式 [序号, 文本, 时间]
-            # start_index = len(current_data_list) # Overwrite mode starts from 0
+            # 转换为dataframe格式 [序号, 文本, 时间]（覆盖模式，不需要读取current_data）
             new_data = [[i + 1, e.text, e.timestamp] for i, e in enumerate(entries)]
             
             # 覆盖现有数据
@@ -408,93 +535,76 @@ class GradioUI:
             if not file_obj:
                 return current_data, "⚠️ 请先上传文件"
                 
-            entries = self.entry_service.parse_file_to_entries(file_obj.name)
+            entries = parse_file_to_entries(file_obj.name)
             if not entries:
                 return current_data, "⚠️ 文件解析失败或为空"
                 
-            # 处理current_data，确保它是列表
-            import pandas as pd
-            if isinstance(current_data, pd.DataFrame):
-                current_data_list = current_data.values.tolist()
-            elif isinstance(current_data, list):
-                current_data_list = current_data
-            else:
-                current_data_list = []
+            # 组件的值每次请求都重新反序列化，转换得到的列表不与其他地方共用，直接原地追加
+            current_data_list = _df_to_list(current_data)
 
             # 转换为dataframe格式
             start_index = len(current_data_list)
-            new_data = [[start_index + i + 1, e['text'], e['timestamp']] for i, e in enumerate(entries)]
-            
-            updated_data = current_data_list + new_data
-            return updated_data, f"✅ 已追加 {len(entries)} 条文件数据"
+            current_data_list.extend(
+                [start_index + i + 1, e['text'], e['timestamp']] for i, e in enumerate(entries)
+            )
+            return current_data_list, f"✅ 已追加 {len(entries)} 条文件数据"
 
         def clear_pending_data():
             """清空待处理数据"""
             return [], "✅ 待处理数据已清空"
 
-        def parse_all(user_id, source_data, append_mode):
-            """解析所有原始数据"""
-            # 处理source_data，确保它是列表
-            import pandas as pd
-            if isinstance(source_data, pd.DataFrame):
-                source_data_list = source_data.values.tolist()
-            elif isinstance(source_data, list):
-                source_data_list = source_data
-            else:
-                source_data_list = []
-
-            if not source_data_list or len(source_data_list) == 0:
-                return [], "⚠️ 没有数据需要解析", self.parser_service.get_structured_dataframe(user_id)
+        async def parse_all(user_id, source_data, append_mode):
+            """解析所有原始数据（LLM批次请求耗时较长，放到线程中执行，不占用Gradio的工作线程）"""
+            source_data_list = _df_to_list(source_data)
+            if not source_data_list:
+                # 两张表都没有变化，不重新发送
+                return gr.skip(), "⚠️ 没有数据需要解析", gr.skip()
 
             # 从source_data重建Entry对象列表
             # source_data format: [序号, 文本, 时间]
-            from .models import Entry
-            entries = []
-            for row in source_data_list:
-                if len(row) >= 2:
-                    entries.append(Entry.create(row[1])) # 重建Entry，ID会重新生成，但这不影响解析
+            # 解析只使用text，ID和时间在生成结构化数据时重新创建，这里不调用Entry.create取当前时间
+            entries = [
+                Entry(id=0, text=str(row[1]).strip(), timestamp="")
+                for row in source_data_list if len(row) >= 2
+            ]
 
-            success, failed, failed_texts = self.parser_service.parse_and_save(entries, user_id, append=append_mode)
+            success, failed, failed_texts = await asyncio.to_thread(
+                parse_and_save, entries, user_id, append=append_mode
+            )
 
             status_msg = f"✅ 解析完成！\n成功: {success} 条\n失败: {failed} 条"
             if failed_texts:
                 status_msg += f"\n\n失败的文本:\n" + "\n".join(f"- {t}" for t in failed_texts[:5])
 
-            return [], status_msg, self.parser_service.get_structured_dataframe(user_id)
+            return [], status_msg, get_structured_pandas(user_id)
 
         def save_structured(user_id, df_data):
             """保存结构化数据"""
-            # 处理df_data，确保它是列表
-            import pandas as pd
-            if isinstance(df_data, pd.DataFrame):
-                df_data_list = df_data.values.tolist()
-            elif isinstance(df_data, list):
-                df_data_list = df_data
-            else:
-                df_data_list = []
+            df_data_list = _df_to_list(df_data)
 
             # 先从表格更新数据
-            if self.parser_service.update_from_dataframe(user_id, df_data_list):
+            if update_from_dataframe(user_id, df_data_list):
                 # 然后保存到文件
-                if self.parser_service.save_structured_data(user_id):
+                if save_structured_data(user_id):
                     structured_list = self.parser_service._get_structured_list(user_id)
                     count = structured_list.count()
                     return f"✅ 已保存 {count} 条结构化数据"
             
             return "❌ 保存失败"
 
-        def on_tab2_select(user_id):
-            """Tab2选中时自动加载数据"""
-            print(f"DEBUG: on_tab2_select called with user_id='{user_id}'")
-            df = self.parser_service.get_structured_dataframe(user_id)
-            print(f"DEBUG: on_tab2_select returning {len(df)} rows")
-            return df
+        async def on_tab2_select(user_id):
+            """Tab2选中时自动加载数据（用户数据未缓存时要读文件，放到线程中执行）"""
+            logger.debug("on_tab2_select user_id=%s", user_id)
+            df = await asyncio.to_thread(get_structured_pandas, user_id)
+            logger.debug("on_tab2_select returning %d rows", len(df))
+            return df, 2
 
         # 绑定事件
         self.tab2.select(
             fn=on_tab2_select,
             inputs=[self.user_input],
-            outputs=[self.tab2_result_df]
+            outputs=[self.tab2_result_df, self.active_tab],
+            show_progress="hidden"
         )
 
         self.tab2_load_voice_btn.click(
@@ -512,7 +622,8 @@ class GradioUI:
         self.tab2_clear_pending_btn.click(
             fn=clear_pending_data,
             inputs=[],
-            outputs=[self.tab2_source_df, self.tab2_status]
+            outputs=[self.tab2_source_df, self.tab2_status],
+            show_progress="hidden"
         )
 
         self.tab2_parse_btn.click(
@@ -533,71 +644,133 @@ class GradioUI:
             outputs=[self.tab2_file_output]
         )
 
-    def _bind_tab3_events(self):
-        """绑定Tab3事件"""
-
-        def refresh_data(user_id):
-            """刷新数据和统计"""
-            self.parser_service.load_structured_data(user_id)
-            df = self.parser_service.get_structured_dataframe(user_id)
-            stats = self.parser_service.get_statistics(user_id)
-
-            stats_text = f"""### 📊 统计信息
-
-- **总计**: {stats['total']} 条
-- **有商品名**: {stats['with_brand_name']} 条
-- **有学术名**: {stats['with_generic_name']} 条
-- **有规格**: {stats['with_specification']} 条
-- **有效期**: {stats['with_expiry_date']} 条
-"""
-            return df, stats_text
+    def _tab3_page(self, user_id, view, page):
+        """
+        取Tab3当前视图的一页
 
-        def filter_data(drug_name, user_id):
-            """筛选数据"""
-            if not drug_name or not drug_name.strip():
-                return self.parser_service.get_structured_dataframe(user_id)
-            return self.parser_service.filter_by_drug_name(drug_name.strip(), user_id)
+        Args:
+            view: (药名关键词, 排序字段, 是否降序)，见TAB3_FULL_VIEW
+            page: 页码（从1开始，超出范围时取最后一页）
 
-        def sort_data(sort_by, sort_order, user_id):
-            """排序数据"""
-            reverse = (sort_order == "降序")
+        Returns:
+            (当前页数据, 页码, 视图, 分页信息)
+        """
+        drug_name, sort_by, reverse = view
+        if not drug_name and sort_by is None:
+            rows, total_pages = self.parser_service.get_structured_dataframe_page(
+                user_id, page, TAB3_PAGE_SIZE
+            )
+        else:
+            all_rows = self.parser_service.query_dataframe(user_id, drug_name, sort_by, reverse)
+            rows, total_pages = paginate(all_rows, page, TAB3_PAGE_SIZE)
+        page = min(max(1, int(page or 1)), total_pages)
+        return rows, page, view, f"第 {page} / {total_pages} 页"
 
-            if sort_by == "药名":
-                return self.parser_service.sort_by_drug_name(user_id, reverse=reverse)
-            elif sort_by == "有效期":
-                return self.parser_service.sort_by_expiry(user_id, reverse=reverse)
-            else:
-                return self.parser_service.get_structured_dataframe(user_id)
+    def _bind_tab3_events(self):
+        """绑定Tab3事件"""
+        # 同Tab2，绑定时取好方法
+        load_tab3 = self._load_tab3
+        tab3_page = self._tab3_page
+        tab3_outputs = self._tab3_user_outputs()
+
+        async def refresh_data(user_id):
+            """刷新数据和统计（读文件放到线程中执行）"""
+            return await asyncio.to_thread(load_tab3, user_id)
+
+        async def on_tab3_select(user_id, loaded_user):
+            """Tab3选中时，当前用户的数据还没加载过才加载（之后由刷新按钮更新）"""
+            if loaded_user == user_id:
+                return (*(gr.skip() for _ in tab3_outputs), 3)
+            return (*(await asyncio.to_thread(load_tab3, user_id)), 3)
+
+        # 筛选、排序、翻页在用户数据未缓存时会先读文件，同样放到线程中执行
+        async def filter_data(drug_name, view, user_id):
+            """筛选数据，保留当前排序（回到第一页）；关键词为空且当前未筛选时不做任何更新"""
+            drug_name = (drug_name or "").strip()
+            if not drug_name and not view[0]:
+                return gr.skip(), gr.skip(), gr.skip(), gr.skip()
+            view = (drug_name, view[1], view[2])
+            return await asyncio.to_thread(tab3_page, user_id, view, 1)
+
+        async def sort_data(sort_by, sort_order, view, user_id):
+            """排序数据，保留当前筛选（回到第一页）"""
+            view = (view[0], TAB3_SORT_FIELDS.get(sort_by, "drug_name"), sort_order == "降序")
+            return await asyncio.to_thread(tab3_page, user_id, view, 1)
+
+        async def reset_data(user_id):
+            """显示全部数据（回到第一页）"""
+            return await asyncio.to_thread(tab3_page, user_id, TAB3_FULL_VIEW, 1)
+
+        async def change_page(view, page, user_id):
+            """翻页：在当前视图中取指定页"""
+            return await asyncio.to_thread(tab3_page, user_id, view, page)
+
+        view_outputs = [self.tab3_data_df, self.tab3_page, self.tab3_view, self.tab3_page_info]
 
         # 绑定事件
+        self.tab3.select(
+            fn=on_tab3_select,
+            inputs=[self.user_input, self.tab3_loaded],
+            outputs=tab3_outputs + [self.active_tab],
+            show_progress="hidden"
+        )
+
         self.tab3_refresh_btn.click(
             fn=refresh_data,
             inputs=[self.user_input],
-            outputs=[self.tab3_data_df, self.tab3_stats]
+            outputs=tab3_outputs,
+            show_progress="hidden"
         )
 
         self.tab3_filter_btn.click(
             fn=filter_data,
-            inputs=[self.tab3_drug_filter, self.user_input],
-            outputs=[self.tab3_data_df]
+            inputs=[self.tab3_drug_filter, self.tab3_view, self.user_input],
+            outputs=view_outputs,
+            show_progress="hidden"
+        )
+
+        # 输入时实时筛选：JS等停止输入300ms后才发送（被后续输入取代的请求不会发出），
+        # always_last保证处理中又有新输入时只处理最后一次
+        self.tab3_drug_filter.input(
+            fn=filter_data,
+            inputs=[self.tab3_drug_filter, self.tab3_view, self.user_input],
+            outputs=view_outputs,
+            trigger_mode="always_last",
+            show_progress="hidden",
+            js="""
+            (...args) => new Promise((resolve) => {
+                clearTimeout(window.__mtFilterTimer);
+                window.__mtFilterTimer = setTimeout(() => resolve(args), 300);
+            })
+            """
         )
 
         self.tab3_reset_btn.click(
-            fn=lambda user_id: self.parser_service.get_structured_dataframe(user_id),
+            fn=reset_data,
             inputs=[self.user_input],
-            outputs=[self.tab3_data_df]
+            outputs=view_outputs,
+            show_progress="hidden"
         )
 
         self.tab3_sort_btn.click(
             fn=sort_data,
-            inputs=[self.tab3_sort_by, self.tab3_sort_order, self.user_input],
-            outputs=[self.tab3_data_df]
+            inputs=[self.tab3_sort_by, self.tab3_sort_order, self.tab3_view, self.user_input],
+            outputs=view_outputs,
+            show_progress="hidden"
         )
 
-        # 页面加载时：
-        # 1. 执行JS获取/生成User ID
-        # 2. 将ID填入user_input
-        # 3. 触发switch_user加载该用户数据
+        # 翻页（input只响应用户修改，不会被上面回写页码触发）
+        self.tab3_page.input(
+            fn=change_page,
+            inputs=[self.tab3_view, self.tab3_page, self.user_input],
+            outputs=view_outputs,
+            trigger_mode="always_last",
+            show_progress="hidden"
+        )
+
+        # 页面加载时（一个事件，一次往返）：
+        # 1. 执行JS获取/生成User ID，JS的返回值作为fn的输入
+        # 2. 服务器加载该用户数据，连同User ID一起返回（填入user_input）
         
         get_user_id_js = """
         () => {
@@ -611,46 +784,23 @@ class GradioUI:
         }
         """
 
+        async def initial_load(user_id):
+            """页面加载：返回User ID和该用户的所有数据"""
+            return (user_id, *(await self._bind_user_events_callback(user_id)))
+
         self.app.load(
-            fn=None,
-            inputs=None,
-            outputs=[self.user_input],
-            js=get_user_id_js
-        ).then(
-            fn=self._bind_user_events_callback, # 使用专门的回调函数
+            fn=initial_load,
             inputs=[self.user_input],
             outputs=[
+                self.user_input,
                 self.user_status,
                 self.dataframe, self.count_display,
                 self.tab2_source_df, self.tab2_status, self.tab2_result_df,
-                self.tab3_data_df, self.tab3_stats
-            ]
+                *self._tab3_user_outputs()
+            ],
+            js=get_user_id_js
         )
 
-    def _get_custom_css(self) -> str:
-        """获取自定义CSS样式"""
-        return """
-        .voice-btn {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-            color: white !important;
-            border: none !important;
-            font-size: 18px !important;
-            padding: 20px !important;
-            font-weight: bold !important;
-        }
-        .continuous-btn {
-            background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%) !important;
-            color: white !important;
-            border: none !important;
-            font-size: 18px !important;
-            padding: 20px !important;
-            font-weight: bold !important;
-        }
-        .hidden-user-input {
-            display: none !important;
-        }
-        """
-
     def launch(self, **kwargs):
         """启动应用"""
         if self.app is None:
@@ -10,6 +10,16 @@ VOICE_RECOGNITION_JS = """
 window.voiceRecognition = null;
 window.isContinuousMode = false;
 window.isListening = false;
+// 连续模式识别出、尚未提交的文本
+window.voiceQueue = [];
+window.voiceFlushTimer = null;
+
+// 取出并清空待添加队列（JSON字符串，供批量添加事件作为输入）
+window.takeVoiceQueue = function() {
+    const texts = window.voiceQueue;
+    window.voiceQueue = [];
+    return JSON.stringify(texts);
+};
 
 // 单次语音识别
 window.startVoiceRecognition = function() {
@@ -121,17 +131,13 @@ window.startContinuousVoice = function() {
         const transcript = event.results[0][0].transcript;
         console.log('✅ Voice recognized:', transcript);
 
-        // 触发添加
-        setTimeout(() => {
-            const textbox = document.querySelector('textarea[placeholder*="语音输入"]');
-            const addBtn = Array.from(document.querySelectorAll('button')).find(
-                btn => btn.textContent.includes('添加到列表')
-            );
-
-            if (textbox && addBtn) {
-                textbox.value = transcript;
-                textbox.dispatchEvent(new Event('input', { bubbles: true }));
-                setTimeout(() => addBtn.click(), 100);
+        // 放入待添加队列，100ms内没有新结果时一次性提交（由隐藏的批量添加按钮读取队列）
+        window.voiceQueue.push(transcript);
+        clearTimeout(window.voiceFlushTimer);
+        window.voiceFlushTimer = setTimeout(() => {
+            const batchBtn = document.getElementById('mt_voice_batch_btn');
+            if (batchBtn) {
+                batchBtn.click();
             }
         }, 100);
     };
@@ -65,3 +65,205 @@ def test_parser_service_isolation(temp_data_dir):
     # Verify files
     assert (temp_data_dir / "structured_medicines_user_a.json").exists()
     assert (temp_data_dir / "structured_medicines_user_b.json").exists()
+
+def test_parser_service_view_cache_invalidation(temp_data_dir):
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+
+    row = [1, "Aspirin", "", "", 1, "", "", "", "", "Aspirin", "2025-01-01 10:00:00"]
+    service.update_from_dataframe("user_a", [row])
+    assert [r[1] for r in service.get_structured_dataframe("user_a")] == ["Aspirin"]
+    assert service.get_statistics("user_a")['total'] == 1
+
+    # Modifications through the service must not return stale cached views
+    service.update_from_dataframe("user_a", [row, [2, "Ibuprofen"] + row[2:]])
+    assert len(service.get_structured_dataframe("user_a")) == 2
+    assert service.get_statistics("user_a")['total'] == 2
+    assert service.get_structured_dataframe("user_b") == []
+
+    service.clear_all("user_a")
+    assert service.get_structured_dataframe("user_a") == []
+    assert service.get_statistics("user_a")['total'] == 0
+
+def test_parser_service_dataframe_page(temp_data_dir):
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+    rows = [[i, f"Drug{i}", "", "", 1, "", "", "", "", f"Drug{i}", "2025-01-01 10:00:00"] for i in range(1, 6)]
+    service.update_from_dataframe("user_a", rows)
+
+    page, total_pages = service.get_structured_dataframe_page("user_a", 1, page_size=2)
+    assert total_pages == 3
+    assert page == service.get_structured_dataframe("user_a")[:2]
+
+    # Out-of-range pages are clamped to the last page
+    page, _ = service.get_structured_dataframe_page("user_a", 9, page_size=2)
+    assert len(page) == 1
+    assert service.get_structured_dataframe_page("user_b", 1) == ([], 1)
+
+def test_parser_service_batch_dedup(temp_data_dir):
+    class CountingLLM:
+        def __init__(self):
+            self.requested = []
+
+        def parse_medicine_batch(self, texts):
+            self.requested.extend(texts)
+            return [{'drug_name': t.strip(), 'confidence': 0.9} for t in texts]
+
+    from src.models import Entry
+    llm = CountingLLM()
+    service = MedicineParserService(temp_data_dir, llm_client=llm)
+    entries = [Entry(id=0, text=t, timestamp="") for t in ["Aspirin", " Aspirin ", "Ibuprofen", "Aspirin"]]
+
+    success, failed = service.parse_batch(entries)
+    assert llm.requested == ["Aspirin", "Ibuprofen"]
+    assert [m.drug_name for m in success] == ["Aspirin", "Aspirin", "Ibuprofen", "Aspirin"]
+    assert failed == []
+
+    # Already parsed texts are served from the persisted cache
+    service.parse_batch(entries)
+    assert llm.requested == ["Aspirin", "Ibuprofen"]
+    assert (temp_data_dir / "llm_cache.json").exists()
+
+def test_parser_service_reload_on_file_change(temp_data_dir):
+    import os
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+    row = [1, "Aspirin", "", "", 1, "", "", "", "", "Aspirin", "2025-01-01 10:00:00"]
+    service.update_from_dataframe("user_a", [row])
+    service.save_structured_data("user_a")
+    cached = service._get_structured_list("user_a")
+
+    # Unchanged file: the cached list is kept
+    service.load_structured_data("user_a")
+    assert service._get_structured_list("user_a") is cached
+
+    # Written by another process: reloaded from disk
+    other = MedicineParserService(temp_data_dir, llm_client=object())
+    other.update_from_dataframe("user_a", [row, [2, "Ibuprofen"] + row[2:]])
+    other.save_structured_data("user_a")
+    path = temp_data_dir / "structured_medicines_user_a.json"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    service.load_structured_data("user_a")
+    assert len(service.get_structured_dataframe("user_a")) == 2
+
+def test_parser_service_query_dataframe(temp_data_dir):
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+    rows = [
+        [1, "Aspirin", "", "", 1, "", "", "", "2026-05", "Aspirin", "2025-01-01 10:00:00"],
+        [2, "Ibuprofen", "", "", 1, "", "", "", "2026-01", "Ibuprofen", "2025-01-01 10:00:00"],
+        [3, "aspirin C", "", "", 1, "", "", "", "", "aspirin C", "2025-01-01 10:00:00"],
+    ]
+    service.update_from_dataframe("user_a", rows)
+
+    # Filter and sort in one call; numbering follows the result order
+    result = service.query_dataframe("user_a", "ASPIRIN", "expiry_date")
+    assert [(r[0], r[1]) for r in result] == [(1, "Aspirin"), (2, "aspirin C")]
+    assert [r[1] for r in service.query_dataframe("user_a", "", "drug_name", reverse=True)] == \
+        ["aspirin C", "Ibuprofen", "Aspirin"]
+    assert service.query_dataframe("user_a") == service.get_structured_dataframe("user_a")
+
+def test_parser_service_pandas_matches_rows(temp_data_dir):
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+    assert service.get_structured_pandas("user_a").empty
+
+    rows = [[i, f"Drug{i}", "", "", float(i), "", "", "", "", f"Drug{i}", "2025-01-01 10:00:00"] for i in range(1, 4)]
+    service.update_from_dataframe("user_a", rows)
+    df = service.get_structured_pandas("user_a")
+    assert df.values.tolist() == service.get_structured_dataframe("user_a")
+    assert service.get_structured_pandas("user_a") is df
+
+def test_parser_service_concurrent_loads_read_once(temp_data_dir, monkeypatch):
+    import threading
+    import time
+    from src.storage import JSONStorage
+
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+    row = [1, "Aspirin", "", "", 1, "", "", "", "", "Aspirin", "2025-01-01 10:00:00"]
+    service.update_from_dataframe("user_a", [row])
+    service.save_structured_data("user_a")
+    service.sessions.clear()
+
+    loads = []
+    original_load = JSONStorage.load
+
+    def slow_load(self):
+        loads.append(self.file_path)
+        time.sleep(0.05)
+        return original_load(self)
+
+    monkeypatch.setattr(JSONStorage, "load", slow_load)
+    threads = [threading.Thread(target=service.load_structured_data, args=("user_a",)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert len(service.get_structured_dataframe("user_a")) == 1
+
+def test_parser_service_eviction_drops_user_state(temp_data_dir):
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+    service.sessions.maxsize = 2
+    row = [1, "Aspirin", "", "", 1, "", "", "", "", "Aspirin", "2025-01-01 10:00:00"]
+    for i in range(10):
+        user_id = f"user_{i}"
+        service.update_from_dataframe(user_id, [row])
+        service.get_structured_dataframe(user_id)
+        service.get_statistics(user_id)
+        service.query_dataframe(user_id, "asp")
+
+    # Evicted users leave no views (and no references to their lists) behind
+    assert list(service.sessions) == ["user_8", "user_9"]
+    assert set(service._view_cache) <= set(service.sessions)
+    assert set(service._file_mtimes) <= set(service.sessions)
+    assert set(service._load_locks) <= set(service.sessions)
+
+    # An evicted user is reloaded from disk on the next access
+    service.save_structured_data("user_9")
+    service.get_structured_dataframe("user_0")
+    assert "user_0" in service.sessions
+
+def test_parser_service_invalidate_during_view_updates(temp_data_dir):
+    import threading
+
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+    row = [1, "Aspirin", "", "", 1, "", "", "", "", "Aspirin", "2025-01-01 10:00:00"]
+    service.update_from_dataframe("user_a", [row])
+    errors = []
+
+    def read_views(n):
+        try:
+            for i in range(300):
+                service.format_statistics("user_a", f"{n}-{i}: {{total}}")
+        except Exception as e:
+            errors.append(e)
+
+    def invalidate():
+        try:
+            for _ in range(300):
+                service._invalidate("user_a")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read_views, args=(n,)) for n in range(3)]
+    threads.append(threading.Thread(target=invalidate))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert service.get_statistics("user_a")['total'] == 1
+
+def test_parser_service_query_cache_keeps_latest_only(temp_data_dir):
+    service = MedicineParserService(temp_data_dir, llm_client=object())
+    rows = [[i, f"Drug{i}", "", "", 1, "", "", "", "", f"Drug{i}", "2025-01-01 10:00:00"] for i in range(1, 4)]
+    service.update_from_dataframe("user_a", rows)
+
+    # Each keystroke prefix replaces the previous query instead of adding an entry
+    for prefix in ["D", "Dr", "Dru", "Drug"]:
+        service.query_dataframe("user_a", prefix, "drug_name")
+    assert list(service._view_cache["user_a"]) == ['query']
+
+    # Paging through the same query reuses the cached rows
+    result = service.query_dataframe("user_a", "Drug", "drug_name")
+    assert service.query_dataframe("user_a", "Drug", "drug_name") is result
+    assert [r[1] for r in service.query_dataframe("user_a", "Drug2", "drug_name")] == ["Drug2"]
@@ -41,6 +41,15 @@ class TestEntry:
 
         assert row == [5, "药品C", "2025-01-03 12:00:00", 789]
 
+    def test_entry_display_text(self):
+        """测试显示文本截断，修改text后重新计算且不影响to_dict"""
+        entry = Entry(id=790, text="药" * 41, timestamp="2025-01-03 12:00:00")
+        assert entry.display_text == "药" * 40 + "..."
+
+        entry.text = "药品D"
+        assert entry.display_text == "药品D"
+        assert entry.to_dict() == {'id': 790, 'text': "药品D", 'timestamp': "2025-01-03 12:00:00"}
+
 
 class TestEntryList:
     """测试EntryList类"""
@@ -230,3 +239,71 @@ class TestEntryList:
 
         found = entry_list.get_by_id(999999)
         assert found is None
+
+    def test_to_dataframe_after_mutations(self):
+        """测试增删改及直接替换entries之后to_dataframe与重新构建的结果一致"""
+        entry_list = EntryList([
+            Entry(id=5001, text="药品1", timestamp="2025-01-01 10:00:00"),
+            Entry(id=5002, text="药品2", timestamp="2025-01-01 11:00:00"),
+        ])
+        entry_list.to_dataframe()
+
+        added = entry_list.add("药品3")
+        assert entry_list.to_dataframe()[0] == [3, "药品3", added.timestamp, added.id]
+
+        entry_list.update_by_id(5002, "药品2改")
+        entry_list.delete_by_id(5001)
+        assert entry_list.to_dataframe() == EntryList(entry_list.get_all()).to_dataframe()
+
+        entry_list.entries = [Entry(id=5003, text="药品4", timestamp="2025-01-02 10:00:00")]
+        assert entry_list.to_dataframe() == [[1, "药品4", "2025-01-02 10:00:00", 5003]]
+
+    def test_id_index_after_mutations(self):
+        """测试增删、清空及直接替换entries之后按ID查找仍然正确"""
+        entry_list = EntryList([
+            Entry(id=6001, text="药品1", timestamp="2025-01-01 10:00:00"),
+            Entry(id=6001, text="药品1重复", timestamp="2025-01-01 10:00:01"),
+        ])
+        assert entry_list.get_by_id(6001).text == "药品1"
+
+        added = entry_list.add("药品2")
+        assert entry_list.get_by_id(added.id) is added
+
+        # 重复ID的条目一并删除
+        assert entry_list.delete_by_id(6001)
+        assert entry_list.get_by_id(6001) is None
+        assert entry_list.count() == 1
+        assert not entry_list.delete_by_id(6001)
+
+        entry_list.entries = [Entry(id=6002, text="药品3", timestamp="2025-01-02 10:00:00")]
+        assert entry_list.get_by_id(added.id) is None
+        assert entry_list.update_by_id(6002, "药品3改")
+        assert entry_list.get_by_id(6002).text == "药品3改"
+
+        entry_list.clear()
+        assert entry_list.get_by_id(6002) is None
+
+    def test_add_many(self):
+        """测试批量添加：ID不重复，表格缓存同步更新，存在空内容时不做修改"""
+        entry_list = EntryList()
+        entry_list.add("药品1")
+        entry_list.to_dataframe()
+
+        added = entry_list.add_many(["药品2", "药品3"])
+        assert len({e.id for e in added}) == 2
+        assert entry_list.to_dataframe() == EntryList(entry_list.get_all()).to_dataframe()
+        assert entry_list.get_by_id(added[1].id) is added[1]
+
+        with pytest.raises(ValueError):
+            entry_list.add_many(["药品4", "  "])
+        assert entry_list.count() == 3
+
+    def test_add_many_consecutive_batches(self):
+        """测试连续两批批量添加的ID互不重复"""
+        entry_list = EntryList()
+        first = entry_list.add_many(["药品1", "药品2", "药品3"])
+        second = entry_list.add_many(["药品4", "药品5"])
+
+        ids = [e.id for e in first + second]
+        assert len(set(ids)) == 5
+        assert ids == sorted(ids)
@@ -0,0 +1,57 @@
+"""
+测试parser_cache模块
+"""
+
+from src.parser_cache import ParserCache
+
+
+class TestParserCache:
+    """测试ParserCache类"""
+
+    def test_put_get_and_persist(self, tmp_path):
+        """测试写入、按文本查询及持久化"""
+        cache = ParserCache(tmp_path / "cache.json")
+        assert cache.get("阿司匹林 100mg") is None
+
+        cache.put("阿司匹林 100mg", {'drug_name': "阿司匹林"})
+        assert cache.get("  阿司匹林 100mg ") == {'drug_name': "阿司匹林"}
+        assert cache.save() is True
+
+        reloaded = ParserCache(tmp_path / "cache.json")
+        assert reloaded.get("阿司匹林 100mg") == {'drug_name': "阿司匹林"}
+
+    def test_lru_eviction(self, tmp_path):
+        """测试超过容量时淘汰最久未使用的条目"""
+        cache = ParserCache(tmp_path / "cache.json", max_entries=2)
+        cache.put("药品1", {'drug_name': "药品1"})
+        cache.put("药品2", {'drug_name': "药品2"})
+        cache.get("药品1")
+        cache.put("药品3", {'drug_name': "药品3"})
+
+        assert len(cache) == 2
+        assert cache.get("药品2") is None
+        assert cache.get("药品1") is not None
+        assert cache.get("药品3") is not None
+
+    def test_save_is_atomic(self, tmp_path, monkeypatch):
+        """测试写入中途失败时保留原缓存文件，不留下临时文件"""
+        cache = ParserCache(tmp_path / "cache.json")
+        cache.put("药品1", {'drug_name': "药品1"})
+        assert cache.save() is True
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        cache.put("药品2", {'drug_name': "药品2"})
+        monkeypatch.setattr("src.parser_cache.os.replace", fail_replace)
+        assert cache.save() is False
+        monkeypatch.undo()
+
+        reloaded = ParserCache(tmp_path / "cache.json")
+        assert reloaded.get("药品1") == {'drug_name': "药品1"}
+        assert reloaded.get("药品2") is None
+        assert not (tmp_path / "cache.json.tmp").exists()
+
+        # 失败后仍标记为未保存，下次保存时写出
+        assert cache.save() is True
+        assert ParserCache(tmp_path / "cache.json").get("药品2") == {'drug_name': "药品2"}
@@ -4,16 +4,18 @@
 
 import pytest
 from pathlib import Path
-from src.storage import JSONStorage
-from src.service import EntryService
+from src.service import EntryService, _normalize_uid
+
+
+USER = "tester"
 
 
 @pytest.fixture
 def temp_service(tmp_path):
-    """创建临时服务"""
-    file_path = tmp_path / "test_entries.json"
-    storage = JSONStorage(file_path)
-    return EntryService(storage)
+    """创建临时服务（数据写在临时目录中）"""
+    service = EntryService(tmp_path)
+    yield service
+    service.flush_all()
 
 
 class TestEntryService:
@@ -21,7 +23,7 @@ class TestEntryService:
 
     def test_add_entry(self, temp_service):
         """测试添加条目"""
-        status, df_data, count, text = temp_service.add_entry("测试药品1")
+        status, df_data, count, text = temp_service.add_entry("测试药品1", USER)
 
         assert "✅" in status
         assert len(df_data) == 1
@@ -30,26 +32,55 @@ class TestEntryService:
 
     def test_add_empty_entry(self, temp_service):
         """测试添加空条目"""
-        status, df_data, count, text = temp_service.add_entry("")
+        status, df_data, count, text = temp_service.add_entry("", USER)
 
         assert "❌" in status
         assert len(df_data) == 0
 
     def test_add_multiple_entries(self, temp_service):
         """测试添加多个条目"""
-        temp_service.add_entry("药品1")
-        temp_service.add_entry("药品2")
-        status, df_data, count, _ = temp_service.add_entry("药品3")
+        temp_service.add_entry("药品1", USER)
+        temp_service.add_entry("药品2", USER)
+        status, df_data, count, _ = temp_service.add_entry("药品3", USER)
 
         assert len(df_data) == 3
         assert "3" in count
 
+    def test_add_entries(self, temp_service):
+        """测试批量添加条目，忽略空内容，每条分配不同的ID"""
+        status, df_data, count = temp_service.add_entries(["药品1", "", "  ", "药品2", "药品3"], USER)
+
+        assert "3" in status
+        assert len(df_data) == 3
+        entries = temp_service.get_entries(USER)
+        assert sorted(e.text for e in entries) == ["药品1", "药品2", "药品3"]
+        assert len({e.id for e in entries}) == 3
+
+    def test_add_entries_empty(self, temp_service):
+        """测试批量添加全部为空内容"""
+        status, df_data, count = temp_service.add_entries(["", "  "], USER)
+
+        assert "❌" in status
+        assert len(df_data) == 0
+
+    def test_add_entries_persistence(self, temp_service):
+        """测试批量添加的条目写盘后重新加载不重复（新用户与已有用户）"""
+        temp_service.add_entries(["药品1", "药品2"], USER)
+        temp_service.flush_all()
+        temp_service.add_entries(["药品3", "药品4"], USER)
+        temp_service.flush_all()
+
+        entries = EntryService(temp_service.data_dir).get_entries(USER)
+        assert sorted(e.text for e in entries) == ["药品1", "药品2", "药品3", "药品4"]
+        assert sorted(e.id for e in entries) == sorted(e.id for e in temp_service.get_entries(USER))
+        assert len({e.id for e in entries}) == 4
+
     def test_clear_all(self, temp_service):
         """测试清空所有"""
-        temp_service.add_entry("药品1")
-        temp_service.add_entry("药品2")
+        temp_service.add_entry("药品1", USER)
+        temp_service.add_entry("药品2", USER)
 
-        status, df_data, count = temp_service.clear_all()
+        status, df_data, count = temp_service.clear_all(USER)
 
         assert "✅" in status
         assert len(df_data) == 0
@@ -57,10 +88,10 @@ class TestEntryService:
 
     def test_get_dataframe(self, temp_service):
         """测试获取Dataframe数据"""
-        temp_service.add_entry("药品A")
-        temp_service.add_entry("药品B")
+        temp_service.add_entry("药品A", USER)
+        temp_service.add_entry("药品B", USER)
 
-        df_data = temp_service.get_dataframe()
+        df_data = temp_service.get_dataframe(USER)
         assert len(df_data) == 2
         # 验证倒序
         assert df_data[0][1] == "药品B"
@@ -68,33 +99,33 @@ class TestEntryService:
 
     def test_get_count(self, temp_service):
         """测试获取统计"""
-        count = temp_service.get_count()
+        count = temp_service.get_count(USER)
         assert "0" in count
 
-        temp_service.add_entry("药品1")
-        count = temp_service.get_count()
+        temp_service.add_entry("药品1", USER)
+        count = temp_service.get_count(USER)
         assert "1" in count
 
     def test_refresh(self, temp_service):
         """测试刷新"""
-        temp_service.add_entry("药品1")
+        temp_service.add_entry("药品1", USER)
 
         # 刷新应该重新加载数据
-        df_data, count = temp_service.refresh()
+        df_data, count = temp_service.refresh(USER)
         assert len(df_data) == 1
         assert "1" in count
 
     def test_export_to_text(self, temp_service):
         """测试导出文本"""
         # 空列表导出应该返回None
-        result = temp_service.export_to_text()
+        result = temp_service.export_to_text(USER)
         assert result is None
 
         # 添加数据后导出
-        temp_service.add_entry("药品1")
-        temp_service.add_entry("药品2")
+        temp_service.add_entry("药品1", USER)
+        temp_service.add_entry("药品2", USER)
 
-        filepath = temp_service.export_to_text()
+        filepath = temp_service.export_to_text(USER)
         assert filepath is not None
 
         # 验证文件内容
@@ -109,14 +140,15 @@ class TestEntryService:
     def test_data_persistence(self, temp_service):
         """测试数据持久化"""
         # 添加数据
-        temp_service.add_entry("药品X")
-        temp_service.add_entry("药品Y")
+        temp_service.add_entry("药品X", USER)
+        temp_service.add_entry("药品Y", USER)
 
-        # 创建新服务实例（模拟重启应用）
-        new_service = EntryService(temp_service.storage)
+        # 创建新服务实例（模拟重启应用：退出前写出延迟保存的修改）
+        temp_service.flush_all()
+        new_service = EntryService(temp_service.data_dir)
 
         # 验证数据还在
-        df_data = new_service.get_dataframe()
+        df_data = new_service.get_dataframe(USER)
         assert len(df_data) == 2
         assert df_data[0][1] == "药品Y"
         assert df_data[1][1] == "药品X"
@@ -124,24 +156,24 @@ class TestEntryService:
     def test_delete_entry(self, temp_service):
         """测试删除条目"""
         # 先清空
-        temp_service.clear_all()
+        temp_service.clear_all(USER)
 
         # 添加一些数据并获取所有ID
         import time
-        temp_service.add_entry("药品1")
+        temp_service.add_entry("药品1", USER)
         time.sleep(0.001)  # 确保时间戳不同
-        temp_service.add_entry("药品2")
+        temp_service.add_entry("药品2", USER)
         time.sleep(0.001)
-        temp_service.add_entry("药品3")
+        temp_service.add_entry("药品3", USER)
 
         # 获取当前所有数据
-        df_data = temp_service.get_dataframe()
+        df_data = temp_service.get_dataframe(USER)
 
         # 删除第二条（df_data是倒序的，所以索引1是倒数第二条，即药品2）
         entry_id = df_data[1][3]  # 第二行的ID列
 
         # 删除
-        status, df_data, count = temp_service.delete_entry(entry_id)
+        status, df_data, count = temp_service.delete_entry(entry_id, USER)
 
         assert "✅" in status
         assert len(df_data) == 2
@@ -154,67 +186,67 @@ class TestEntryService:
 
     def test_delete_entry_not_found(self, temp_service):
         """测试删除不存在的条目"""
-        temp_service.add_entry("药品1")
+        temp_service.add_entry("药品1", USER)
 
-        status, _, _ = temp_service.delete_entry(999999)
+        status, _, _ = temp_service.delete_entry(999999, USER)
         assert "❌" in status
 
     def test_delete_entry_no_selection(self, temp_service):
         """测试未选择条目时删除"""
-        status, _, _ = temp_service.delete_entry(None)
+        status, _, _ = temp_service.delete_entry(None, USER)
         assert "❌" in status
         assert "选择" in status
 
     def test_update_entry(self, temp_service):
         """测试更新条目"""
         # 添加数据
-        _, df_data, _, _ = temp_service.add_entry("原始药品")
+        _, df_data, _, _ = temp_service.add_entry("原始药品", USER)
 
         # 获取ID
         entry_id = df_data[0][3]
 
         # 更新
-        status, df_data, count, _ = temp_service.update_entry(entry_id, "更新后的药品")
+        status, df_data, count, _ = temp_service.update_entry(entry_id, "更新后的药品", USER)
 
         assert "✅" in status
         assert df_data[0][1] == "更新后的药品"
 
     def test_update_entry_empty_text(self, temp_service):
         """测试更新为空文本"""
-        _, df_data, _, _ = temp_service.add_entry("药品1")
+        _, df_data, _, _ = temp_service.add_entry("药品1", USER)
         entry_id = df_data[0][3]
 
-        status, _, _, _ = temp_service.update_entry(entry_id, "")
+        status, _, _, _ = temp_service.update_entry(entry_id, "", USER)
         assert "❌" in status
 
-        status, _, _, _ = temp_service.update_entry(entry_id, "   ")
+        status, _, _, _ = temp_service.update_entry(entry_id, "   ", USER)
         assert "❌" in status
 
     def test_update_entry_not_found(self, temp_service):
         """测试更新不存在的条目"""
-        temp_service.add_entry("药品1")
+        temp_service.add_entry("药品1", USER)
 
-        status, _, _, _ = temp_service.update_entry(999999, "新文本")
+        status, _, _, _ = temp_service.update_entry(999999, "新文本", USER)
         assert "❌" in status
 
     def test_update_entry_no_selection(self, temp_service):
         """测试未选择条目时更新"""
-        status, _, _, _ = temp_service.update_entry(None, "新文本")
+        status, _, _, _ = temp_service.update_entry(None, "新文本", USER)
         assert "❌" in status
         assert "选择" in status
 
     def test_get_entry_choices(self, temp_service):
         """测试获取条目选择列表"""
         # 空列表
-        choices = temp_service.get_entry_choices()
+        choices = temp_service.get_entry_choices(USER)
         assert choices == []
 
         # 添加数据
-        temp_service.add_entry("药品A")
-        temp_service.add_entry("药品B")
-        temp_service.add_entry("药品C")
+        temp_service.add_entry("药品A", USER)
+        temp_service.add_entry("药品B", USER)
+        temp_service.add_entry("药品C", USER)
 
-        choices = temp_service.get_entry_choices()
+        choices = temp_service.get_entry_choices(USER)
         assert len(choices) == 3
 
         # 验证格式 (显示文本, ID)
@@ -228,37 +260,37 @@ class TestEntryService:
     def test_get_entry_text(self, temp_service):
         """测试获取条目文本"""
         # 添加数据
-        _, df_data, _, _ = temp_service.add_entry("测试药品")
+        _, df_data, _, _ = temp_service.add_entry("测试药品", USER)
         entry_id = df_data[0][3]
 
         # 获取文本
-        text = temp_service.get_entry_text(entry_id)
+        text = temp_service.get_entry_text(entry_id, USER)
         assert text == "测试药品"
 
     def test_get_entry_text_not_found(self, temp_service):
         """测试获取不存在的条目文本"""
-        text = temp_service.get_entry_text(999999)
+        text = temp_service.get_entry_text(999999, USER)
         assert text == ""
 
     def test_get_entry_text_none(self, temp_service):
         """测试传入None"""
-        text = temp_service.get_entry_text(None)
+        text = temp_service.get_entry_text(None, USER)
         assert text == ""
 
     def test_save_dataframe(self, temp_service):
         """测试保存Dataframe编辑"""
         # 添加初始数据
-        temp_service.add_entry("药品1")
-        temp_service.add_entry("药品2")
+        temp_service.add_entry("药品1", USER)
+        temp_service.add_entry("药品2", USER)
 
         # 获取当前dataframe
-        df_data = temp_service.get_dataframe()
+        df_data = temp_service.get_dataframe(USER)
 
         # 模拟编辑: 修改第一条的文本
         df_data[0][1] = "修改后的药品2"
 
         # 保存
-        status, new_df, count = temp_service.save_dataframe(df_data)
+        status, new_df, count = temp_service.save_dataframe(df_data, USER)
 
         assert "✅" in status
         assert new_df[0][1] == "修改后的药品2"
@@ -267,20 +299,20 @@ class TestEntryService:
         """测试通过Dataframe删除行"""
         # 添加3条数据
         import time
-        temp_service.add_entry("药品1")
+        temp_service.add_entry("药品1", USER)
         time.sleep(0.001)
-        temp_service.add_entry("药品2")
+        temp_service.add_entry("药品2", USER)
         time.sleep(0.001)
-        temp_service.add_entry("药品3")
+        temp_service.add_entry("药品3", USER)
 
         # 获取dataframe
-        df_data = temp_service.get_dataframe()
+        df_data = temp_service.get_dataframe(USER)
 
         # 删除中间一行（索引1）
         df_data.pop(1)
 
         # 保存
-        status, new_df, count = temp_service.save_dataframe(df_data)
+        status, new_df, count = temp_service.save_dataframe(df_data, USER)
 
         assert "✅" in status
         assert len(new_df) == 2
@@ -288,10 +320,10 @@ class TestEntryService:
 
     def test_save_dataframe_empty(self, temp_service):
         """测试保存空Dataframe"""
-        temp_service.add_entry("药品1")
+        temp_service.add_entry("药品1", USER)
 
         # 保存空列表
-        status, new_df, count = temp_service.save_dataframe([])
+        status, new_df, count = temp_service.save_dataframe([], USER)
 
         assert "✅" in status
         assert len(new_df) == 0
@@ -299,11 +331,11 @@ class TestEntryService:
 
     def test_save_dataframe_with_none_values(self, temp_service):
         """测试保存包含None值的Dataframe（模拟Gradio删除行为）"""
-        temp_service.add_entry("药品1")
-        temp_service.add_entry("药品2")
+        temp_service.add_entry("药品1", USER)
+        temp_service.add_entry("药品2", USER)
 
         # 获取dataframe
-        df_data = temp_service.get_dataframe()
+        df_data = temp_service.get_dataframe(USER)
 
         # 模拟Gradio返回的数据：包含None值的行
         df_data_with_none = [
@@ -312,7 +344,7 @@ class TestEntryService:
             [3, "药品C", "2025-01-01 12:00:00", 12347],
         ]
 
-        status, new_df, count = temp_service.save_dataframe(df_data_with_none)
+        status, new_df, count = temp_service.save_dataframe(df_data_with_none, USER)
 
         assert "✅" in status
         assert len(new_df) == 2  # None行被跳过
@@ -326,7 +358,7 @@ class TestEntryService:
             [1, "药品1", "2025-01-01 10:00:00", "12345"],  # ID是字符串
         ]
 
-        status, new_df, count = temp_service.save_dataframe(df_data)
+        status, new_df, count = temp_service.save_dataframe(df_data, USER)
 
         assert "✅" in status
         assert len(new_df) == 2
@@ -342,7 +374,7 @@ class TestEntryService:
             [3, "药品3", "2025-01-01 12:00:00", 12347],
         ]
 
-        status, new_df, count = temp_service.save_dataframe(df_data)
+        status, new_df, count = temp_service.save_dataframe(df_data, USER)
 
         assert "✅" in status
         assert len(new_df) == 2  # "None"行被跳过
@@ -360,11 +392,11 @@ class TestEntryService:
             pytest.skip("pandas not installed")
 
         # 添加一些初始数据
-        temp_service.add_entry("药品1")
-        temp_service.add_entry("药品2")
+        temp_service.add_entry("药品1", USER)
+        temp_service.add_entry("药品2", USER)
 
         # 获取dataframe
-        df_list = temp_service.get_dataframe()
+        df_list = temp_service.get_dataframe(USER)
 
         # 转换为pandas DataFrame（模拟Gradio的行为）
         df_pandas = pd.DataFrame(df_list, columns=["#", "药品信息", "录入时间", "ID"])
@@ -373,8 +405,124 @@ class TestEntryService:
         df_pandas.loc[0, "药品信息"] = "修改后的药品2"
 
         # 保存
-        status, new_df, count = temp_service.save_dataframe(df_pandas)
+        status, new_df, count = temp_service.save_dataframe(df_pandas, USER)
 
         assert "✅" in status
         assert len(new_df) == 2
         assert new_df[0][1] == "修改后的药品2"
+
+
+class TestDelayedSave:
+    """测试延迟写盘"""
+
+    @staticmethod
+    def _count_appends(monkeypatch):
+        """统计JournaledStorage.append_many的调用次数"""
+        from src.storage import JournaledStorage
+        calls = []
+        original = JournaledStorage.append_many
+
+        def counting(self, ops):
+            calls.append(list(ops))
+            return original(self, ops)
+
+        monkeypatch.setattr(JournaledStorage, "append_many", counting)
+        return calls
+
+    def test_debounce_coalesces_writes(self, tmp_path, monkeypatch):
+        """测试延迟时间内的多次修改合并为一次追加写入"""
+        import time
+        service = EntryService(tmp_path, save_delay=0.05)
+        service.add_entry("药品0", USER)  # 新用户立即写出快照
+        calls = self._count_appends(monkeypatch)
+
+        for i in range(1, 4):
+            service.add_entry(f"药品{i}", USER)
+
+        deadline = time.time() + 5
+        while not calls and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+
+        assert len(calls) == 1
+        assert [op["entry"]["text"] for op in calls[0]] == ["药品1", "药品2", "药品3"]
+        assert len(EntryService(tmp_path).get_entries(USER)) == 4
+
+    def test_flush_writes_immediately(self, tmp_path):
+        """测试flush()不等待延迟，立即写出未保存的修改"""
+        service = EntryService(tmp_path, save_delay=60)
+        service.add_entry("药品1", USER)
+        service.add_entry("药品2", USER)
+        assert len(EntryService(tmp_path).get_entries(USER)) == 1
+
+        assert service.flush(USER)
+        assert [e.text for e in EntryService(tmp_path).get_entries(USER)] == ["药品1", "药品2"]
+
+    def test_exit_hook_flushes_live_services(self, tmp_path):
+        """测试进程退出钩子写出存活实例未保存的修改"""
+        from src import service as service_module
+        service = EntryService(tmp_path, save_delay=60)
+        service.add_entry("药品1", USER)
+        service.add_entry("药品2", USER)
+        assert service in service_module._live_services
+
+        service_module._flush_live_services()
+
+        assert len(EntryService(tmp_path).get_entries(USER)) == 2
+
+    def test_eviction_flushes_pending_writes(self, tmp_path):
+        """测试LRU淘汰用户前写出该用户未保存的修改"""
+        service = EntryService(tmp_path, save_delay=60)
+        service.sessions.maxsize = 1
+        service.add_entry("药品1", "alice")
+        service.add_entry("药品2", "alice")
+        assert len(EntryService(tmp_path).get_entries("alice")) == 1
+
+        service.add_entry("药品3", "bob")
+
+        assert "alice" not in service.sessions
+        assert [e.text for e in EntryService(tmp_path).get_entries("alice")] == ["药品1", "药品2"]
+        assert [e.text for e in service.get_entries("alice")] == ["药品1", "药品2"]
+
+
+class TestNormalizeUid:
+    """测试_normalize_uid装饰器"""
+
+    class Dummy:
+        @_normalize_uid
+        def positional(self, text, user_id):
+            return text, user_id
+
+        @_normalize_uid
+        def keyword_only(self, text, *, user_id, flag=False):
+            return text, user_id, flag
+
+        @_normalize_uid
+        def with_default(self, user_id=None):
+            return user_id
+
+    def test_positional(self):
+        """测试按位置传入的user_id被规范化"""
+        assert self.Dummy().positional("a", "  bob ") == ("a", "bob")
+        assert self.Dummy().positional("a", "") == ("a", "default")
+
+    def test_keyword(self):
+        """测试按关键字传入的user_id被规范化，其余参数不变"""
+        assert self.Dummy().positional(text="a", user_id=" bob") == ("a", "bob")
+        assert self.Dummy().keyword_only("a", user_id=None, flag=True) == ("a", "default", True)
+
+    def test_default_value(self):
+        """测试使用默认值的user_id同样被规范化"""
+        assert self.Dummy().with_default() == "default"
+
+    def test_missing_user_id_param(self):
+        """测试装饰没有user_id参数的方法时报错"""
+        with pytest.raises(TypeError):
+            _normalize_uid(lambda self, text: text)
+
+    def test_service_keyword_call(self, temp_service):
+        """测试服务方法按关键字传入的user_id与位置传入的等价"""
+        temp_service.add_entry("药品1", user_id=f"  {USER} ")
+        temp_service.add_entry(text="药品2", user_id=USER)
+
+        assert len(temp_service.get_entries(user_id=USER)) == 2
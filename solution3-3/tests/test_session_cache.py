@@ -0,0 +1,22 @@
+"""
+测试session_cache模块
+"""
+
+from src.session_cache import LRUSessionCache
+
+
+class TestLRUSessionCache:
+    """测试LRUSessionCache类"""
+
+    def test_evicts_least_recently_used(self):
+        """测试超过容量时淘汰最久未访问的用户，淘汰回调时该用户仍在缓存中"""
+        evicted = []
+        cache = LRUSessionCache(maxsize=2, on_evict=lambda uid: evicted.append((uid, cache[uid])))
+        cache['a'] = 1
+        cache['b'] = 2
+        assert cache['a'] == 1
+        cache['c'] = 3
+
+        assert evicted == [('b', 2)]
+        assert list(cache) == ['a', 'c']
+        assert 'b' not in cache
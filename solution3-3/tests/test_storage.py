@@ -3,9 +3,11 @@
 """
 
 import json
+import os
+import time
 import pytest
 from pathlib import Path
-from src.storage import JSONStorage
+from src.storage import JSONStorage, JournaledStorage, cleanup_old_files
 
 
 @pytest.fixture
@@ -94,3 +96,121 @@ class TestJSONStorage:
         success = storage.save([{'id': 1, 'text': "test"}])
         assert success is True
         assert nested_path.exists()
+
+    def test_save_pretty(self, temp_storage):
+        """测试默认紧凑格式，pretty=True时缩进排版，两者内容一致"""
+        test_data = [{'id': 1, 'text': "药品1"}]
+
+        temp_storage.save(test_data)
+        compact = temp_storage.file_path.read_text(encoding='utf-8')
+        assert "\n" not in compact
+
+        temp_storage.save(test_data, pretty=True)
+        pretty = temp_storage.file_path.read_text(encoding='utf-8')
+        assert "\n  " in pretty
+        assert json.loads(compact) == json.loads(pretty) == test_data
+
+
+    def test_save_leaves_no_temp_file(self, tmp_path):
+        """测试原子保存后不残留临时文件"""
+        storage = JSONStorage(tmp_path / "entries.json")
+        storage.save([{'id': 1}])
+        storage.save([{'id': 2}])
+
+        assert not [p for p in tmp_path.iterdir() if p.name.endswith('.tmp')]
+        assert storage.load() == [{'id': 2}]
+
+class TestJournaledStorage:
+    """测试JournaledStorage类"""
+
+    def test_append_requires_snapshot(self, tmp_path):
+        """测试快照不存在时追加失败，由调用方整体保存"""
+        storage = JournaledStorage(tmp_path / "entries.json")
+        assert storage.append({'op': 'add', 'entry': {'id': 1, 'text': "药品1"}}) is False
+
+        assert storage.save([]) is True
+        assert storage.append({'op': 'add', 'entry': {'id': 1, 'text': "药品1"}}) is True
+
+    def test_replay_journal(self, tmp_path):
+        """测试加载时在快照上重放增删改，并合并回快照"""
+        storage = JournaledStorage(tmp_path / "entries.json")
+        storage.save([{'id': 1, 'text': "药品1"}, {'id': 2, 'text': "药品2"}])
+        storage.append({'op': 'add', 'entry': {'id': 3, 'text': "药品3"}})
+        storage.append({'op': 'update', 'id': 2, 'fields': {'text': "药品2改"}})
+        storage.append({'op': 'delete', 'id': 1})
+
+        expected = [{'id': 2, 'text': "药品2改"}, {'id': 3, 'text': "药品3"}]
+        assert storage.load() == expected
+        assert not storage.journal_path.exists()
+        assert storage.snapshot.load() == expected
+
+    def test_skip_truncated_line(self, tmp_path):
+        """测试跳过写了一半的日志行"""
+        storage = JournaledStorage(tmp_path / "entries.json")
+        storage.save([{'id': 1, 'text': "药品1"}])
+        storage.append({'op': 'delete', 'id': 1})
+        with open(storage.journal_path, 'ab') as f:
+            f.write(b'{"op":"add","entry":{"id":2')
+
+        assert storage.load() == []
+
+    def test_append_after_truncated_line(self, tmp_path):
+        """测试日志末尾是写了一半的行时，之后追加的记录不会接在半行后面而丢失"""
+        storage = JournaledStorage(tmp_path / "entries.json")
+        storage.save([{'id': 1, 'text': "药品1"}])
+        storage.append({'op': 'add', 'entry': {'id': 2, 'text': "药品2"}})
+        with open(storage.journal_path, 'ab') as f:
+            f.write(b'{"op":"add","entry":{"id":3')
+
+        assert storage.append({'op': 'add', 'entry': {'id': 4, 'text': "药品4"}}) is True
+
+        assert [item['id'] for item in storage.load()] == [1, 2, 4]
+
+    def test_missing_snapshot_is_not_rebuilt_from_journal(self, tmp_path):
+        """测试快照丢失时不在空列表上重放日志，日志改名保留"""
+        storage = JournaledStorage(tmp_path / "entries.json")
+        storage.save([{'id': 1, 'text': "药品1"}])
+        storage.append({'op': 'add', 'entry': {'id': 2, 'text': "药品2"}})
+        storage.snapshot.file_path.unlink()
+
+        assert storage.load() == []
+        assert not storage.snapshot.exists()
+        assert not storage.journal_path.exists()
+        assert (tmp_path / "entries.journal.jsonl.orphan").exists()
+
+
+class TestCleanupOldFiles:
+    """测试cleanup_old_files"""
+
+    @staticmethod
+    def _age(path, days):
+        old = time.time() - days * 86400
+        os.utime(path, (old, old))
+
+    def test_recent_journal_keeps_old_snapshot(self, tmp_path):
+        """测试快照很久没重写但日志是新的：整组文件保留，数据完整"""
+        storage = JournaledStorage(tmp_path / "voice_entries_u.json")
+        storage.save([{'id': i, 'text': f"药品{i}"} for i in range(100)])
+        storage.append({'op': 'add', 'entry': {'id': 100, 'text': "药品100"}})
+        self._age(storage.snapshot.file_path, 60)
+        if storage.snapshot.sidecar_path.exists():
+            self._age(storage.snapshot.sidecar_path, 60)
+
+        cleanup_old_files(tmp_path, days=30)
+
+        assert storage.snapshot.exists()
+        assert len(storage.load()) == 101
+
+    def test_expired_group_removed_together(self, tmp_path):
+        """测试整组文件都过期时一起删除，其他文件不受影响"""
+        storage = JournaledStorage(tmp_path / "voice_entries_u.json")
+        storage.save([{'id': 1, 'text': "药品1"}])
+        storage.append({'op': 'delete', 'id': 1})
+        other = tmp_path / "notes.json"
+        other.write_text("[]", encoding='utf-8')
+        for path in tmp_path.iterdir():
+            self._age(path, 60)
+
+        cleanup_old_files(tmp_path, days=30)
+
+        assert [p.name for p in tmp_path.iterdir()] == ["notes.json"]
@@ -5,8 +5,9 @@
 Medicine Voice Collector V3 - Main Application Entry
 """
 
+import atexit
 import logging
-from src.storage import JSONStorage
+from src.storage import JSONStorage, MsgpackStorage, BufferedJSONStorage
 from src.service import EntryService
 from src.ui import GradioUI
 import config
@@ -46,11 +47,18 @@ def main():
 
     # 初始化存储层
     logger.info("初始化存储层...")
-    storage = JSONStorage(config.DATA_FILE)
+    try:
+        inner = MsgpackStorage(config.DATA_FILE_MSGPACK, legacy_path=config.DATA_FILE)
+    except ImportError:
+        inner = JSONStorage(config.DATA_FILE, pretty=config.DATA_FILE_PRETTY)
+    logger.info(f"数据快照: {inner.file_path}")
+    # 连续的修改合并写入，退出时写出最后一批
+    storage = BufferedJSONStorage(inner)
 
     # 初始化服务层
     logger.info("初始化服务层...")
     service = EntryService(storage)
+    atexit.register(service.flush)
 
     # 初始化UI层
     logger.info("初始化UI层...")
@@ -15,6 +15,10 @@ DATA_DIR.mkdir(exist_ok=True)
 
 # 数据文件路径
 DATA_FILE = DATA_DIR / "voice_entries.json"
+# 数据文件是否缩进排版（调试时便于人工查看；默认紧凑格式，读写更快）
+DATA_FILE_PRETTY = False
+# 安装了msgpack时快照改用二进制格式（更快、更小），首次启动从DATA_FILE迁移；未安装时继续使用DATA_FILE
+DATA_FILE_MSGPACK = DATA_DIR / "voice_entries.msgpack"
 
 # 服务器配置
 SERVER_NAME = "0.0.0.0"
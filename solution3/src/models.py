@@ -3,14 +3,28 @@
 定义Entry和EntryList数据结构
 """
 
-from dataclasses import dataclass, asdict
+import threading
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 
 
-@dataclass
+# 本进程上一次分配的条目ID：ID是毫秒时间戳，同一毫秒内创建多条时依次加1，保证不重复
+_last_id = 0
+_id_lock = threading.Lock()
+
+
+def _next_id(now: datetime) -> int:
+    """根据当前时间分配新的条目ID（单调递增，进程内不重复）"""
+    global _last_id
+    with _id_lock:
+        _last_id = max(int(now.timestamp() * 1000), _last_id + 1)
+        return _last_id
+
+
+@dataclass(slots=True)
 class Entry:
-    """药品条目数据模型"""
+    """药品条目数据模型（使用__slots__，实例不带__dict__，条目多时更省内存）"""
 
     id: int
     text: str
@@ -18,16 +32,17 @@ class Entry:
 
     @classmethod
     def create(cls, text: str) -> "Entry":
-        """创建新的Entry实例"""
+        """创建新的Entry实例（ID和时间取自同一时刻）"""
+        now = datetime.now()
         return cls(
-            id=int(datetime.now().timestamp() * 1000),
+            id=_next_id(now),
             text=text.strip(),
-            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            timestamp=now.strftime('%Y-%m-%d %H:%M:%S')
         )
 
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return asdict(self)
+        """转换为字典（字段都是不可变的标量，直接构建，不需要asdict的递归复制）"""
+        return {'id': self.id, 'text': self.text, 'timestamp': self.timestamp}
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Entry":
@@ -49,13 +64,32 @@ class EntryList:
     def __init__(self, entries: List[Entry] = None):
         self.entries = entries or []
 
+    @property
+    def entries(self) -> List[Entry]:
+        """条目列表（增删改请通过本类的方法，直接修改列表或Entry不会更新ID索引和表格缓存）"""
+        return self._entries
+
+    @entries.setter
+    def entries(self, entries: List[Entry]) -> None:
+        self._entries = entries
+        # ID -> 条目；ID重复时（同一毫秒内创建）保留第一个，与按顺序查找的结果一致
+        self._by_id: Dict[int, Entry] = {}
+        for entry in entries:
+            self._by_id.setdefault(entry.id, entry)
+        # to_dataframe的缓存结果，None表示需要重新构建；通过本类的方法修改时更新或置为None
+        self._df_cache: Optional[List[List[Any]]] = None
+
     def add(self, text: str) -> Entry:
         """添加新条目"""
         if not text or not text.strip():
             raise ValueError("条目内容不能为空")
 
         entry = Entry.create(text)
-        self.entries.append(entry)
+        self._entries.append(entry)
+        self._by_id.setdefault(entry.id, entry)
+        if self._df_cache is not None:
+            # 倒序显示，新条目在最前面，其他行的序号不变
+            self._df_cache.insert(0, [len(self._entries), entry.text, entry.timestamp, entry.id])
         return entry
 
     def get_all(self) -> List[Entry]:
@@ -68,7 +102,9 @@ class EntryList:
 
     def clear(self) -> None:
         """清空所有条目"""
-        self.entries.clear()
+        self._entries.clear()
+        self._by_id.clear()
+        self._df_cache = None
 
     def delete_by_id(self, entry_id: int) -> bool:
         """
@@ -80,9 +116,15 @@ class EntryList:
         Returns:
             删除成功返回True，未找到返回False
         """
-        original_length = len(self.entries)
-        self.entries = [e for e in self.entries if e.id != entry_id]
-        return len(self.entries) < original_length
+        if self._by_id.pop(entry_id, None) is None:
+            return False
+        # 从后往前原地删除（ID重复的条目一并删除），不重新构建整个列表
+        entries = self._entries
+        for i in range(len(entries) - 1, -1, -1):
+            if entries[i].id == entry_id:
+                del entries[i]
+        self._df_cache = None
+        return True
 
     def update_by_id(self, entry_id: int, new_text: str) -> bool:
         """
@@ -98,11 +140,12 @@ class EntryList:
         if not new_text or not new_text.strip():
             raise ValueError("条目内容不能为空")
 
-        for entry in self.entries:
-            if entry.id == entry_id:
-                entry.text = new_text.strip()
-                return True
-        return False
+        entry = self._by_id.get(entry_id)
+        if entry is None:
+            return False
+        entry.text = new_text.strip()
+        self._df_cache = None
+        return True
 
     def get_by_id(self, entry_id: int) -> Entry:
         """
@@ -114,35 +157,34 @@ class EntryList:
         Returns:
             找到返回Entry对象，未找到返回None
         """
-        for entry in self.entries:
-            if entry.id == entry_id:
-                return entry
-        return None
+        return self._by_id.get(entry_id)
 
     def count(self) -> int:
         """获取条目数量"""
         return len(self.entries)
 
     def to_dict_list(self) -> List[Dict[str, Any]]:
-        """转换为字典列表"""
-        return [entry.to_dict() for entry in self.entries]
+        """转换为字典列表（保存时调用，直接构建字典，与Entry.to_dict相同）"""
+        return [{'id': e.id, 'text': e.text, 'timestamp': e.timestamp} for e in self._entries]
 
     def to_dataframe(self) -> List[List[Any]]:
         """
         转换为Dataframe格式（倒序，最新的在上面）
         返回: [[序号, 文本, 时间, ID], ...]
         """
-        reversed_entries = self.get_reversed()
-        total = len(self.entries)
-
-        return [
-            entry.to_dataframe_row(total - i)
-            for i, entry in enumerate(reversed_entries)
-        ]
+        if self._df_cache is None:
+            # 直接倒序遍历并内联构建行（与Entry.to_dataframe_row相同），不复制倒序列表
+            total = len(self._entries)
+            self._df_cache = [
+                [total - i, e.text, e.timestamp, e.id]
+                for i, e in enumerate(reversed(self._entries))
+            ]
+        # 调用方可能修改返回的行（如表格编辑），返回逐行的浅拷贝
+        return [row[:] for row in self._df_cache]
 
     @classmethod
-    def from_dict_list(cls, data: List[Dict[str, Any]]) -> "EntryList":
-        """从字典列表创建EntryList实例"""
+    def from_dict_list(cls, data: Iterable[Dict[str, Any]]) -> "EntryList":
+        """从字典列表（或逐条产出字典的迭代器）创建EntryList实例"""
         entries = [Entry.from_dict(item) for item in data]
         return cls(entries)
 
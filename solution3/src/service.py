@@ -19,15 +19,20 @@ class EntryService:
 
     def __init__(self, storage: JSONStorage):
         self.storage = storage
+        # 内存中的条目列表是唯一的数据来源：读取都从这里返回，修改后写入存储
         self.entry_list = None
         logger.info("EntryService 初始化")
         self.load()
 
     def load(self) -> None:
         """从存储加载数据"""
-        data = self.storage.load()
-        self.entry_list = EntryList.from_dict_list(data)
-        logger.info(f"加载数据: {len(data)} 条")
+        # 逐条转换为Entry，大文件不必先构建完整的字典列表
+        self.entry_list = EntryList.from_dict_list(self.storage.load_entries())
+        logger.info(f"加载数据: {len(self.entry_list)} 条")
+
+    def flush(self) -> bool:
+        """写出存储层缓冲的修改（使用BufferedJSONStorage时，退出前必须调用）"""
+        return self.storage.flush()
 
     def save(self) -> bool:
         """保存数据到存储"""
@@ -39,6 +44,13 @@ class EntryService:
             logger.error("保存数据失败")
         return result
 
+    def _append_op(self, op: dict) -> bool:
+        """单条增删改只追加一条操作记录，不重写整个文件"""
+        result = self.storage.append_op(op)
+        if not result:
+            logger.error(f"追加操作记录失败: {op.get('op')}")
+        return result
+
     def add_entry(self, text: str) -> Tuple[str, List[List[Any]], str, str]:
         """
         添加新条目
@@ -55,9 +67,10 @@ class EntryService:
 
         try:
             entry = self.entry_list.add(text)
-            self.save()
+            saved = self._append_op({'op': 'add', 'entry': entry.to_dict()})
             logger.info(f"添加条目: {text[:50]}..." if len(text) > 50 else f"添加条目: {text}")
-            return "✅ 已添加", self.get_dataframe(), self.get_count(), ""
+            status = "✅ 已添加" if saved else "⚠️ 已添加，但写入文件失败"
+            return status, self.get_dataframe(), self.get_count(), ""
         except Exception as e:
             logger.error(f"添加条目失败: {e}", exc_info=True)
             return f"❌ 添加失败: {e}", self.get_dataframe(), self.get_count(), text
@@ -71,9 +84,10 @@ class EntryService:
         """
         count = self.entry_list.count()
         self.entry_list.clear()
-        self.save()
+        saved = self.save()
         logger.warning(f"清空所有数据: {count} 条")
-        return "✅ 已清空所有条目", [], self.get_count()
+        status = "✅ 已清空所有条目" if saved else "⚠️ 已清空，但写入文件失败"
+        return status, [], self.get_count()
 
     def delete_entry(self, entry_id: int) -> Tuple[str, List[List[Any]], str]:
         """
@@ -91,8 +105,9 @@ class EntryService:
         try:
             entry_id = int(entry_id)
             if self.entry_list.delete_by_id(entry_id):
-                self.save()
-                return "✅ 已删除", self.get_dataframe(), self.get_count()
+                saved = self._append_op({'op': 'delete', 'id': entry_id})
+                status = "✅ 已删除" if saved else "⚠️ 已删除，但写入文件失败"
+                return status, self.get_dataframe(), self.get_count()
             else:
                 return "❌ 未找到该条目", self.get_dataframe(), self.get_count()
         except (ValueError, TypeError) as e:
@@ -118,8 +133,9 @@ class EntryService:
         try:
             entry_id = int(entry_id)
             if self.entry_list.update_by_id(entry_id, new_text):
-                self.save()
-                return "✅ 已更新", self.get_dataframe(), self.get_count(), None
+                saved = self._append_op({'op': 'update', 'id': entry_id, 'text': new_text.strip()})
+                status = "✅ 已更新" if saved else "⚠️ 已更新，但写入文件失败"
+                return status, self.get_dataframe(), self.get_count(), None
             else:
                 return "❌ 未找到该条目", self.get_dataframe(), self.get_count(), None
         except ValueError as e:
@@ -187,7 +203,8 @@ class EntryService:
         # 检查是否为空
         if df_data is None or (isinstance(df_data, list) and len(df_data) == 0):
             self.entry_list.clear()
-            self.save()
+            if not self.save():
+                return "❌ 保存失败", [], self.get_count()
             return "✅ 已清空", [], self.get_count()
 
         try:
@@ -236,6 +253,11 @@ class EntryService:
             # 反序回来（Dataframe是倒序显示的）
             new_entries.reverse()
 
+            # 内容与内存中（即已写入存储）的数据完全相同时不重写文件
+            if new_entries == self.entry_list.to_dict_list():
+                timestamp = datetime.now().strftime('%H:%M:%S')
+                return f"✅ 数据没有修改，无需保存 ({timestamp})", self.get_dataframe(), self.get_count()
+
             # 替换整个列表并保存
             self.entry_list = EntryList.from_dict_list(new_entries)
             save_result = self.save()
@@ -263,13 +285,18 @@ class EntryService:
 
     def refresh(self) -> Tuple[List[List[Any]], str]:
         """
-        刷新数据（重新加载）
+        刷新数据
+        先写出缓冲的修改；数据文件被其他进程（其他UI实例）修改过时重新加载，
+        否则内存中的entry_list就是最新的，直接返回，不重新读取解析文件
 
         Returns:
             (dataframe数据, 统计信息)
         """
         logger.info("刷新数据")
-        self.load()
+        # 写出失败时内存中有尚未落盘的修改，重新加载会丢掉它们
+        if self.flush() and self.storage.changed_on_disk():
+            logger.info("数据文件已被其他进程修改，重新加载")
+            self.load()
         return self.get_dataframe(), self.get_count()
 
     def export_to_text(self) -> str:
@@ -1,44 +1,254 @@
 """
 数据存储模块
-负责JSON文件的读写操作
+负责JSON文件的读写操作：JSON数组快照 + 单条增删改的追加日志（JSONL）
 """
 
 import json
 import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+
+# orjson为可选依赖，编码/解码比标准库json快数倍；未安装时回退到json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson为可选依赖，大文件边读边解析，不需要一次构建完整的对象列表
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# msgpack为可选依赖，MsgpackStorage的二进制快照格式需要
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+__all__ = ['JSONStorage', 'MsgpackStorage', 'BufferedJSONStorage']
 
 logger = logging.getLogger(__name__)
+# 每次读写都会执行的状态日志用debug级别和%s延迟格式化：日志级别关闭时不拼接字符串
+
+# 文件写缓冲区大小：整个文件先编码成bytes再一次write，较小的文件只需一次系统调用
+BUFFER_SIZE = 64 * 1024
+
+# 日志超过快照大小且不小于该值时合并回快照（快照很小时不必每次追加都合并）
+COMPACT_MIN_BYTES = 64 * 1024
+
+# 快照不小于该值时load_entries()用ijson流式解析；小文件一次解析更快
+STREAM_MIN_BYTES = 64 * 1024
+
+# 跨进程写锁：最多等待LOCK_TIMEOUT秒，每LOCK_POLL_INTERVAL秒重试一次；
+# 超过LOCK_STALE_SECONDS未更新的锁文件视为崩溃进程遗留，直接删除
+LOCK_TIMEOUT = 3.0
+LOCK_POLL_INTERVAL = 0.1
+LOCK_STALE_SECONDS = 30.0
 
 
 class JSONStorage:
-    """JSON文件存储类"""
+    """
+    JSON文件存储类
+    save()整体写入JSON数组快照；append_op()只向日志文件追加一行操作记录，
+    load()在快照上按顺序重放日志，日志比快照还大时合并回快照
+    """
 
-    def __init__(self, file_path: Path):
+    def __init__(self, file_path: Path, pretty: bool = False):
+        """
+        Args:
+            file_path: 快照文件路径
+            pretty: 快照是否缩进排版（便于人工查看）；默认紧凑格式，文件更小、读写更快
+        """
         self.file_path = file_path
+        self.pretty = pretty
+        # 追加日志：快照文件名加.jsonl（voice_entries.json.jsonl），不同格式的快照各用各的日志
+        self.log_path = file_path.with_name(file_path.name + '.jsonl')
+        # 写锁旁路文件：多个进程（多个UI实例、pytest-xdist的worker）共用同一数据文件时串行写入
+        self.lock_path = Path(str(file_path) + '.lock')
+        # 本实例持有写锁的嵌套层数：同一线程在持有锁时再次写入（如compact中加载时触发的迁移保存）
+        # 直接进入，不会因为自己持有的锁文件而等待超时；RLock让同一实例的多个线程依次持有
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        # 最近一次读取或由本实例写入后快照和日志的(修改时间, 大小)，用于判断其他进程是否写过文件
+        self._known_signature = None
         logger.info(f"JSONStorage 初始化: {file_path}")
 
     def load(self) -> List[Dict[str, Any]]:
         """
-        从JSON文件加载数据
+        从JSON文件加载数据，并重放追加日志
 
         Returns:
             数据字典列表，如果文件不存在或解析失败则返回空列表
         """
-        if not self.file_path.exists():
-            logger.info(f"数据文件不存在: {self.file_path}")
-            return []
+        # 读取前记录：读取过程中其他进程写入时，下次检查仍会发现变化
+        self._known_signature = self._signature()
+        data = self._load_snapshot()
+        self._replay_log(data)
+        return data
+
+    def load_entries(self) -> Iterator[Dict[str, Any]]:
+        """
+        逐条产出数据字典，调用方直接构建对象，不保留中间的字典列表
 
+        快照较大、已安装ijson且没有待重放的日志时边读边解析；
+        否则等同于遍历load()的结果。解析中途出错时只产出已读到的条目
+        """
+        if ijson is None or self.log_path.exists():
+            yield from self.load()
+            return
+
+        self._known_signature = self._signature()
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            f = open(self.file_path, 'rb', buffering=BUFFER_SIZE)
+        except FileNotFoundError:
+            logger.debug("数据文件不存在: %s", self.file_path)
+            return
+        except IOError as e:
+            logger.error(f"加载文件失败: {self.file_path}, 错误: {e}")
+            return
+
+        with f:
+            if os.fstat(f.fileno()).st_size < STREAM_MIN_BYTES:
+                try:
+                    data = self._decode(f.read())
+                except (ValueError, IOError) as e:
+                    logger.error(f"加载文件失败: {self.file_path}, 错误: {e}")
+                    return
+                if isinstance(data, list):
+                    yield from data
+                return
+
+            count = 0
+            try:
+                for item in ijson.items(f, 'item', use_float=True):
+                    count += 1
+                    yield item
+            except (ijson.JSONError, IOError) as e:
+                logger.error(f"流式加载文件失败: {self.file_path}, 已读取 {count} 条, 错误: {e}")
+                return
+            logger.debug("流式加载文件成功: %s, %d 条", self.file_path, count)
+
+    def _load_snapshot(self) -> List[Dict[str, Any]]:
+        """加载JSON数组快照"""
+        # 直接打开而不先exists()，文件不存在时省掉一次多余的stat
+        try:
+            with open(self.file_path, 'rb', buffering=BUFFER_SIZE) as f:
+                data = self._decode(f.read())
                 result = data if isinstance(data, list) else []
-                logger.info(f"加载文件成功: {self.file_path}, {len(result)} 条")
+                logger.debug("加载文件成功: %s, %d 条", self.file_path, len(result))
                 return result
-        except (json.JSONDecodeError, IOError) as e:
+        except FileNotFoundError:
+            logger.debug("数据文件不存在: %s", self.file_path)
+            return []
+        except (ValueError, IOError) as e:
             logger.error(f"加载文件失败: {self.file_path}, 错误: {e}")
             return []
 
+    def _encode(self, data: List[Dict[str, Any]]) -> bytes:
+        """编码快照"""
+        return _dumps(data, self.pretty)
+
+    def _decode(self, raw: bytes) -> Any:
+        """解码快照，格式错误时抛出ValueError"""
+        return _loads(raw)
+
+    def _replay_log(self, data: List[Dict[str, Any]]) -> None:
+        """在快照数据上按顺序重放追加日志（没有日志时直接返回）"""
+        count = 0
+        try:
+            with open(self.log_path, 'rb', buffering=BUFFER_SIZE) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        op = _loads(line)
+                    except ValueError:
+                        # 崩溃时最后一行可能只写了一半，跳过
+                        logger.warning(f"跳过损坏的日志行: {self.log_path}")
+                        continue
+                    _apply_op(data, op)
+                    count += 1
+        except FileNotFoundError:
+            return
+        except IOError as e:
+            logger.error(f"读取日志失败: {self.log_path}, 错误: {e}")
+            return
+        logger.debug("重放日志: %s, %d 条操作", self.log_path, count)
+
+    # 写入立即落到文件，不需要调用flush()
+    needs_explicit_flush = False
+
+    def append_op(self, op: Dict[str, Any]) -> bool:
+        """
+        追加一条操作记录（不重写快照）
+
+        Args:
+            op: {"op": "add", "entry": {...}} / {"op": "update", "id": ..., "text": ...}
+                / {"op": "delete", "id": ...}
+
+        Returns:
+            追加成功返回True，失败返回False
+        """
+        return self.append_lines(_dumps(op) + b'\n')
+
+    def append_lines(self, lines: bytes) -> bool:
+        """追加已编码的日志行（每行一条操作，以换行结尾），一次写入"""
+        try:
+            with self._write_lock():
+                # 写入前文件与已知的一致时，追加后的文件仍只包含已知的修改
+                in_sync = self._signature() == self._known_signature
+                with open(self.log_path, 'a+b', buffering=BUFFER_SIZE) as f:
+                    # 上次写入中断时日志末尾是没有换行的半行：先补一个换行，
+                    # 否则新记录会接在半行后面，重放时整行被跳过
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b'\n':
+                            lines = b'\n' + lines
+                    f.write(lines)
+                if in_sync:
+                    self._known_signature = self._signature()
+        except IOError as e:
+            logger.error(f"追加日志失败: {self.log_path}, 错误: {e}")
+            return False
+
+        if self._log_too_large():
+            self.compact()
+        return True
+
+    def _log_too_large(self) -> bool:
+        """日志超过快照大小（且不小于COMPACT_MIN_BYTES）时需要合并"""
+        try:
+            log_size = self.log_path.stat().st_size
+        except OSError:
+            return False
+        try:
+            snapshot_size = self.file_path.stat().st_size
+        except OSError:
+            snapshot_size = 0
+        return log_size > max(snapshot_size, COMPACT_MIN_BYTES)
+
+    def compact(self) -> bool:
+        """将日志合并回快照（重放后整体保存，save会删除日志）"""
+        try:
+            # 读取和保存之间持有写锁，其他进程此时追加的记录不会随日志一起被删除
+            with self._write_lock():
+                in_sync = self._signature() == self._known_signature
+                data = self.load()
+                logger.info(f"合并日志: {self.log_path}")
+                result = self._save_unlocked(data)
+                if not in_sync:
+                    # 合并进来的有其他进程的修改，调用方内存中的数据仍需重新加载
+                    self._known_signature = None
+                return result
+        except IOError as e:
+            logger.error(f"合并日志失败: {self.log_path}, 错误: {e}")
+            return False
+
     def save(self, data: List[Dict[str, Any]]) -> bool:
         """
         保存数据到JSON文件
@@ -50,22 +260,386 @@ class JSONStorage:
             保存成功返回True，失败返回False
         """
         try:
-            # 确保父目录存在
-            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._write_lock():
+                return self._save_unlocked(data)
+        except IOError as e:
+            logger.error(f"保存文件失败: {self.file_path}, 错误: {e}")
+            return False
 
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logger.info(f"保存文件成功: {self.file_path}, {len(data)} 条")
+    def _save_unlocked(self, data: List[Dict[str, Any]]) -> bool:
+        """写入快照并删除日志（调用方持有写锁）"""
+        try:
+            # 先整体编码再一次性写入
+            payload = self._encode(data)
+            # 先写临时文件并落盘，再原子替换，写到一半崩溃也不会损坏原文件
+            tmp_path = self.file_path.with_suffix(self.file_path.suffix + '.tmp')
+            try:
+                with open(tmp_path, 'wb', buffering=BUFFER_SIZE) as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.file_path)
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            # 快照已包含全部数据，之前的日志作废
+            self.log_path.unlink(missing_ok=True)
+            self._known_signature = self._signature()
+            logger.debug("保存文件成功: %s, %d 条", self.file_path, len(data))
             return True
-        except IOError as e:
+        except (IOError, TypeError) as e:
             logger.error(f"保存文件失败: {self.file_path}, 错误: {e}")
             return False
 
+    @contextmanager
+    def _write_lock(self):
+        """
+        跨进程写锁：用O_CREAT|O_EXCL独占创建.lock文件，释放时删除；同一实例可重入
+
+        等待超过LOCK_TIMEOUT仍拿不到锁（或无法创建锁文件）时记录警告后直接写入，
+        不会因为锁而让保存失败
+        """
+        with self._thread_lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with self._file_lock():
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+
+    @contextmanager
+    def _file_lock(self):
+        """独占创建.lock文件（_write_lock的最外层调用才会执行）"""
+        # 确保父目录存在（锁文件与数据文件在同一目录）
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = None
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_RDWR)
+                break
+            except FileExistsError:
+                if self._lock_is_stale():
+                    logger.warning(f"删除过期的写锁: {self.lock_path}")
+                    self.lock_path.unlink(missing_ok=True)
+                    continue
+                if time.monotonic() >= deadline:
+                    logger.warning(f"等待写锁超时，直接写入: {self.lock_path}")
+                    break
+                time.sleep(LOCK_POLL_INTERVAL)
+            except OSError as e:
+                logger.warning(f"无法创建写锁，直接写入: {self.lock_path}, 错误: {e}")
+                break
+        try:
+            yield
+        finally:
+            if fd is not None:
+                os.close(fd)
+                self.lock_path.unlink(missing_ok=True)
+
+    def _lock_is_stale(self) -> bool:
+        """锁文件长时间未更新（持有锁的进程已崩溃）"""
+        try:
+            return time.time() - self.lock_path.stat().st_mtime > LOCK_STALE_SECONDS
+        except FileNotFoundError:
+            # 刚被释放，可以重试
+            return True
+        except OSError:
+            return False
+
+    def _signature(self) -> tuple:
+        """快照和日志的(修改时间, 大小)，文件不存在时为None"""
+        result = []
+        for path in (self.file_path, self.log_path):
+            try:
+                stat = path.stat()
+                result.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                result.append(None)
+        return tuple(result)
+
+    def changed_on_disk(self) -> bool:
+        """自最近一次读取或本实例写入以来，文件是否被其他进程（或其他存储实例）修改过"""
+        return self._signature() != self._known_signature
+
     def clear(self) -> bool:
         """清空数据文件"""
         logger.warning(f"清空文件: {self.file_path}")
         return self.save([])
 
     def exists(self) -> bool:
-        """检查文件是否存在"""
-        return self.file_path.exists()
+        """检查文件是否存在（快照或日志）"""
+        return self.file_path.exists() or self.log_path.exists()
+
+    def flush(self) -> bool:
+        """没有缓冲的写入，直接返回True（与BufferedJSONStorage接口一致）"""
+        return True
+
+
+class MsgpackStorage(JSONStorage):
+    """
+    快照使用msgpack二进制格式的存储类：编解码比JSON快、文件更小，追加日志仍为JSONL
+    快照不存在时从legacy_path指定的JSON快照（连同其日志）迁移一次
+    """
+
+    def __init__(self, file_path: Path, legacy_path: Optional[Path] = None):
+        """
+        Args:
+            file_path: msgpack快照文件路径
+            legacy_path: 需要迁移的旧JSON快照路径（可选）
+
+        Raises:
+            ImportError: 未安装msgpack
+        """
+        if msgpack is None:
+            raise ImportError("MsgpackStorage需要安装msgpack")
+        super().__init__(file_path)
+        self.legacy_path = legacy_path
+        # 只在第一次加载时检查是否需要迁移
+        self._migration_checked = legacy_path is None
+
+    def _encode(self, data: List[Dict[str, Any]]) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def _decode(self, raw: bytes) -> Any:
+        try:
+            return msgpack.unpackb(raw, raw=False)
+        except msgpack.UnpackException as e:
+            raise ValueError(e) from e
+
+    def load(self) -> List[Dict[str, Any]]:
+        """从msgpack快照加载数据并重放日志；首次加载时按需从JSON快照迁移"""
+        if not self._migration_checked:
+            self._migration_checked = True
+            if not self.file_path.exists() and self.legacy_path.exists():
+                return self._migrate()
+        return super().load()
+
+    def _migrate(self) -> List[Dict[str, Any]]:
+        """
+        读取旧JSON快照（并重放其日志），保存为msgpack快照；
+        成功后把旧快照和日志改名为*.migrated，回退到JSONStorage时不会读到过期的数据
+        """
+        legacy = JSONStorage(self.legacy_path)
+        data = legacy.load()
+        if not self.save(data):
+            return data
+        logger.info(f"已迁移为msgpack格式: {self.legacy_path} -> {self.file_path}, {len(data)} 条")
+        for path in (legacy.file_path, legacy.log_path):
+            try:
+                os.replace(path, path.with_name(path.name + '.migrated'))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"标记已迁移的旧文件失败: {path}, 错误: {e}")
+        return data
+
+    def load_entries(self) -> Iterator[Dict[str, Any]]:
+        """逐条产出数据字典；没有待重放的日志时用msgpack.Unpacker边读边解析"""
+        if not self._migration_checked or self.log_path.exists():
+            yield from self.load()
+            return
+
+        try:
+            f = open(self.file_path, 'rb', buffering=BUFFER_SIZE)
+        except FileNotFoundError:
+            logger.debug("数据文件不存在: %s", self.file_path)
+            return
+        except IOError as e:
+            logger.error(f"加载文件失败: {self.file_path}, 错误: {e}")
+            return
+
+        with f:
+            unpacker = msgpack.Unpacker(f, raw=False)
+            count = 0
+            try:
+                for _ in range(unpacker.read_array_header()):
+                    yield unpacker.unpack()
+                    count += 1
+            except (ValueError, msgpack.UnpackException, IOError) as e:
+                logger.error(f"加载文件失败: {self.file_path}, 已读取 {count} 条, 错误: {e}")
+                return
+            logger.debug("流式加载文件成功: %s, %d 条", self.file_path, count)
+
+    def exists(self) -> bool:
+        """检查文件是否存在（包括尚未迁移的旧JSON快照）"""
+        if super().exists():
+            return True
+        return self.legacy_path is not None and self.legacy_path.exists()
+
+
+class BufferedJSONStorage:
+    """
+    写合并的存储包装：save()/append_op()先记在内存中，
+    停止写入debounce_ms后、待写内容超过max_pending_bytes时或调用flush()时才写文件，
+    连续的多次修改只写一次。进程退出前必须调用flush()，否则最后一批修改会丢失
+
+    save()/append_op()返回True只表示修改已排队；后台写入失败时待写内容保留，
+    下一次save()/append_op()会立即重试写入并返回结果，flush()同样返回写入是否成功
+    """
+
+    needs_explicit_flush = True
+
+    def __init__(self, inner: JSONStorage, max_pending_bytes: int = 256 * 1024, debounce_ms: int = 50):
+        """
+        Args:
+            inner: 实际读写文件的JSONStorage
+            max_pending_bytes: 待写的日志超过该字节数时立即写入
+            debounce_ms: 最后一次修改后等待多少毫秒再写入
+        """
+        self.inner = inner
+        self.max_pending_bytes = max_pending_bytes
+        self.debounce_ms = debounce_ms
+        # 待写的完整快照（None表示没有），以及快照之后待追加的日志行
+        self._pending_data: Optional[List[Dict[str, Any]]] = None
+        self._pending_lines: List[bytes] = []
+        self._pending_bytes = 0
+        self._timer: Optional[threading.Timer] = None
+        # 上一次写入是否失败（失败后不再等待定时器，下一次修改时立即重试）
+        self._write_failed = False
+        # 定时器线程与请求线程都会调用flush
+        self._lock = threading.RLock()
+
+    @property
+    def file_path(self) -> Path:
+        return self.inner.file_path
+
+    def load(self) -> List[Dict[str, Any]]:
+        """先写出待写的修改，再从文件加载"""
+        self.flush()
+        return self.inner.load()
+
+    def load_entries(self) -> Iterator[Dict[str, Any]]:
+        """先写出待写的修改，再逐条加载"""
+        self.flush()
+        return self.inner.load_entries()
+
+    def save(self, data: List[Dict[str, Any]]) -> bool:
+        """
+        记下完整快照（之前待追加的日志被快照取代），稍后写入
+
+        Returns:
+            已排队返回True；上一次写入失败时立即重试，返回本次写入是否成功
+        """
+        with self._lock:
+            self._pending_data = list(data)
+            self._pending_lines = []
+            self._pending_bytes = 0
+            if self._write_failed:
+                return self.flush()
+            self._schedule()
+        return True
+
+    def append_op(self, op: Dict[str, Any]) -> bool:
+        """
+        记下一条操作记录，稍后与其他记录一起追加
+
+        Returns:
+            已排队返回True；待写内容超过上限或上一次写入失败时立即写入，返回写入是否成功
+        """
+        line = _dumps(op) + b'\n'
+        with self._lock:
+            self._pending_lines.append(line)
+            self._pending_bytes += len(line)
+            if self._write_failed or self._pending_bytes > self.max_pending_bytes:
+                return self.flush()
+            self._schedule()
+        return True
+
+    def clear(self) -> bool:
+        """清空数据文件"""
+        return self.save([])
+
+    def exists(self) -> bool:
+        """检查文件是否存在（有待写的修改也算存在）"""
+        with self._lock:
+            if self._pending_data is not None or self._pending_lines:
+                return True
+        return self.inner.exists()
+
+    def changed_on_disk(self) -> bool:
+        """文件是否被其他进程修改过（待写的修改由本实例写出，不算在内）"""
+        return self.inner.changed_on_disk()
+
+    def _schedule(self) -> None:
+        """（重新）开始计时，停止修改debounce_ms后写入（调用方持有锁）"""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.debounce_ms / 1000, self._flush_in_background)
+        # 不阻止进程退出，退出前由flush()写出
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_background(self) -> None:
+        """定时器线程中的写入：失败时记录错误，由下一次修改或flush()报告并重试"""
+        if not self.flush():
+            logger.error(f"后台写入失败，待写的修改已保留: {self.inner.file_path}")
+
+    def flush(self) -> bool:
+        """
+        立即写出所有待写的修改
+
+        Returns:
+            写入成功（或没有待写内容）返回True，失败返回False（待写内容保留，下次再试）
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._write_failed = not self._write_pending()
+            return not self._write_failed
+
+    def _write_pending(self) -> bool:
+        """写出待写的快照和日志（调用方持有锁）"""
+        if self._pending_data is not None:
+            if not self.inner.save(self._pending_data):
+                return False
+            self._pending_data = None
+        if self._pending_lines:
+            if not self.inner.append_lines(b''.join(self._pending_lines)):
+                return False
+            self._pending_lines = []
+            self._pending_bytes = 0
+        return True
+
+    # commit()与flush()相同
+    commit = flush
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    """序列化为UTF-8 JSON字节串（默认紧凑单行）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0))
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(raw: bytes) -> Any:
+    """解析JSON字节串，格式错误时抛出ValueError"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _apply_op(data: List[Dict[str, Any]], op: Dict[str, Any]) -> None:
+    """在数据列表上应用一条日志操作（与EntryList的增删改语义一致）"""
+    kind = op.get('op')
+    if kind == 'add':
+        data.append(op['entry'])
+    elif kind == 'update':
+        for item in data:
+            if item.get('id') == op['id']:
+                item['text'] = op['text']
+                break
+    elif kind == 'delete':
+        data[:] = [item for item in data if item.get('id') != op['id']]
+    else:
+        logger.warning(f"未知的日志操作: {kind}")
@@ -16,6 +16,11 @@ class TestEntry:
         assert entry.id > 0
         assert len(entry.timestamp) > 0
 
+    def test_create_unique_ids(self):
+        """测试连续创建（同一毫秒内）的Entry的ID不重复且递增"""
+        ids = [Entry.create(f"药品{i}").id for i in range(100)]
+        assert ids == sorted(set(ids))
+
     def test_entry_to_dict(self):
         """测试Entry转字典"""
         entry = Entry(id=123, text="药品A", timestamp="2025-01-01 10:00:00")
@@ -230,3 +235,47 @@ class TestEntryList:
 
         found = entry_list.get_by_id(999999)
         assert found is None
+
+    def test_id_index_after_mutations(self):
+        """测试增删、清空及替换entries之后按ID查找仍然正确"""
+        entry1 = Entry(id=3001, text="药品1", timestamp="2025-01-01 10:00:00")
+        duplicate = Entry(id=3001, text="药品1重复", timestamp="2025-01-01 10:00:01")
+        entry_list = EntryList([entry1, duplicate])
+        assert entry_list.get_by_id(3001) is entry1
+
+        added = entry_list.add("药品2")
+        assert entry_list.get_by_id(added.id) is added
+
+        # 重复ID的条目一并删除
+        assert entry_list.delete_by_id(3001)
+        assert entry_list.get_by_id(3001) is None
+        assert entry_list.count() == 1
+        assert not entry_list.delete_by_id(3001)
+
+        entry_list.entries = [Entry(id=3002, text="药品3", timestamp="2025-01-02 10:00:00")]
+        assert entry_list.get_by_id(added.id) is None
+        assert entry_list.update_by_id(3002, "药品3改")
+        assert entry_list.get_by_id(3002).text == "药品3改"
+
+        entry_list.clear()
+        assert entry_list.get_by_id(3002) is None
+
+    def test_to_dataframe_after_mutations(self):
+        """测试增删改之后to_dataframe与重新构建的结果一致，修改返回值不影响缓存"""
+        entry_list = EntryList([
+            Entry(id=4001, text="药品1", timestamp="2025-01-01 10:00:00"),
+            Entry(id=4002, text="药品2", timestamp="2025-01-01 11:00:00"),
+        ])
+        df_data = entry_list.to_dataframe()
+        df_data[0][1] = "被调用方修改"
+        assert entry_list.to_dataframe()[0][1] == "药品2"
+
+        added = entry_list.add("药品3")
+        assert entry_list.to_dataframe()[0] == [3, "药品3", added.timestamp, added.id]
+
+        entry_list.update_by_id(4002, "药品2改")
+        entry_list.delete_by_id(4001)
+        assert entry_list.to_dataframe() == EntryList(entry_list.get_all()).to_dataframe()
+
+        entry_list.clear()
+        assert entry_list.to_dataframe() == []
@@ -16,6 +16,19 @@ def temp_service(tmp_path):
     return EntryService(storage)
 
 
+SEEDED_TEXTS = ["药品A", "药品B", "药品C"]
+
+
+@pytest.fixture(scope="session")
+def seeded_service(tmp_path_factory):
+    """整个测试会话共享的已填充服务（仅供只读测试使用，测试中不得修改数据）"""
+    file_path = tmp_path_factory.mktemp("svc") / "seeded_entries.json"
+    service = EntryService(JSONStorage(file_path))
+    for text in SEEDED_TEXTS:
+        service.add_entry(text)
+    return service
+
+
 class TestEntryService:
     """测试EntryService类"""
 
@@ -28,6 +41,20 @@ class TestEntryService:
         assert "1" in count
         assert text == ""  # 应该清空输入框
 
+    def test_add_entry_write_failure(self, tmp_path, monkeypatch):
+        """测试写入文件失败时不显示保存成功"""
+        storage = JSONStorage(tmp_path / "test_entries.json")
+        service = EntryService(storage)
+        monkeypatch.setattr(storage, "append_op", lambda op: False)
+        monkeypatch.setattr(storage, "save", lambda data: False)
+
+        status, df_data, _, _ = service.add_entry("测试药品1")
+        assert "✅" not in status
+        assert len(df_data) == 1
+
+        status, _, _ = service.save_dataframe([])
+        assert "❌" in status
+
     def test_add_empty_entry(self, temp_service):
         """测试添加空条目"""
         status, df_data, count, text = temp_service.add_entry("")
@@ -126,12 +153,9 @@ class TestEntryService:
         # 先清空
         temp_service.clear_all()
 
-        # 添加一些数据并获取所有ID
-        import time
+        # 添加一些数据并获取所有ID（同一毫秒内创建的ID也不会重复）
         temp_service.add_entry("药品1")
-        time.sleep(0.001)  # 确保时间戳不同
         temp_service.add_entry("药品2")
-        time.sleep(0.001)
         temp_service.add_entry("药品3")
 
         # 获取当前所有数据
@@ -152,19 +176,6 @@ class TestEntryService:
         assert "药品1" in texts
         assert "药品3" in texts
 
-    def test_delete_entry_not_found(self, temp_service):
-        """测试删除不存在的条目"""
-        temp_service.add_entry("药品1")
-
-        status, _, _ = temp_service.delete_entry(999999)
-        assert "❌" in status
-
-    def test_delete_entry_no_selection(self, temp_service):
-        """测试未选择条目时删除"""
-        status, _, _ = temp_service.delete_entry(None)
-        assert "❌" in status
-        assert "选择" in status
-
     def test_update_entry(self, temp_service):
         """测试更新条目"""
         # 添加数据
@@ -190,19 +201,6 @@ class TestEntryService:
         status, _, _, _ = temp_service.update_entry(entry_id, "   ")
         assert "❌" in status
 
-    def test_update_entry_not_found(self, temp_service):
-        """测试更新不存在的条目"""
-        temp_service.add_entry("药品1")
-
-        status, _, _, _ = temp_service.update_entry(999999, "新文本")
-        assert "❌" in status
-
-    def test_update_entry_no_selection(self, temp_service):
-        """测试未选择条目时更新"""
-        status, _, _, _ = temp_service.update_entry(None, "新文本")
-        assert "❌" in status
-        assert "选择" in status
-
     def test_get_entry_choices(self, temp_service):
         """测试获取条目选择列表"""
         # 空列表
@@ -235,16 +233,6 @@ class TestEntryService:
         text = temp_service.get_entry_text(entry_id)
         assert text == "测试药品"
 
-    def test_get_entry_text_not_found(self, temp_service):
-        """测试获取不存在的条目文本"""
-        text = temp_service.get_entry_text(999999)
-        assert text == ""
-
-    def test_get_entry_text_none(self, temp_service):
-        """测试传入None"""
-        text = temp_service.get_entry_text(None)
-        assert text == ""
-
     def test_save_dataframe(self, temp_service):
         """测试保存Dataframe编辑"""
         # 添加初始数据
@@ -266,11 +254,8 @@ class TestEntryService:
     def test_save_dataframe_delete_row(self, temp_service):
         """测试通过Dataframe删除行"""
         # 添加3条数据
-        import time
         temp_service.add_entry("药品1")
-        time.sleep(0.001)
         temp_service.add_entry("药品2")
-        time.sleep(0.001)
         temp_service.add_entry("药品3")
 
         # 获取dataframe
@@ -378,3 +363,98 @@ class TestEntryService:
         assert "✅" in status
         assert len(new_df) == 2
         assert new_df[0][1] == "修改后的药品2"
+
+    def test_save_dataframe_unchanged_skips_write(self, temp_service, monkeypatch):
+        """测试表格内容没有修改时不重写文件"""
+        temp_service.add_entry("药品1")
+        temp_service.add_entry("药品2")
+        df_data = temp_service.get_dataframe()
+
+        def fail_save(data):
+            raise AssertionError("内容未修改时不应写文件")
+
+        monkeypatch.setattr(temp_service.storage, "save", fail_save)
+        status, new_df, count = temp_service.save_dataframe(df_data)
+
+        assert "✅" in status
+        assert new_df == df_data
+        assert "2" in count
+
+    def test_refresh_does_not_reload(self, temp_service, monkeypatch):
+        """测试刷新直接返回内存中的数据，不重新读取文件"""
+        temp_service.add_entry("药品1")
+
+        def fail_load():
+            raise AssertionError("refresh不应读取文件")
+
+        monkeypatch.setattr(temp_service.storage, "load", fail_load)
+        df_data, count = temp_service.refresh()
+        assert df_data[0][1] == "药品1"
+        assert "1" in count
+
+    def test_refresh_reloads_external_changes(self, temp_service):
+        """测试数据文件被其他进程修改后，刷新时重新加载"""
+        temp_service.add_entry("药品1")
+
+        other = EntryService(JSONStorage(temp_service.storage.file_path))
+        other.add_entry("药品2")
+
+        df_data, count = temp_service.refresh()
+        assert [row[1] for row in df_data] == ["药品2", "药品1"]
+        assert "2" in count
+
+
+class TestEntryServiceReadOnly:
+    """只读测试：共享seeded_service，避免每个测试重建存储和数据文件"""
+
+    def test_get_dataframe(self, seeded_service):
+        """测试获取Dataframe数据（倒序）"""
+        df_data = seeded_service.get_dataframe()
+        assert [row[1] for row in df_data] == SEEDED_TEXTS[::-1]
+
+    def test_get_count(self, seeded_service):
+        """测试获取统计"""
+        assert str(len(SEEDED_TEXTS)) in seeded_service.get_count()
+
+    def test_get_entry_choices(self, seeded_service):
+        """测试获取条目选择列表"""
+        choices = seeded_service.get_entry_choices()
+        assert len(choices) == len(SEEDED_TEXTS)
+        assert "药品C" in choices[0][0]
+
+    def test_get_entry_text(self, seeded_service):
+        """测试获取条目文本"""
+        entry_id = seeded_service.get_dataframe()[0][3]
+        assert seeded_service.get_entry_text(entry_id) == "药品C"
+
+    def test_get_entry_text_not_found(self, seeded_service):
+        """测试获取不存在的条目文本"""
+        text = seeded_service.get_entry_text(999999)
+        assert text == ""
+
+    def test_get_entry_text_none(self, seeded_service):
+        """测试传入None"""
+        text = seeded_service.get_entry_text(None)
+        assert text == ""
+
+    def test_delete_entry_not_found(self, seeded_service):
+        """测试删除不存在的条目"""
+        status, _, _ = seeded_service.delete_entry(999999)
+        assert "❌" in status
+
+    def test_delete_entry_no_selection(self, seeded_service):
+        """测试未选择条目时删除"""
+        status, _, _ = seeded_service.delete_entry(None)
+        assert "❌" in status
+        assert "选择" in status
+
+    def test_update_entry_not_found(self, seeded_service):
+        """测试更新不存在的条目"""
+        status, _, _, _ = seeded_service.update_entry(999999, "新文本")
+        assert "❌" in status
+
+    def test_update_entry_no_selection(self, seeded_service):
+        """测试未选择条目时更新"""
+        status, _, _, _ = seeded_service.update_entry(None, "新文本")
+        assert "❌" in status
+        assert "选择" in status
@@ -5,7 +5,7 @@
 import json
 import pytest
 from pathlib import Path
-from src.storage import JSONStorage
+from src.storage import JSONStorage, BufferedJSONStorage
 
 
 @pytest.fixture
@@ -94,3 +94,250 @@ class TestJSONStorage:
         success = storage.save([{'id': 1, 'text': "test"}])
         assert success is True
         assert nested_path.exists()
+
+    def test_append_op_replay(self, temp_storage):
+        """测试追加操作记录后加载时按顺序重放"""
+        temp_storage.save([{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}])
+
+        assert temp_storage.append_op({'op': 'add', 'entry': {'id': 2, 'text': "药品2", 'timestamp': "2025-01-02 11:00:00"}})
+        assert temp_storage.append_op({'op': 'update', 'id': 1, 'text': "药品1改"})
+        assert temp_storage.append_op({'op': 'delete', 'id': 2})
+        assert temp_storage.log_path.exists()
+
+        loaded_data = temp_storage.load()
+        assert loaded_data == [{'id': 1, 'text': "药品1改", 'timestamp': "2025-01-01 10:00:00"}]
+
+        # 整体保存后日志作废
+        temp_storage.save(loaded_data)
+        assert not temp_storage.log_path.exists()
+        assert temp_storage.load() == loaded_data
+
+    def test_append_after_torn_line(self, temp_storage):
+        """测试日志末尾是写了一半的行时，之后追加的记录不会接在半行后面而丢失"""
+        temp_storage.save([{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}])
+        temp_storage.append_op({'op': 'add', 'entry': {'id': 2, 'text': "药品2", 'timestamp': "2025-01-02 11:00:00"}})
+        with open(temp_storage.log_path, 'ab') as f:
+            f.write(b'{"op": "add", "entry": {"id": 3')
+
+        assert temp_storage.append_op({'op': 'add', 'entry': {'id': 4, 'text': "药品4", 'timestamp': "2025-01-04 09:00:00"}})
+
+        assert [item['id'] for item in temp_storage.load()] == [1, 2, 4]
+
+    def test_compact(self, temp_storage):
+        """测试合并日志到快照"""
+        temp_storage.append_op({'op': 'add', 'entry': {'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}})
+        assert temp_storage.exists()
+
+        assert temp_storage.compact() is True
+        assert not temp_storage.log_path.exists()
+        assert json.loads(temp_storage.file_path.read_text(encoding='utf-8'))[0]['text'] == "药品1"
+
+    def test_save_compact_and_pretty(self, tmp_path):
+        """测试默认紧凑格式保存，pretty=True时缩进排版，两种格式都能加载"""
+        test_data = [{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}]
+
+        compact = JSONStorage(tmp_path / "compact.json")
+        compact.save(test_data)
+        assert "\n" not in compact.file_path.read_text(encoding='utf-8')
+        assert "药品1" in compact.file_path.read_text(encoding='utf-8')
+
+        pretty = JSONStorage(tmp_path / "pretty.json", pretty=True)
+        pretty.save(test_data)
+        assert "\n" in pretty.file_path.read_text(encoding='utf-8')
+        assert pretty.load() == compact.load() == test_data
+
+    def test_save_failure_keeps_original(self, temp_storage, monkeypatch):
+        """测试替换文件失败时原文件不受影响，也不留下临时文件"""
+        test_data = [{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}]
+        temp_storage.save(test_data)
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr("src.storage.os.replace", fail_replace)
+        assert temp_storage.save([]) is False
+        assert temp_storage.load() == test_data
+        assert list(temp_storage.file_path.parent.glob("*.tmp")) == []
+
+    def test_load_entries_matches_load(self, temp_storage, monkeypatch):
+        """测试逐条加载与load()结果一致（小文件、大文件流式解析、有日志三种情况）"""
+        import src.storage as storage_module
+
+        test_data = [{'id': i, 'text': f"药品{i}", 'timestamp': "2025-01-01 10:00:00"} for i in range(50)]
+        temp_storage.save(test_data)
+        assert list(temp_storage.load_entries()) == temp_storage.load() == test_data
+
+        if storage_module.ijson is not None:
+            monkeypatch.setattr(storage_module, "STREAM_MIN_BYTES", 0)
+            assert list(temp_storage.load_entries()) == test_data
+
+        temp_storage.append_op({'op': 'delete', 'id': 0})
+        assert list(temp_storage.load_entries()) == temp_storage.load() == test_data[1:]
+
+    def test_load_entries_missing_file(self, temp_storage):
+        """测试文件不存在时不产出任何条目"""
+        assert list(temp_storage.load_entries()) == []
+
+    def test_write_lock_released(self, temp_storage):
+        """测试保存和追加后不遗留写锁文件"""
+        temp_storage.save([])
+        temp_storage.append_op({'op': 'delete', 'id': 1})
+        assert temp_storage.compact() is True
+        assert not temp_storage.lock_path.exists()
+
+    def test_write_lock_timeout_falls_back(self, temp_storage, monkeypatch):
+        """测试其他进程一直持有写锁时，超时后直接写入，不删除对方的锁"""
+        import src.storage as storage_module
+
+        monkeypatch.setattr(storage_module, "LOCK_TIMEOUT", 0.05)
+        monkeypatch.setattr(storage_module, "LOCK_POLL_INTERVAL", 0.01)
+        temp_storage.lock_path.write_text("", encoding='utf-8')
+
+        test_data = [{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}]
+        assert temp_storage.save(test_data) is True
+        assert temp_storage.load() == test_data
+        assert temp_storage.lock_path.exists()
+
+    def test_stale_write_lock_removed(self, temp_storage, monkeypatch):
+        """测试崩溃进程遗留的过期写锁被删除，不必等待超时"""
+        import src.storage as storage_module
+
+        monkeypatch.setattr(storage_module, "LOCK_STALE_SECONDS", -1)
+        temp_storage.lock_path.write_text("", encoding='utf-8')
+
+        assert temp_storage.save([]) is True
+        assert not temp_storage.lock_path.exists()
+
+    def test_write_lock_is_reentrant(self, temp_storage, monkeypatch, caplog):
+        """测试持有写锁时再次写入不等待自己的锁文件，退出最外层后才删除锁文件"""
+        import src.storage as storage_module
+        monkeypatch.setattr(storage_module, "LOCK_TIMEOUT", 0.0)
+
+        with caplog.at_level("WARNING"), temp_storage._write_lock():
+            assert temp_storage.save([{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}]) is True
+            assert temp_storage.compact() is True
+            assert temp_storage.lock_path.exists()
+        assert not temp_storage.lock_path.exists()
+        assert "等待写锁超时" not in caplog.text
+        assert temp_storage.load()[0]['id'] == 1
+
+
+class TestMsgpackStorage:
+    """测试MsgpackStorage类（需要msgpack）"""
+
+    @pytest.fixture(autouse=True)
+    def _require_msgpack(self):
+        pytest.importorskip("msgpack")
+
+    def test_save_and_load(self, tmp_path):
+        """测试msgpack快照读写和日志重放"""
+        from src.storage import MsgpackStorage
+
+        storage = MsgpackStorage(tmp_path / "test_entries.msgpack")
+        test_data = [{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}]
+        assert storage.save(test_data) is True
+        assert storage.load() == test_data
+
+        storage.append_op({'op': 'update', 'id': 1, 'text': "药品1改"})
+        assert list(storage.load_entries()) == storage.load() == [{**test_data[0], 'text': "药品1改"}]
+
+    def test_migrate_from_json(self, tmp_path):
+        """测试msgpack快照不存在时从JSON快照及其日志迁移"""
+        from src.storage import MsgpackStorage
+
+        legacy = JSONStorage(tmp_path / "test_entries.json")
+        legacy.save([{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}])
+        legacy.append_op({'op': 'add', 'entry': {'id': 2, 'text': "药品2", 'timestamp': "2025-01-02 11:00:00"}})
+
+        storage = MsgpackStorage(tmp_path / "test_entries.msgpack", legacy_path=legacy.file_path)
+        assert storage.exists()
+        assert [item['id'] for item in storage.load_entries()] == [1, 2]
+        assert storage.file_path.exists()
+        assert not storage.log_path.exists()
+        # 旧快照和日志改名保留，不会再被读到
+        assert not legacy.file_path.exists()
+        assert not legacy.log_path.exists()
+        assert (tmp_path / "test_entries.json.migrated").exists()
+        assert (tmp_path / "test_entries.json.jsonl.migrated").exists()
+
+        # 迁移后只读msgpack快照
+        legacy.save([])
+        assert [item['id'] for item in MsgpackStorage(storage.file_path, legacy_path=legacy.file_path).load()] == [1, 2]
+
+    def test_compact_before_migration(self, tmp_path, monkeypatch, caplog):
+        """测试compact中加载触发迁移保存时不会等待自己持有的写锁"""
+        import src.storage as storage_module
+        from src.storage import MsgpackStorage
+        monkeypatch.setattr(storage_module, "LOCK_TIMEOUT", 0.0)
+        caplog.set_level("WARNING")
+
+        legacy = JSONStorage(tmp_path / "test_entries.json")
+        legacy.save([{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}])
+        storage = MsgpackStorage(tmp_path / "test_entries.msgpack", legacy_path=legacy.file_path)
+
+        assert storage.compact() is True
+        assert not storage.lock_path.exists()
+        assert "等待写锁超时" not in caplog.text
+        assert [item['id'] for item in storage.load()] == [1]
+
+    def test_log_not_shared_with_json(self, tmp_path):
+        """测试msgpack快照与同名JSON快照各用各的日志，回退到JSONStorage时不会重放msgpack的操作"""
+        from src.storage import MsgpackStorage
+
+        legacy = JSONStorage(tmp_path / "test_entries.json")
+        legacy.save([{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}])
+        storage = MsgpackStorage(tmp_path / "test_entries.msgpack")
+        storage.save([])
+        storage.append_op({'op': 'add', 'entry': {'id': 2, 'text': "药品2", 'timestamp': "2025-01-02 11:00:00"}})
+
+        assert storage.log_path != legacy.log_path
+        assert [item['id'] for item in JSONStorage(legacy.file_path).load()] == [1]
+        assert [item['id'] for item in storage.load()] == [2]
+
+
+class TestBufferedJSONStorage:
+    """测试BufferedJSONStorage类"""
+
+    def test_writes_are_coalesced_until_flush(self, tmp_path):
+        """测试修改先缓存在内存中，flush时一次写出"""
+        inner = JSONStorage(tmp_path / "test_entries.json")
+        storage = BufferedJSONStorage(inner, debounce_ms=60_000)
+
+        storage.save([{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}])
+        storage.append_op({'op': 'update', 'id': 1, 'text': "药品1改"})
+        assert storage.exists()
+        assert not inner.exists()
+
+        assert storage.flush() is True
+        assert inner.load() == [{'id': 1, 'text': "药品1改", 'timestamp': "2025-01-01 10:00:00"}]
+
+    def test_load_flushes_pending(self, tmp_path):
+        """测试加载前先写出待写的修改"""
+        storage = BufferedJSONStorage(JSONStorage(tmp_path / "test_entries.json"), debounce_ms=60_000)
+        storage.append_op({'op': 'add', 'entry': {'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}})
+        storage.save([])
+
+        assert storage.load() == []
+        assert not storage.inner.log_path.exists()
+
+    def test_flush_when_pending_too_large(self, tmp_path):
+        """测试待写内容超过上限时立即写入"""
+        inner = JSONStorage(tmp_path / "test_entries.json")
+        storage = BufferedJSONStorage(inner, max_pending_bytes=1, debounce_ms=60_000)
+
+        storage.append_op({'op': 'add', 'entry': {'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}})
+        assert inner.load()[0]['text'] == "药品1"
+
+    def test_write_failure_is_reported(self, tmp_path, monkeypatch):
+        """测试写入失败时flush()返回False，下一次修改立即重试并返回失败，恢复后写出全部修改"""
+        inner = JSONStorage(tmp_path / "test_entries.json")
+        storage = BufferedJSONStorage(inner, debounce_ms=60_000)
+        monkeypatch.setattr(inner, "save", lambda data: False)
+
+        assert storage.save([{'id': 1, 'text': "药品1", 'timestamp': "2025-01-01 10:00:00"}]) is True
+        assert storage.flush() is False
+        assert storage.append_op({'op': 'update', 'id': 1, 'text': "药品1改"}) is False
+
+        monkeypatch.undo()
+        assert storage.append_op({'op': 'add', 'entry': {'id': 2, 'text': "药品2", 'timestamp': "2025-01-02 11:00:00"}}) is True
+        assert [item['text'] for item in inner.load()] == ["药品1改", "药品2"]